@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import threading
+from typing import Any
+
+from .config import settings
+from .model_scheduler import ModelCallScheduler
+
+
+class AdmissionController:
+    """Decides per request whether to call the model or answer from locally computed context.
+
+    Shedding starts when interactive model calls back up past the high watermarks (queued calls or
+    age of the oldest queued call) and stops once both fall under the low watermarks, so the
+    service does not flap around a single threshold. A watermark of 0 disables that check.
+    """
+
+    def __init__(
+        self,
+        scheduler: ModelCallScheduler,
+        queue_high: int | None = None,
+        queue_low: int | None = None,
+        wait_high_ms: float | None = None,
+        wait_low_ms: float | None = None,
+    ) -> None:
+        self._scheduler = scheduler
+        self.queue_high = settings.shed_queue_high if queue_high is None else queue_high
+        self.queue_low = settings.shed_queue_low if queue_low is None else queue_low
+        self.wait_high_ms = settings.shed_wait_high_ms if wait_high_ms is None else wait_high_ms
+        self.wait_low_ms = settings.shed_wait_low_ms if wait_low_ms is None else wait_low_ms
+        self.shedding = False
+        self._lock = threading.Lock()
+        self.stats = {"admitted": 0, "shed": 0, "shed_episodes": 0}
+
+    def admit(self) -> bool:
+        """True when the request may call the model, False when it should get the degraded local answer."""
+        queued, oldest_s = self._scheduler.pressure("interactive")
+        oldest_ms = oldest_s * 1000
+        with self._lock:
+            if self.shedding:
+                if queued <= self.queue_low and oldest_ms <= self.wait_low_ms:
+                    self.shedding = False
+            elif (self.queue_high and queued >= self.queue_high) or (self.wait_high_ms and oldest_ms >= self.wait_high_ms):
+                self.shedding = True
+                self.stats["shed_episodes"] += 1
+            self.stats["shed" if self.shedding else "admitted"] += 1
+            return not self.shedding
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {"shedding": self.shedding, **self.stats}
@@ -1,33 +1,71 @@
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, List
 
+from pydantic import BaseModel, Field
+
+from ..analysis.code_cache import cached_narrative
+from ..analysis.contract_context import compact_contract_payload
+from ..analysis.scoring import contract_scorer
 from ..models import ContractRiskRequest, SecurityRiskResponse
 from .BaseRiskAgent import RiskTaskAgent
 
 CONTRACT_SYSTEM_PROMPT_ZH = (
     "你是加密钱包后端的合约风险分析助手。"
-    "请评估代码透明度、权限控制、代理升级能力与代币行为特征。"
-    "请使用中文输出各字段内容（包括 risk_level 使用 高/中/低/未知）。"
+    "风险等级、置信度和前三条原因已由本地评分模型（risk_score）确定，你不能更改。"
+    "你只需输出 summary（1~2 句风险结论）和 explanations（按 risk_score.reasons 顺序为每条原因写一句解释，共 3 条）。"
+    "请结合代码透明度、权限控制、代理升级能力与代币行为特征进行说明，并使用中文输出。"
 )
 
 CONTRACT_SYSTEM_PROMPT_EN = (
     "You are a smart-contract risk analyst for a crypto wallet backend. "
-    "Evaluate transparency, control permissions, proxy upgradeability, and token behavior flags. "
+    "The risk level, confidence and top three reasons are already fixed by a local scoring model (risk_score); "
+    "do not change them. "
+    "Return only summary (1-2 sentences) and explanations (one sentence per risk_score.reasons entry, in order, "
+    "exactly 3), grounded in transparency, control permissions, proxy upgradeability, and token behavior flags. "
     "You receive all request fields already expanded in plain text. "
     "Output all fields in English."
 )
 
 
+class ContractRiskLLMNarrative(BaseModel):
+    summary: str
+    explanations: List[str] = Field(default_factory=list, max_length=3)
+
+
 class ContractRiskAgent(RiskTaskAgent):
     def __init__(self) -> None:
-        super().__init__(CONTRACT_SYSTEM_PROMPT_ZH, [], response_model=SecurityRiskResponse)
+        super().__init__(CONTRACT_SYSTEM_PROMPT_ZH, [], response_model=ContractRiskLLMNarrative)
 
     def run(self, req: ContractRiskRequest) -> SecurityRiskResponse:
-        payload = req.model_dump()
+        payload, code_key = self._compact_code(req.model_dump())
+        scorer = contract_scorer()
+        verdict = scorer.score(payload)
+        if verdict["decisive"] or verdict["score"] is None:
+            # Clear-cut (or evidence-free) cases: the model could only rephrase what the scorer already decided.
+            return scorer.response(verdict, self._normalize_lang(payload.get("lang")))
+
+        payload["risk_score"] = {
+            "score": verdict["score"],
+            "risk_level": verdict["risk_level"],
+            "confidence": verdict["confidence"],
+            "reasons": [reason.reason for reason in scorer.top_reasons(verdict, "en")],
+        }
+        if code_key is None:
+            narrative = self._narrate(payload)
+        else:
+            # Shared by every instance of this code that scores the same; the verdict itself is always this request's.
+            narrative = cached_narrative(code_key, payload, lambda: self._narrate(payload))
         lang = self._normalize_lang(payload.get("lang"))
-        data = self.run_payload("contract_risk", payload, lang=lang)
-        return data if isinstance(data, SecurityRiskResponse) else SecurityRiskResponse.model_validate(data)
+        return scorer.response(verdict, lang, summary=narrative["summary"], explanations=narrative["explanations"])
+
+    def _narrate(self, payload: dict[str, Any]) -> dict[str, Any]:
+        data = self.run_payload("contract_risk", payload, lang=self._normalize_lang(payload.get("lang")))
+        narrative = data if isinstance(data, ContractRiskLLMNarrative) else ContractRiskLLMNarrative.model_validate(data)
+        return narrative.model_dump()
+
+    def _compact_code(self, payload: dict[str, Any]) -> tuple[dict[str, Any], str | None]:
+        return compact_contract_payload(payload)
 
     def _system_prompt_for_lang(self, lang: str) -> str:
         return CONTRACT_SYSTEM_PROMPT_EN if lang == "en" else CONTRACT_SYSTEM_PROMPT_ZH
@@ -53,9 +91,19 @@ class ContractRiskAgent(RiskTaskAgent):
             f"- enabled_privileges_count={len(enabled_privileges)}, enabled_privileges={enabled_privileges}\n"
             f"- risky_token_flags={risky_token_flags}\n"
             "Interpretation Hints:\n"
+            "- risk_score is the local weighted verdict; keep its risk_level and explain risk_score.reasons in order.\n"
             "- Unverified code and multiple privileged controls increase rug/abuse risk.\n"
             "- Proxy upgradeability should be treated as governance trust risk.\n"
-            "- Missing permissions or code metadata should reduce confidence.\n\n"
+            "- Missing permissions or code metadata should reduce confidence.\n"
+            "- bytecode_features come from a static scan of the runtime code: SELFDESTRUCT, CALLCODE or "
+            "DELEGATECALL outside an EIP-1967 proxy, privileged_functions and owner_gated_checks indicate "
+            "admin control even when permissions are not declared; functions and events are decoded from the "
+            "selector table and event topics.\n"
+            "- bytecode_features.minimal_proxy means an EIP-1167 clone: all logic lives at implementation_address.\n"
+            "- source_digest outlines the verified source: unguarded_privileged_functions, delegatecall_sites "
+            "and selfdestruct_sites deserve the most weight.\n"
+            "- clone_family lists near-duplicate matches against labelled templates; a high similarity_pct to a "
+            "high-risk template is strong evidence on its own.\n\n"
             "Raw Request Snapshot:\n"
             f"{flat_block if flat_block else '<no_fields>'}"
         )
@@ -81,9 +129,17 @@ class ContractRiskAgent(RiskTaskAgent):
             f"- enabled_privileges_count={len(enabled_privileges)}, enabled_privileges={enabled_privileges}\n"
             f"- risky_token_flags={risky_token_flags}\n"
             "解释提示:\n"
+            "- risk_score 为本地加权评分结论；保持其 risk_level，并按顺序解释 risk_score.reasons。\n"
             "- 代码未验证且高权限较多时，通常意味着更高的滥用或作恶风险。\n"
             "- 代理可升级应作为治理与信任风险处理。\n"
-            "- 权限信息或代码信息缺失时，应下调置信度。\n\n"
+            "- 权限信息或代码信息缺失时，应下调置信度。\n"
+            "- bytecode_features 来自运行时字节码静态扫描：SELFDESTRUCT、CALLCODE、非 EIP-1967 代理中的 "
+            "DELEGATECALL、privileged_functions 与 owner_gated_checks 即使未声明权限也表明存在管理员控制；"
+            "functions 与 events 由选择器表和事件主题解码。\n"
+            "- bytecode_features.minimal_proxy 表示 EIP-1167 克隆合约，全部逻辑位于 implementation_address。\n"
+            "- source_digest 为已验证源码的安全要点摘要：unguarded_privileged_functions、delegatecall_sites "
+            "与 selfdestruct_sites 应重点考虑。\n"
+            "- clone_family 为与已标注模板的近似重复匹配；与高风险模板 similarity_pct 很高时本身即是强证据。\n\n"
             "原始请求快照:\n"
             f"{flat_block if flat_block else '<no_fields>'}"
         )
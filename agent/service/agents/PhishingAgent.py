@@ -1,11 +1,27 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import re
 from typing import Any, Literal
 
 from pydantic import BaseModel, Field
 
+from ..analysis.history_chunks import build_digest, history_chunks, merge_digests, normalize_address
+from ..analysis.selectors import decode_selector
+from ..analysis.similarity import (
+    head_bag_similarity,
+    levenshtein_distance,
+    pack_addresses,
+    prefix_match_ratio,
+    rank_packed,
+    suffix_match_ratio,
+    weighted_similarity,
+)
+from ..cache import cache_namespace
+from ..config import settings
 from ..models import PhishingRiskRequest, PhishingRiskResponse
+from ..offload import cpu_pool
 from .BaseRiskAgent import RiskTaskAgent
 
 SIMILARITY_METHOD = "max(prefix,suffix,levenshtein,head_bag_6)"
@@ -13,6 +29,7 @@ _INTERNAL_TERM_PATTERN = re.compile(
     r"(?i)(head_bag_similarity_6|max_similarity|high_similarity_count|prefix_match_ratio|"
     r"suffix_match_ratio|normalized_levenshtein_similarity|levenshtein|threshold|阈值)"
 )
+_SELECTOR_PATTERN = re.compile(r"^0x[0-9a-fA-F]{8}")
 _METRIC_NUMBER_PATTERN = re.compile(r"(?<![a-zA-Z])(?:0?\.\d{2,4}|[1-9]\d?(?:\.\d{1,4})?%)(?![a-zA-Z])")
 
 PHISHING_SYSTEM_PROMPT_ZH = (
@@ -42,7 +59,7 @@ class PhishingRiskAgent(RiskTaskAgent):
         super().__init__(PHISHING_SYSTEM_PROMPT_ZH, [], response_model=PhishingRiskLLMSummary)
 
     def run(self, req: PhishingRiskRequest) -> PhishingRiskResponse:
-        payload = req.model_dump()
+        payload = self._decode_methods(req.model_dump())
         lang = self._normalize_lang(payload.get("lang"))
         similarity_context = self._build_similarity_context(payload)
 
@@ -65,6 +82,44 @@ class PhishingRiskAgent(RiskTaskAgent):
             similarity_method=SIMILARITY_METHOD,
         )
 
+    def run_local(self, req: PhishingRiskRequest) -> PhishingRiskResponse:
+        """Model-free answer from the similarity context alone, for when model calls are being shed."""
+        payload = req.model_dump()
+        lang = self._normalize_lang(payload.get("lang"))
+        similarity_context = self._build_similarity_context(payload)
+        level, confidence = self._local_risk_level(similarity_context)
+        risk_level = {"high": "高", "medium": "中", "low": "低", "unknown": "未知"}[level] if lang == "zh" else level
+        return PhishingRiskResponse(
+            risk_level=risk_level,
+            summary=self._friendly_summary_fallback(risk_level, lang, similarity_context),
+            confidence=confidence,
+            most_similar_address=similarity_context["most_similar_address"],
+            most_similar_similarity=similarity_context["most_similar_similarity"],
+            most_similar_transactions=similarity_context["most_similar_transactions"],
+            similarity_method=SIMILARITY_METHOD,
+            degraded=True,
+        )
+
+    def _local_risk_level(self, similarity_context: dict[str, Any]) -> tuple[str, float]:
+        # Same cut-offs the prompt gives the model.
+        max_similarity = similarity_context["max_similarity"]
+        head_bag = max((item["head_bag_similarity_6"] for item in similarity_context["top_similar_addresses"]), default=0.0)
+        if max_similarity >= 0.82 or head_bag >= 0.80:
+            return "high", 0.7
+        if max_similarity >= 0.70:
+            return "medium", 0.55
+        if similarity_context["candidate_count"]:
+            return "low", 0.5
+        return "unknown", 0.3
+
+    def _decode_methods(self, payload: dict[str, Any]) -> dict[str, Any]:
+        """Attach method_name to transactions whose method_sig is a raw 4-byte selector or calldata."""
+        for tx in payload.get("transactions") or []:
+            sig = str(tx.get("method_sig") or "").strip()
+            if _SELECTOR_PATTERN.match(sig):
+                tx["method_name"] = decode_selector(sig) or "unknown"
+        return payload
+
     def _sanitize_user_summary(
         self,
         summary: str,
@@ -118,109 +173,52 @@ class PhishingRiskAgent(RiskTaskAgent):
         return PHISHING_SYSTEM_PROMPT_EN if lang == "en" else PHISHING_SYSTEM_PROMPT_ZH
 
     def _normalize_address(self, value: Any) -> str:
-        text = str(value or "").strip().lower()
-        if text.startswith("0x"):
-            text = text[2:]
-        return re.sub(r"[^0-9a-f]", "", text)[:40]
+        return normalize_address(value)
 
     def _levenshtein_distance(self, a: str, b: str) -> int:
-        if a == b:
-            return 0
-        if not a:
-            return len(b)
-        if not b:
-            return len(a)
-
-        prev = list(range(len(b) + 1))
-        for i, ca in enumerate(a, start=1):
-            curr = [i]
-            for j, cb in enumerate(b, start=1):
-                insert_cost = curr[j - 1] + 1
-                delete_cost = prev[j] + 1
-                replace_cost = prev[j - 1] + (0 if ca == cb else 1)
-                curr.append(min(insert_cost, delete_cost, replace_cost))
-            prev = curr
-        return prev[-1]
+        return levenshtein_distance(a, b)
 
     def _normalized_levenshtein_similarity(self, a: str, b: str) -> float:
-        distance = self._levenshtein_distance(a, b)
-        return max(0.0, 1.0 - distance / 40.0)
+        return max(0.0, 1.0 - levenshtein_distance(a, b) / 40.0)
 
     def _weighted_similarity(self, target: str, candidate: str) -> dict[str, Any]:
-        prefix = self._prefix_match_ratio(target, candidate)
-        suffix = self._suffix_match_ratio(target, candidate)
-        lev = self._normalized_levenshtein_similarity(target, candidate)
-        head_bag_6 = self._head_bag_similarity(target, candidate, head_len=6)
-        weighted = max(prefix, suffix, lev, head_bag_6)
-        return {
-            "address": f"0x{candidate}",
-            "prefix_match_ratio": round(prefix, 4),
-            "suffix_match_ratio": round(suffix, 4),
-            "normalized_levenshtein_similarity": round(lev, 4),
-            "head_bag_similarity_6": round(head_bag_6, 4),
-            "similarity": round(weighted, 4),
-        }
+        return weighted_similarity(target, candidate)
 
     def _head_bag_similarity(self, target: str, candidate: str, head_len: int = 6) -> float:
         """Order-tolerant similarity on the first N chars to catch visual-clone prefixes."""
-        if head_len <= 0:
-            return 0.0
-        ta = target[:head_len]
-        ca = candidate[:head_len]
-        if not ta or not ca:
-            return 0.0
-
-        counts_target: dict[str, int] = {}
-        counts_candidate: dict[str, int] = {}
-        for ch in ta:
-            counts_target[ch] = counts_target.get(ch, 0) + 1
-        for ch in ca:
-            counts_candidate[ch] = counts_candidate.get(ch, 0) + 1
-
-        overlap = 0
-        for ch, count in counts_target.items():
-            overlap += min(count, counts_candidate.get(ch, 0))
-
-        denom = len(ta) + len(ca)
-        if denom == 0:
-            return 0.0
-        return (2.0 * overlap) / denom
-
-    def _candidate_addresses(self, transactions: list[dict[str, Any]], target: str) -> list[str]:
-        dedup: set[str] = set()
-        for tx in transactions:
-            if not isinstance(tx, dict):
-                continue
-            for key in ("from_address", "to_address", "contract_address"):
-                value = self._normalize_address(tx.get(key))
-                if len(value) == 40 and value != target:
-                    dedup.add(value)
-        return sorted(dedup)
-
-    def _related_transactions_for_address(self, transactions: list[dict[str, Any]], address: str) -> list[dict[str, Any]]:
-        normalized = self._normalize_address(address)
-        if len(normalized) != 40:
-            return []
-
-        matched: list[dict[str, Any]] = []
-        for tx in transactions:
-            if not isinstance(tx, dict):
-                continue
-            candidates = [
-                self._normalize_address(tx.get("from_address")),
-                self._normalize_address(tx.get("to_address")),
-                self._normalize_address(tx.get("contract_address")),
-            ]
-            if normalized in candidates:
-                matched.append(tx)
-
-        matched.sort(key=lambda item: int(item.get("timestamp") or 0), reverse=True)
-        return matched[:3]
+        return head_bag_similarity(target, candidate, head_len)
 
     def _build_similarity_context(self, payload_input: dict[str, Any]) -> dict[str, Any]:
+        """Similarity context for the request, shared through the ``phishing-index`` cache namespace.
+
+        ``history_chunks`` names sealed history already uploaded to the chunk store; their stored
+        digests stand in for those transactions, and ``transactions`` is the tail after them.
+        """
+        chunk_hashes = payload_input.get("history_chunks") or []
+        canonical = json.dumps(
+            [payload_input.get("address"), payload_input.get("transactions") or [], chunk_hashes],
+            sort_keys=True,
+            separators=(",", ":"),
+            default=str,
+        )
+        key = hashlib.sha256(canonical.encode()).hexdigest()
+        cache = cache_namespace("phishing-index")
+        context = cache.get(key)
+        if context is None:
+            history = history_chunks().digest(chunk_hashes) if chunk_hashes else None
+            # Built outside get_or_build: scoring may go to the CPU pool, and no caller should queue behind it.
+            context = self._compute_similarity_context(payload_input, history)
+            cache.set(key, context)
+        return context
+
+    def _compute_similarity_context(
+        self, payload_input: dict[str, Any], history: dict[str, list[dict[str, Any]]] | None = None
+    ) -> dict[str, Any]:
         target = self._normalize_address(payload_input.get("address"))
-        txs = payload_input.get("transactions") or []
-        candidates = self._candidate_addresses(txs, target)
+        digest = build_digest(payload_input.get("transactions") or [])
+        if history:
+            digest = merge_digests([history, digest])
+        candidates = sorted(address for address in digest if address != target)
 
         if len(target) != 40 or not candidates:
             return {
@@ -235,11 +233,16 @@ class PhishingRiskAgent(RiskTaskAgent):
                 "most_similar_transactions": [],
             }
 
-        scores = [self._weighted_similarity(target, candidate) for candidate in candidates]
-        scores.sort(key=lambda item: item["similarity"], reverse=True)
-        top = scores[0]
-        high_similarity_count = sum(1 for item in scores if item["similarity"] >= 0.85)
-        most_similar_transactions = self._related_transactions_for_address(txs, top["address"])
+        # Whale histories have thousands of counterparties: score them in the CPU pool, as packed bytes.
+        top_scores, high_similarity_count = cpu_pool().run(
+            rank_packed,
+            bytes.fromhex(target),
+            pack_addresses(candidates),
+            size=len(candidates),
+            threshold=settings.cpu_offload_min_candidates,
+        )
+        top = top_scores[0]
+        most_similar_transactions = digest[self._normalize_address(top["address"])]
 
         return {
             "target_address": payload_input.get("address"),
@@ -247,7 +250,7 @@ class PhishingRiskAgent(RiskTaskAgent):
             "candidate_count": len(candidates),
             "max_similarity": round(top["similarity"], 4),
             "high_similarity_count": high_similarity_count,
-            "top_similar_addresses": scores[:3],
+            "top_similar_addresses": top_scores,
             "most_similar_address": top["address"],
             "most_similar_similarity": round(top["similarity"], 4),
             "most_similar_transactions": most_similar_transactions,
@@ -277,7 +280,9 @@ class PhishingRiskAgent(RiskTaskAgent):
             "- max_similarity >= 0.82 is a strong phishing signal.\n"
             "- head_bag_similarity_6 >= 0.80 is also a strong visual-clone signal.\n"
             "- 0.70 ~ 0.82 indicates medium-high risk.\n"
-            "- If no similar address is found, lower confidence and explain uncertainty.\n\n"
+            "- If no similar address is found, lower confidence and explain uncertainty.\n"
+            "- transactions[].method_name is decoded from method_sig; approve, setApprovalForAll or permit "
+            "granted to a lookalike address is a typical drainer pattern.\n\n"
             "Raw Request Snapshot:\n"
             f"{flat_block if flat_block else '<no_fields>'}"
         )
@@ -306,7 +311,9 @@ class PhishingRiskAgent(RiskTaskAgent):
             "- max_similarity >= 0.82 视为强钓鱼风险信号。\n"
             "- head_bag_similarity_6 >= 0.80 也视为强视觉克隆信号。\n"
             "- 0.70 ~ 0.82 视为中高风险信号。\n"
-            "- 未找到相似地址时应下调置信度并说明不确定性。\n\n"
+            "- 未找到相似地址时应下调置信度并说明不确定性。\n"
+            "- transactions[].method_name 由 method_sig 解码得到；向相似地址授权 approve、setApprovalForAll "
+            "或 permit 是典型的盗币模式。\n\n"
             "原始请求快照:\n"
             f"{flat_block if flat_block else '<no_fields>'}"
         )
@@ -314,25 +321,15 @@ class PhishingRiskAgent(RiskTaskAgent):
     def _build_user_prompt(self, task: str, payload_input: dict[str, Any], lang: str = "zh") -> str:
         chain = payload_input.get("chain")
         similarity_context = self._build_similarity_context(payload_input)
-        flat_block = "\n".join(self._flatten_fields(payload_input))
+        # Chunk hashes mean nothing to the model; the similarity context already covers that history.
+        snapshot = {key: value for key, value in payload_input.items() if key != "history_chunks"}
+        flat_block = "\n".join(self._flatten_fields(snapshot))
 
         if lang == "en":
             return self._build_user_prompt_en(task, chain, similarity_context, flat_block)
         return self._build_user_prompt_zh(task, chain, similarity_context, flat_block)
     def _prefix_match_ratio(self, a: str, b: str) -> float:
-        matched = 0
-        limit = min(len(a), len(b))
-        for i in range(limit):
-            if a[i] != b[i]:
-                break
-            matched += 1
-        return matched / 40.0
+        return prefix_match_ratio(a, b)
 
     def _suffix_match_ratio(self, a: str, b: str) -> float:
-        matched = 0
-        limit = min(len(a), len(b))
-        for i in range(1, limit + 1):
-            if a[-i] != b[-i]:
-                break
-            matched += 1
-        return matched / 40.0
+        return suffix_match_ratio(a, b)
@@ -1,58 +1,115 @@
 from __future__ import annotations
 
-from decimal import Decimal, InvalidOperation
-from typing import Any
+from typing import Any, Literal
 
-from ..models import SlippageRiskRequest, SlippageRiskResponse
+from pydantic import BaseModel, Field
+
+from ..engines.amm import DEFAULT_TOKEN_DECIMALS, EGOLD_AMM_FEE_BPS, format_units, parse_units, quote_exact_in
+from ..engines.concentrated import load_concentrated_index
+from ..engines.history import reserve_history
+from ..engines.mev import estimate_pool_mev
+from ..engines.orderbook import load_order_book
+from ..models import MevExposure, SlippageRiskRequest, SlippageRiskResponse
 from .BaseRiskAgent import RiskTaskAgent
 
+CONCENTRATED_POOL_TYPES = {"CLMM", "CONCENTRATED", "V3", "UNISWAP_V3"}
+ORDER_BOOK_POOL_TYPES = {"ORDERBOOK", "ORDER_BOOK", "CLOB"}
+
 SLIPPAGE_SYSTEM_PROMPT_ZH = (
     "你是加密钱包后端的 DEX 滑点分析助手。"
-    "当前仅按 AMM 模型处理输入，并输出简洁结果。"
+    "按 derived_context 中预计算的池子模型（默认常乘积 AMM）处理输入，并输出简洁结果。"
     "你必须只返回两个字段：slippage_level（滑点大小的定性等级）和 summary（为什么会发生这种滑点的通俗解释）。"
 )
 
 SLIPPAGE_SYSTEM_PROMPT_EN = (
     "You are a DEX slippage analyst for a crypto wallet backend. "
-    "Use AMM-style calculation assumptions only. "
+    "Use the precomputed derived_context for the pool model (constant-product AMM by default). "
     "You must return exactly two fields: slippage_level (qualitative slippage size) and summary "
     "(a plain-language reason why this slippage happens)."
 )
 
 
+class SlippageRiskLLMSummary(BaseModel):
+    slippage_level: Literal["high", "medium", "low", "unknown", "高", "中", "低", "未知"] = Field(
+        description="滑点大小的定性等级。英文可用 high/medium/low/unknown，中文可用 高/中/低/未知。"
+    )
+    summary: str = Field(description="一句通俗解释为什么会发生这种滑点")
+
+
 class SlippageRiskAgent(RiskTaskAgent):
     def __init__(self) -> None:
-        super().__init__(SLIPPAGE_SYSTEM_PROMPT_ZH, [], response_model=SlippageRiskResponse)
+        super().__init__(SLIPPAGE_SYSTEM_PROMPT_ZH, [], response_model=SlippageRiskLLMSummary)
 
     def run(self, req: SlippageRiskRequest) -> SlippageRiskResponse:
-        payload = req.model_dump()
-        lang = self._normalize_lang(payload.get("lang"))
-        payload["derived_context"] = self._build_derived_context(payload)
+        payload, lang, mev_exposure = self._prepare(req)
         data = self.run_payload("slippage_risk", payload, lang=lang)
-        if isinstance(data, SlippageRiskResponse):
-            return data.model_copy(update={"summary": self._normalize_summary(data.summary, lang)})
         if isinstance(data, dict):
             # Compatibility: map old numeric field to qualitative level.
             if "slippage_level" not in data and "expected_slippage_pct" in data:
                 data["slippage_level"] = self._pct_to_level(data.get("expected_slippage_pct"), lang)
-            data["summary"] = self._normalize_summary(data.get("summary"), lang)
-            return SlippageRiskResponse.model_validate(data)
-        result = SlippageRiskResponse.model_validate(data)
-        return result.model_copy(update={"summary": self._normalize_summary(result.summary, lang)})
+        summary = data if isinstance(data, SlippageRiskLLMSummary) else SlippageRiskLLMSummary.model_validate(data)
+        return SlippageRiskResponse(
+            slippage_level=summary.slippage_level,
+            summary=self._normalize_summary(summary.summary, lang),
+            mev_exposure=mev_exposure,
+        )
+
+    def run_local(self, req: SlippageRiskRequest) -> SlippageRiskResponse:
+        """Model-free answer from the precomputed estimate, for when model calls are being shed."""
+        payload, lang, mev_exposure = self._prepare(req)
+        derived = payload["derived_context"]
+        if not derived.get("has_required_amounts"):
+            level, summary = self._pct_to_level(None, lang), self._normalize_summary("", lang)
+        else:
+            pct = float(derived["estimated_slippage_pct"])
+            level = self._pct_to_level(pct, lang)
+            summary = (
+                f"Against the current liquidity, this trade size moves the price by about {pct:.2f}%."
+                if lang == "en"
+                else f"按当前流动性估算，该笔交易规模会带来约 {pct:.2f}% 的滑点。"
+            )
+        return SlippageRiskResponse(slippage_level=level, summary=summary, mev_exposure=mev_exposure, degraded=True)
+
+    def _prepare(self, req: SlippageRiskRequest) -> tuple[dict[str, Any], str, MevExposure | None]:
+        payload = req.model_dump()
+        lang = self._normalize_lang(payload.get("lang"))
+        payload["derived_context"] = self._build_derived_context(payload)
+        mev_exposure = self._build_mev_exposure(payload)
+        if mev_exposure is not None:
+            payload["derived_context"]["mev_exposure"] = mev_exposure.model_dump()
+        return payload, lang, mev_exposure
+
+    def _build_mev_exposure(self, payload_input: dict[str, Any]) -> MevExposure | None:
+        derived = payload_input.get("derived_context") or {}
+        if derived.get("assumption") != "constant_product_amm":
+            return None
+        estimate = estimate_pool_mev(
+            payload_input.get("token_pay_amount"),
+            payload_input.get("pool") or {},
+            payload_input.get("slippage_tolerance_pct"),
+        )
+        return MevExposure.model_validate(estimate) if estimate is not None else None
 
     def _system_prompt_for_lang(self, lang: str) -> str:
         return SLIPPAGE_SYSTEM_PROMPT_EN if lang == "en" else SLIPPAGE_SYSTEM_PROMPT_ZH
 
-    def _to_decimal(self, value: Any) -> Decimal | None:
+    def _to_float(self, value: Any) -> float | None:
         if value is None:
             return None
         try:
-            return Decimal(str(value))
-        except (InvalidOperation, ValueError):
+            return float(value)
+        except (TypeError, ValueError):
             return None
 
+    def _to_decimals(self, value: Any) -> int:
+        try:
+            decimals = int(value)
+        except (TypeError, ValueError):
+            return DEFAULT_TOKEN_DECIMALS
+        return decimals if 0 <= decimals <= 36 else DEFAULT_TOKEN_DECIMALS
+
     def _pct_to_level(self, value: Any, lang: str) -> str:
-        pct = self._to_decimal(value)
+        pct = self._to_float(value)
         if pct is None:
             return "unknown" if lang == "en" else "未知"
         if pct < 1:
@@ -79,9 +136,22 @@ class SlippageRiskAgent(RiskTaskAgent):
 
     def _build_derived_context(self, payload_input: dict[str, Any]) -> dict[str, Any]:
         pool = payload_input.get("pool") or {}
-        trade_in = self._to_decimal(payload_input.get("token_pay_amount"))
-        reserve_in = self._to_decimal(pool.get("token_pay_amount"))
-        reserve_out = self._to_decimal(pool.get("token_get_amount"))
+        orderbook = payload_input.get("orderbook") or {}
+        if (orderbook.get("bids") or orderbook.get("asks")) and (
+            not pool or str(pool.get("type") or "").upper() in ORDER_BOOK_POOL_TYPES
+        ):
+            return self._build_order_book_context(payload_input)
+
+        decimals_in = self._to_decimals(pool.get("token_pay_decimals"))
+        decimals_out = self._to_decimals(pool.get("token_get_decimals"))
+        fee_bps = pool.get("fee_bps")
+        fee_bps = EGOLD_AMM_FEE_BPS if fee_bps is None else int(fee_bps)
+        if str(pool.get("type") or "").upper() in CONCENTRATED_POOL_TYPES and pool.get("concentrated"):
+            return self._build_concentrated_context(payload_input, decimals_in, decimals_out, fee_bps)
+
+        trade_in = parse_units(payload_input.get("token_pay_amount"), decimals_in)
+        reserve_in = parse_units(pool.get("token_pay_amount"), decimals_in)
+        reserve_out = parse_units(pool.get("token_get_amount"), decimals_out)
 
         if (
             trade_in is None
@@ -97,28 +167,127 @@ class SlippageRiskAgent(RiskTaskAgent):
                 "assumption": "insufficient_data",
             }
 
-        spot_price = reserve_out / reserve_in
-        output_after_trade = reserve_out - (reserve_in * reserve_out / (reserve_in + trade_in))
-        if output_after_trade <= 0:
+        quote = quote_exact_in(trade_in, reserve_in, reserve_out, decimals_in, decimals_out, fee_bps)
+        if quote["amount_out_wei"] <= 0:
             return {
                 "has_required_amounts": False,
                 "estimated_slippage_pct": 0.0,
                 "assumption": "invalid_output",
             }
 
-        execution_price = output_after_trade / trade_in
-        slippage_pct = max(Decimal("0"), (spot_price - execution_price) / spot_price * Decimal("100"))
-
         return {
             "has_required_amounts": True,
             "assumption": "constant_product_amm",
-            "spot_price": float(spot_price),
-            "execution_price": float(execution_price),
-            "estimated_slippage_pct": float(round(slippage_pct, 6)),
+            "spot_price": quote["spot_price"],
+            "execution_price": quote["execution_price"],
+            "estimated_slippage_pct": quote["estimated_slippage_pct"],
+            "fee_bps": fee_bps,
+            "fee_pct": quote["fee_pct"],
+            "amm_price_impact_pct": quote["price_impact_pct"],
+            "expected_amount_out": quote["amount_out"],
+            "expected_amount_out_wei": str(quote["amount_out_wei"]),
+            "reserves_block_number": pool.get("block_number"),
+            "reserve_history": reserve_history.metrics(
+                payload_input.get("chain") or "monad",
+                payload_input.get("pool_address") or "",
+                payload_input.get("token_pay_index") or 0,
+            ),
             "pool_type": pool.get("type") or "AMM",
             "price_impact_pct": pool.get("price_impact_pct"),
         }
 
+    def _build_concentrated_context(
+        self,
+        payload_input: dict[str, Any],
+        decimals_in: int,
+        decimals_out: int,
+        fee_bps: int,
+    ) -> dict[str, Any]:
+        pool = payload_input.get("pool") or {}
+        state = pool.get("concentrated") or {}
+        trade_in = parse_units(payload_input.get("token_pay_amount"), decimals_in)
+        if trade_in is None or trade_in <= 0 or not state.get("ticks"):
+            return {
+                "has_required_amounts": False,
+                "estimated_slippage_pct": 0.0,
+                "assumption": "insufficient_data",
+            }
+
+        try:
+            index = load_concentrated_index(state, payload_input.get("pool_address"))
+            quote = index.quote(float(trade_in), bool(state.get("zero_for_one", True)), fee_bps)
+        except (KeyError, TypeError, ValueError):
+            return {
+                "has_required_amounts": False,
+                "estimated_slippage_pct": 0.0,
+                "assumption": "invalid_liquidity_data",
+            }
+        if quote["amount_out"] <= 0:
+            return {
+                "has_required_amounts": False,
+                "estimated_slippage_pct": 0.0,
+                "assumption": "invalid_output",
+            }
+
+        # Engine prices are raw-unit ratios; rescale to human units.
+        price_scale = 10 ** (decimals_in - decimals_out)
+        return {
+            "has_required_amounts": True,
+            "assumption": "concentrated_liquidity",
+            "spot_price": quote["spot_price"] * price_scale,
+            "execution_price": quote["execution_price"] * price_scale,
+            "estimated_slippage_pct": quote["estimated_slippage_pct"],
+            "fee_bps": fee_bps,
+            "fee_pct": quote["fee_pct"],
+            "amm_price_impact_pct": quote["price_impact_pct"],
+            "expected_amount_out": format_units(int(quote["amount_out"]), decimals_out),
+            "ticks_crossed": quote["ticks_crossed"],
+            "unfilled_token_pay_amount": format_units(int(quote["unfilled_amount_in"]), decimals_in),
+            "pool_type": pool.get("type"),
+            "price_impact_pct": pool.get("price_impact_pct"),
+        }
+
+    def _build_order_book_context(self, payload_input: dict[str, Any]) -> dict[str, Any]:
+        orderbook = payload_input.get("orderbook") or {}
+        trade_in = self._to_float(payload_input.get("token_pay_amount"))
+        if trade_in is None or trade_in <= 0:
+            return {
+                "has_required_amounts": False,
+                "estimated_slippage_pct": 0.0,
+                "assumption": "insufficient_data",
+            }
+
+        try:
+            book = load_order_book(orderbook, payload_input.get("pool_address"))
+            quote = book.quote(trade_in, orderbook.get("side") or "buy")
+        except (KeyError, TypeError, ValueError):
+            return {
+                "has_required_amounts": False,
+                "estimated_slippage_pct": 0.0,
+                "assumption": "invalid_order_book",
+            }
+        if quote["amount_out"] <= 0:
+            return {
+                "has_required_amounts": False,
+                "estimated_slippage_pct": 0.0,
+                "assumption": "empty_order_book",
+            }
+
+        return {
+            "has_required_amounts": True,
+            "assumption": "order_book",
+            "side": orderbook.get("side") or "buy",
+            "best_price": quote["best_price"],
+            "fill_price": quote["fill_price"],
+            "worst_price": quote["worst_price"],
+            "estimated_slippage_pct": quote["estimated_slippage_pct"],
+            "levels_consumed": quote["levels_consumed"],
+            "expected_amount_out": quote["amount_out"],
+            "unfilled_token_pay_amount": quote["unfilled_amount_in"],
+            "spread_bps": quote["spread_bps"] if quote["spread_bps"] is not None else orderbook.get("spread_bps"),
+            "pool_type": "ORDERBOOK",
+        }
+
     def _build_user_prompt_en(
         self,
         task: str,
@@ -143,11 +312,19 @@ class SlippageRiskAgent(RiskTaskAgent):
             "Precomputed AMM Context:\n"
             f"- derived_context={derived}\n"
             "Rules:\n"
-            "- Use AMM constant-product reasoning from provided amounts.\n"
+            "- Use AMM constant-product reasoning from provided amounts; derived_context is exact and already includes the pool fee.\n"
             "- slippage_level must be one of: high | medium | low | unknown.\n"
             "- summary must be one plain-language sentence explaining why this slippage happens.\n"
             "- If key inputs are missing/invalid, return slippage_level=unknown and explain insufficient data.\n"
-            "- If pool.type is not AMM, keep AMM assumption and mention it in summary.\n"
+            "- If derived_context.assumption is concentrated_liquidity, rely on its tick-based figures; "
+            "a non-zero unfilled_token_pay_amount means the pool cannot fill the trade.\n"
+            "- If derived_context.assumption is order_book, slippage comes from walking book depth; "
+            "also consider spread_bps and any unfilled_token_pay_amount.\n"
+            "- derived_context.mev_exposure is a deterministic sandwich-attack estimate; "
+            "if exposed is true and victim_loss_pct is material, the summary may mention it.\n"
+            "- derived_context.reserve_history holds recent reserve snapshots of this pool; high price_volatility_pct "
+            "or a sharp negative liquidity_change_pct means realized slippage may exceed the quote.\n"
+            "- For any other non-AMM pool.type, keep AMM assumption and mention it in summary.\n"
             "- Do not output any extra fields.\n\n"
             "Raw Request Snapshot:\n"
             f"{flat_block if flat_block else '<no_fields>'}"
@@ -177,11 +354,19 @@ class SlippageRiskAgent(RiskTaskAgent):
             "预计算 AMM 上下文:\n"
             f"- derived_context={derived}\n"
             "规则:\n"
-            "- 基于给定数量按 AMM 常乘积思路估算滑点。\n"
+            "- 基于给定数量按 AMM 常乘积思路估算滑点；derived_context 为精确计算结果，已包含池子手续费。\n"
             "- slippage_level 必须是定性等级：高/中/低/未知 或 high/medium/low/unknown。\n"
             "- summary 必须是一句通俗解释“为什么会发生这种滑点”。\n"
             "- 关键输入缺失或无效时，返回 slippage_level=未知（或 unknown），并说明数据不足。\n"
-            "- 若 pool.type 不是 AMM，仍按 AMM 假设计算并在 summary 中说明。\n"
+            "- 若 derived_context.assumption 为 concentrated_liquidity，以其基于 tick 的计算结果为准；"
+            "unfilled_token_pay_amount 不为 0 表示池子流动性不足以完成该笔交易。\n"
+            "- 若 derived_context.assumption 为 order_book，滑点来自逐档吃单深度；"
+            "同时考虑 spread_bps 及未成交数量 unfilled_token_pay_amount。\n"
+            "- derived_context.mev_exposure 为确定性的三明治攻击估算；"
+            "若 exposed 为 true 且 victim_loss_pct 明显，summary 可以提及。\n"
+            "- derived_context.reserve_history 为该池近期储备快照统计；price_volatility_pct 偏高"
+            "或 liquidity_change_pct 明显为负时，实际滑点可能高于报价。\n"
+            "- 其他非 AMM 的 pool.type 仍按 AMM 假设计算并在 summary 中说明。\n"
             "- 不要输出额外字段。\n\n"
             "原始请求快照:\n"
             f"{flat_block if flat_block else '<no_fields>'}"
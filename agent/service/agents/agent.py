@@ -10,6 +10,7 @@ from langchain_openai import ChatOpenAI
 from pydantic import BaseModel
 
 from ..config import settings
+from ..model_scheduler import model_scheduler
 
 
 class BaseAgent:
@@ -52,6 +53,12 @@ class BaseAgent:
             self.executor = AgentExecutor(agent=agent, tools=tool_list, verbose=verbose)
 
     def invoke(self, input_text: str, system_prompt_override: str | None = None, **kwargs: Any) -> dict[str, Any]:
+        # Every provider call waits for a slot under the caller's priority class (interactive by default),
+        # but no longer than a request may take: a TimeoutError sends the caller to its local fallback.
+        with model_scheduler.slot(flow=type(self).__name__, timeout_s=settings.request_timeout_s):
+            return self._invoke(input_text, system_prompt_override, **kwargs)
+
+    def _invoke(self, input_text: str, system_prompt_override: str | None = None, **kwargs: Any) -> dict[str, Any]:
         if not self._use_tools:
             system_prompt = system_prompt_override or self.system_prompt
             messages = [
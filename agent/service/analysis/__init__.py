@@ -0,0 +1,25 @@
+from .bytecode import resolve_minimal_proxy, scan_bytecode
+from .code_cache import assessment_cache_stats, cached_narrative, code_analysis, code_identity
+from .contract_context import compact_contract_payload
+from .keccak import function_selector, keccak256, keccak256_hex
+from .scoring import ContractScorer, contract_scorer
+from .selectors import decode_selector, selector_db
+from .solidity import source_digest
+
+__all__ = [
+    "ContractScorer",
+    "assessment_cache_stats",
+    "cached_narrative",
+    "code_analysis",
+    "code_identity",
+    "compact_contract_payload",
+    "contract_scorer",
+    "decode_selector",
+    "function_selector",
+    "keccak256",
+    "keccak256_hex",
+    "resolve_minimal_proxy",
+    "scan_bytecode",
+    "selector_db",
+    "source_digest",
+]
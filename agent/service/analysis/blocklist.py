@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Iterable
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Header: magic, hash count, entry count, filter bits, label count. The Bloom filter bits follow,
+# then the entries (address + label index) sorted by address, then NUL-terminated labels.
+MAGIC = b"LWBLOCK1"
+_HEADER = struct.Struct(">8sIIQI")
+_ENTRY = struct.Struct(">20sB")
+DEFAULT_LABEL = "blocklisted"
+DEFAULT_FP_RATE = 0.01
+
+
+def _address_bytes(address: str | bytes) -> bytes | None:
+    if isinstance(address, bytes):
+        return address if len(address) == 20 else None
+    text = address.strip().lower()
+    text = text[2:] if text.startswith("0x") else text
+    if len(text) != 40:
+        return None
+    try:
+        return bytes.fromhex(text)
+    except ValueError:
+        return None
+
+
+def _probes(key: bytes, hashes: int, bits: int) -> list[int]:
+    # Double hashing over one 128-bit digest: k probe positions for the cost of a single hash.
+    first, second = struct.unpack("<QQ", hashlib.blake2b(key, digest_size=16).digest())
+    second |= 1
+    return [(first + i * second) % bits for i in range(hashes)]
+
+
+class Blocklist:
+    """Known poisoning/drainer addresses: an mmap'd Bloom filter with a sorted exact-confirm table behind it.
+
+    A lookup reads ``hashes`` bits of the filter (about 1.2 bytes per entry at 1% false positives);
+    only the rare filter hit binary-searches the confirm table, so the table's pages stay cold.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        with open(self.path, "rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.hashes, self.count, self.bits, label_count = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a blocklist")
+        self._filter_at = _HEADER.size
+        self._entries_at = self._filter_at + self.bits // 8
+        labels_at = self._entries_at + self.count * _ENTRY.size
+        self.labels = self._map[labels_at:].split(b"\0")[:label_count]
+
+    def _in_filter(self, key: bytes) -> bool:
+        at = self._filter_at
+        return all(self._map[at + (bit >> 3)] >> (bit & 7) & 1 for bit in _probes(key, self.hashes, self.bits))
+
+    def lookup(self, address: str | bytes | None) -> str | None:
+        """The address's label when it is on the list, else None; malformed addresses are never listed."""
+        key = _address_bytes(address) if address else None
+        if key is None or not self.count or not self._in_filter(key):
+            return None
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            at = self._entries_at + mid * _ENTRY.size
+            if self._map[at : at + 20] < key:
+                low = mid + 1
+            else:
+                high = mid
+        if low == self.count:
+            return None
+        found, label = _ENTRY.unpack_from(self._map, self._entries_at + low * _ENTRY.size)
+        return self.labels[label].decode() if found == key else None
+
+    def close(self) -> None:
+        self._map.close()
+
+
+def build_blocklist(lines: Iterable[str], path: str | Path, fp_rate: float = DEFAULT_FP_RATE) -> int:
+    """Write a blocklist from ``<address> [label]`` lines ('#' comments and blanks skipped); returns the entry count.
+
+    The file is written beside ``path`` and renamed over it, so running servers swap to it atomically.
+    """
+    entries: dict[bytes, str] = {}
+    for line in lines:
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        address, _, label = line.partition(" ")
+        key = _address_bytes(address)
+        if key is None:
+            raise ValueError(f"Invalid address in line: {line!r}")
+        entries.setdefault(key, label.strip() or DEFAULT_LABEL)
+
+    labels = sorted(set(entries.values()))
+    if len(labels) > 256:
+        raise ValueError("A blocklist holds at most 256 distinct labels")
+    label_index = {label: index for index, label in enumerate(labels)}
+    bits_per_entry = -math.log(fp_rate) / math.log(2) ** 2
+    bits = max(64, math.ceil(len(entries) * bits_per_entry / 64) * 64)
+    hashes = min(16, max(1, round(bits / max(len(entries), 1) * math.log(2))))
+
+    bloom = bytearray(bits // 8)
+    for key in entries:
+        for bit in _probes(key, hashes, bits):
+            bloom[bit >> 3] |= 1 << (bit & 7)
+    out = bytearray(_HEADER.pack(MAGIC, hashes, len(entries), bits, len(labels)))
+    out.extend(bloom)
+    for key in sorted(entries):
+        out.extend(_ENTRY.pack(key, label_index[entries[key]]))
+    out.extend(b"".join(label.encode() + b"\0" for label in labels))
+
+    target = Path(path)
+    staging = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    staging.write_bytes(bytes(out))
+    os.replace(staging, target)
+    return len(entries)
+
+
+_LIST: Blocklist | None = None
+_STAMP: tuple[str, int, int, int] | None = None
+_CHECKED_AT: float | None = None
+_LIST_LOCK = threading.Lock()
+
+
+def blocklist() -> Blocklist | None:
+    """Process-wide blocklist from BLOCKLIST_PATH, or None when unset.
+
+    The file's inode, mtime and size are re-checked at most every BLOCKLIST_CHECK_INTERVAL_S; a
+    rebuilt file is mapped on the next lookup, no restart needed. Lookups already holding the old
+    mapping finish on it. A file that fails to open leaves the previous list in service.
+    """
+    global _LIST, _STAMP, _CHECKED_AT
+    path = settings.blocklist_path
+    if not path:
+        return None
+    with _LIST_LOCK:
+        now = time.monotonic()
+        fresh = _CHECKED_AT is not None and now - _CHECKED_AT < settings.blocklist_check_interval_s
+        if fresh and _STAMP is not None and _STAMP[0] == path:
+            return _LIST
+        _CHECKED_AT = now
+        try:
+            stat = os.stat(path)
+            stamp = (path, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            stamp = None
+        if stamp is not None and stamp != _STAMP:
+            _STAMP = stamp
+            try:
+                _LIST = Blocklist(path)
+            except (OSError, ValueError, struct.error) as exc:
+                logger.warning("blocklist %s not loaded: %s", path, exc)
+        return _LIST
+
+
+def blocklist_label(address: str | None) -> str | None:
+    """Label of ``address`` on the configured blocklist; None when unlisted or no blocklist is configured."""
+    current = blocklist()
+    return current.lookup(address) if current is not None else None
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] != ["build"] or len(sys.argv) < 4:
+        raise SystemExit("usage: python -m service.analysis.blocklist build SOURCE OUTPUT [FP_RATE]")
+    with open(sys.argv[2], encoding="utf-8") as source:
+        count = build_blocklist(source, sys.argv[3], float(sys.argv[4]) if len(sys.argv) > 4 else DEFAULT_FP_RATE)
+    print(f"{count} addresses written to {sys.argv[3]}")
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Any
+
+from ..config import settings
+from ..engines.snapshot_cache import SnapshotCache
+from ..offload import cpu_pool
+from .keccak import function_selector, keccak256_hex
+from .selectors import selector_db
+
+CALLER, ORIGIN, SLOAD, SSTORE, JUMPI, EQ, DUP2 = 0x33, 0x32, 0x54, 0x55, 0x57, 0x14, 0x81
+PUSH1, PUSH4, PUSH32 = 0x60, 0x63, 0x7F
+CREATE, CALL, CALLCODE, DELEGATECALL, CREATE2, STATICCALL, SELFDESTRUCT = 0xF0, 0xF1, 0xF2, 0xF4, 0xF5, 0xFA, 0xFF
+
+DANGEROUS_OPCODES = {DELEGATECALL: "DELEGATECALL", SELFDESTRUCT: "SELFDESTRUCT", CALLCODE: "CALLCODE"}
+
+# keccak256(label) - 1, as defined by EIP-1967, plus the pre-standard OpenZeppelin (zos) slot.
+EIP1967_SLOTS = {
+    0x360894A13BA1A3210667C828492DB98DCA3E2076CC3735A920A3CA505D382BBC: "implementation",
+    0xB53127684A568B3173AE13B9F8A6016E243E63B6E8EE1178D6A717850B5D6103: "admin",
+    0xA3F0AD74E5423AEBFD80D3EF4346578335A9A72AEAEE59FF6CB3582B35133D50: "beacon",
+    0x7050C9E0F4CA769C69BD3A8EF740BC37934F8E2C036E5A723FD8EE048ED3F8C3: "zos_implementation",
+}
+
+# Signatures whose presence in the dispatcher marks an admin-controlled capability.
+PRIVILEGED_SIGNATURES = (
+    "owner()",
+    "transferOwnership(address)",
+    "renounceOwnership()",
+    "upgradeTo(address)",
+    "upgradeToAndCall(address,bytes)",
+    "changeAdmin(address)",
+    "pause()",
+    "unpause()",
+    "mint(address,uint256)",
+    "mint(uint256)",
+    "burn(address,uint256)",
+    "blacklist(address)",
+    "addToBlacklist(address)",
+    "setFee(uint256)",
+    "setTaxFee(uint256)",
+    "setMaxTxAmount(uint256)",
+    "excludeFromFee(address)",
+    "withdraw()",
+    "emergencyWithdraw()",
+    "grantRole(bytes32,address)",
+)
+PRIVILEGED_SELECTORS = {function_selector(signature): signature for signature in PRIVILEGED_SIGNATURES}
+
+# EIP-1167 minimal proxy runtime, plus the PUSH0 variant from ERC-7511: prefix + 20-byte implementation + suffix.
+MINIMAL_PROXY_PATTERNS = (
+    (bytes.fromhex("363d3d373d3d3d363d73"), bytes.fromhex("5af43d82803e903d91602b57fd5bf3")),
+    (bytes.fromhex("365f5f375f5f365f73"), bytes.fromhex("5af43d5f5f3e5f3d91602a57fd5bf3")),
+)
+
+_MAX_SELECTORS = 256
+# Window (in instructions) around CALLER / ORIGIN searched for an SLOAD + EQ + JUMPI access check.
+_GATE_WINDOW = 12
+
+_FEATURE_CACHE: SnapshotCache[dict[str, Any]] = SnapshotCache(max_entries=2048)
+_CODE_HASH_CACHE: SnapshotCache[str] = SnapshotCache(max_entries=4096)
+
+
+def decode_bytecode(bytecode: str | bytes) -> bytes | None:
+    if isinstance(bytecode, bytes):
+        return bytecode
+    text = bytecode.strip()
+    if text.startswith(("0x", "0X")):
+        text = text[2:]
+    try:
+        return bytes.fromhex(text)
+    except ValueError:
+        return None
+
+
+def code_hash(code: bytes) -> str:
+    """keccak256 of the runtime code (the chain's EXTCODEHASH).
+
+    Pure-Python keccak costs tens of milliseconds on a full-size contract, so the result is memoised
+    under a cheap blake2b digest of the same bytes.
+    """
+    key = hashlib.blake2b(code, digest_size=20).digest()
+    cached = _CODE_HASH_CACHE.get(key)
+    if cached is not None:
+        return cached
+    # Computed outside the cache so no caller waits on another's pool task.
+    return _CODE_HASH_CACHE.put(
+        key, cpu_pool().run(keccak256_hex, code, size=len(code), threshold=settings.cpu_offload_min_bytes)
+    )
+
+
+def resolve_minimal_proxy(code: bytes) -> str | None:
+    """Implementation address of an EIP-1167 style minimal proxy, or None for any other code."""
+    for prefix, suffix in MINIMAL_PROXY_PATTERNS:
+        if len(code) == len(prefix) + 20 + len(suffix) and code.startswith(prefix) and code.endswith(suffix):
+            return "0x" + code[len(prefix) : len(prefix) + 20].hex()
+    return None
+
+
+def strip_metadata(code: bytes) -> bytes:
+    """Drop the trailing CBOR metadata solc appends, so its bytes are not disassembled as code."""
+    if len(code) < 2:
+        return code
+    length = int.from_bytes(code[-2:], "big")
+    start = len(code) - 2 - length
+    if 0 < length < len(code) - 2 and code[start] in (0xA1, 0xA2, 0xA3, 0xA4):
+        return code[:start]
+    return code
+
+
+def disassemble(code: bytes) -> tuple[list[int], list[int]]:
+    """Linear sweep returning (opcodes, push_values); push_values[i] is the immediate of opcodes[i] or -1."""
+    opcodes: list[int] = []
+    values: list[int] = []
+    pc, size = 0, len(code)
+    while pc < size:
+        op = code[pc]
+        opcodes.append(op)
+        if PUSH1 <= op <= PUSH32:
+            width = op - PUSH1 + 1
+            values.append(int.from_bytes(code[pc + 1 : pc + 1 + width], "big"))
+            pc += 1 + width
+        else:
+            values.append(-1)
+            pc += 1
+    return opcodes, values
+
+
+def _count_gated(opcodes: list[int], anchor: int) -> int:
+    """Count ``anchor`` (CALLER/ORIGIN) uses compared against storage and followed by a conditional jump."""
+    gated = 0
+    size = len(opcodes)
+    for i, op in enumerate(opcodes):
+        if op != anchor:
+            continue
+        window = opcodes[max(0, i - _GATE_WINDOW) : min(size, i + _GATE_WINDOW)]
+        if SLOAD in window and EQ in window and JUMPI in opcodes[i : i + _GATE_WINDOW]:
+            gated += 1
+    return gated
+
+
+def _scan(code: bytes) -> dict[str, Any]:
+    body = strip_metadata(code)
+    opcodes, values = disassemble(body)
+
+    db = selector_db()
+    selectors: list[str] = []
+    seen: set[str] = set()
+    slots: set[str] = set()
+    events: set[str] = set()
+    present: set[int] = set(opcodes)
+    for i, op in enumerate(opcodes):
+        if op == PUSH4:
+            # Dispatcher entries: PUSH4 sel EQ, or PUSH4 sel DUP2 EQ; GT/LT splits of binary-search dispatch are skipped.
+            nxt = opcodes[i + 1] if i + 1 < len(opcodes) else None
+            if nxt == EQ or (nxt == DUP2 and i + 2 < len(opcodes) and opcodes[i + 2] == EQ):
+                selector = f"0x{values[i]:08x}"
+                if selector not in seen and len(selectors) < _MAX_SELECTORS:
+                    seen.add(selector)
+                    selectors.append(selector)
+        elif op == PUSH32:
+            slot = EIP1967_SLOTS.get(values[i])
+            if slot is not None:
+                slots.add(slot)
+            else:
+                # LOG topics are pushed as 32-byte constants, so known event hashes reveal what the code emits.
+                events.update(db.events(values[i]))
+
+    return {
+        "code_hash": code_hash(code),
+        "code_size": len(code),
+        "instruction_count": len(opcodes),
+        "has_delegatecall": DELEGATECALL in present,
+        "has_selfdestruct": SELFDESTRUCT in present,
+        "has_callcode": CALLCODE in present,
+        "dangerous_opcodes": [name for op, name in DANGEROUS_OPCODES.items() if op in present],
+        "can_deploy_contracts": CREATE in present or CREATE2 in present,
+        "external_call_count": sum(1 for op in opcodes if op in (CALL, STATICCALL, DELEGATECALL, CALLCODE)),
+        "sstore_count": opcodes.count(SSTORE),
+        "selector_count": len(selectors),
+        "selectors": selectors,
+        "functions": [(db.functions(selector) or [selector])[0] for selector in selectors],
+        "events": sorted(events),
+        "privileged_functions": sorted({PRIVILEGED_SELECTORS[s] for s in selectors if s in PRIVILEGED_SELECTORS}),
+        "eip1967_slots": sorted(slots),
+        "owner_gated_checks": _count_gated(opcodes, CALLER),
+        "tx_origin_checks": _count_gated(opcodes, ORIGIN),
+    }
+
+
+def scan_bytecode(bytecode: str | bytes) -> dict[str, Any] | None:
+    """Compact static features of runtime bytecode, cached by keccak code hash; None when not valid hex."""
+    code = decode_bytecode(bytecode)
+    if not code:
+        return None
+    key = code_hash(code)
+    cached = _FEATURE_CACHE.get(key)
+    if cached is not None:
+        return cached
+    return _FEATURE_CACHE.put(key, cpu_pool().run(_scan, code, size=len(code), threshold=settings.cpu_offload_min_bytes))
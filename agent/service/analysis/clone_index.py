@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import threading
+import zlib
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from ..config import settings
+from .bytecode import decode_bytecode, disassemble, strip_metadata
+from .solidity import tokenize
+
+NUM_PERM = 128
+BANDS = 32
+OPCODE_SHINGLE = 6
+SOURCE_SHINGLE = 5
+MIN_SIMILARITY = 0.5
+# Runs are merged once there are more than this many, so a query binary-searches a handful of files.
+MAX_RUNS = 8
+
+_U64 = np.uint64
+_MIX = _U64(0x9E3779B97F4A7C15)
+_rng = np.random.default_rng(0x5EED)
+# Multiply-shift hash family: h_i(x) = (a_i * x + b_i) >> 32 over uint64 arithmetic, with odd a_i.
+_PERM_A = _rng.integers(1, 2**63, NUM_PERM, dtype=np.uint64) | _U64(1)
+_PERM_B = _rng.integers(0, 2**63, NUM_PERM, dtype=np.uint64)
+_CHUNK = 4096
+
+
+def opcode_shingles(bytecode: str | bytes) -> np.ndarray:
+    """k-grams of the opcode stream; PUSH immediates are ignored so changed constants and addresses still match."""
+    code = decode_bytecode(bytecode)
+    if not code:
+        return np.empty(0, dtype=np.uint64)
+    opcodes = np.asarray(disassemble(strip_metadata(code))[0], dtype=np.uint64)
+    if len(opcodes) < OPCODE_SHINGLE:
+        return np.empty(0, dtype=np.uint64)
+    windows = np.lib.stride_tricks.sliding_window_view(opcodes, OPCODE_SHINGLE)
+    packed = (windows << (np.arange(OPCODE_SHINGLE, dtype=np.uint64) * _U64(8))).sum(axis=1, dtype=np.uint64)
+    return np.unique(packed * _MIX)
+
+
+def source_shingles(source: str) -> np.ndarray:
+    """k-grams of Solidity tokens with literals normalised, so renamed strings and tweaked numbers still match."""
+    words: list[int] = []
+    for kind, text in tokenize(source):
+        if kind == "string":
+            text = '""'
+        elif kind == "number":
+            text = "0"
+        words.append(zlib.crc32(text.encode()))
+    if len(words) < SOURCE_SHINGLE:
+        return np.empty(0, dtype=np.uint64)
+    windows = np.lib.stride_tricks.sliding_window_view(np.asarray(words, dtype=np.uint64), SOURCE_SHINGLE)
+    packed = np.zeros(len(windows), dtype=np.uint64)
+    for column in range(SOURCE_SHINGLE):
+        packed = (packed ^ windows[:, column]) * _MIX
+    return np.unique(packed)
+
+
+def minhash(shingles: np.ndarray) -> np.ndarray | None:
+    if len(shingles) == 0:
+        return None
+    signature = np.full(NUM_PERM, np.iinfo(np.uint32).max, dtype=np.uint32)
+    for start in range(0, len(shingles), _CHUNK):
+        chunk = shingles[start : start + _CHUNK]
+        hashed = ((_PERM_A[:, None] * chunk[None, :] + _PERM_B[:, None]) >> _U64(32)).astype(np.uint32)
+        np.minimum(signature, hashed.min(axis=1), out=signature)
+    return signature
+
+
+def band_keys(signatures: np.ndarray) -> np.ndarray:
+    """One uint64 key per LSH band; accepts a single signature or a (n, NUM_PERM) batch."""
+    rows = signatures.reshape(signatures.shape[:-1] + (BANDS, NUM_PERM // BANDS)).astype(np.uint64)
+    keys = np.broadcast_to((np.arange(BANDS, dtype=np.uint64) + _U64(1)) * _MIX, rows.shape[:-1])
+    for column in range(rows.shape[-1]):
+        keys = (keys ^ rows[..., column]) * _MIX
+    return keys ^ (keys >> _U64(29))
+
+
+class CloneIndex:
+    """Append-only MinHash corpus with an LSH band index, stored on disk and read through mmap.
+
+    Layout under ``path``: ``signatures.u32`` (one NUM_PERM row per entry), ``labels.jsonl`` with
+    ``labels.off`` byte offsets, and sorted runs of (band key, id) as ``run-N.keys`` / ``run-N.ids``.
+    ``add`` makes an entry queryable at once through an in-memory pending table; ``commit`` writes the
+    pending entries as a new sorted run. Entries added after the last commit are re-banded on open.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._meta_path = self.path / "meta.json"
+        meta = json.loads(self._meta_path.read_text()) if self._meta_path.exists() else {}
+        if meta and (meta.get("num_perm"), meta.get("bands")) != (NUM_PERM, BANDS):
+            raise ValueError(f"Clone index at {self.path} was built with different MinHash parameters")
+        self._runs: list[str] = list(meta.get("runs", []))
+        self._indexed = int(meta.get("indexed", 0))
+        self._next_run = int(meta.get("next_run", 0))
+
+        sig_path = self.path / "signatures.u32"
+        self._count = sig_path.stat().st_size // (4 * NUM_PERM) if sig_path.exists() else 0
+        self._signatures: np.ndarray | None = None
+        self._mapped_runs: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        # Band entries not yet written to a run, as (keys, ids) chunks of equal length.
+        self._pending: list[tuple[np.ndarray, np.ndarray]] = []
+        if self._count > self._indexed:
+            self._add_pending(self._indexed, self._signature_rows()[self._indexed :])
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _signature_rows(self) -> np.ndarray:
+        if self._signatures is None or len(self._signatures) != self._count:
+            self._signatures = np.memmap(
+                self.path / "signatures.u32", dtype=np.uint32, mode="r", shape=(self._count, NUM_PERM)
+            )
+        return self._signatures
+
+    def _run_arrays(self, run: str) -> tuple[np.ndarray, np.ndarray]:
+        arrays = self._mapped_runs.get(run)
+        if arrays is None:
+            keys = np.memmap(self.path / f"{run}.keys", dtype=np.uint64, mode="r")
+            ids = np.memmap(self.path / f"{run}.ids", dtype=np.uint32, mode="r")
+            arrays = (keys, ids)
+            self._mapped_runs[run] = arrays
+        return arrays
+
+    def _add_pending(self, first_id: int, signatures: np.ndarray) -> None:
+        keys = band_keys(signatures)
+        ids = np.repeat(np.arange(first_id, first_id + len(signatures), dtype=np.uint32), BANDS)
+        self._pending.append((keys.reshape(-1), ids))
+
+    def _write_meta(self) -> None:
+        meta = {
+            "num_perm": NUM_PERM,
+            "bands": BANDS,
+            "runs": self._runs,
+            "indexed": self._indexed,
+            "next_run": self._next_run,
+        }
+        tmp = self._meta_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, self._meta_path)
+
+    def add(self, signature: np.ndarray, label: str, meta: dict[str, Any] | None = None) -> int:
+        return self.add_many(signature[None, :], [{"label": label, **(meta or {})}])[0]
+
+    def add_many(self, signatures: np.ndarray, records: list[dict[str, Any]]) -> list[int]:
+        """Append entries in one write per file; each record must carry a ``label``."""
+        if len(signatures) != len(records):
+            raise ValueError("Each signature needs exactly one label record")
+        lines = [json.dumps(record, ensure_ascii=False).encode() + b"\n" for record in records]
+        with self._lock:
+            first_id = self._count
+            labels_path = self.path / "labels.jsonl"
+            offset = labels_path.stat().st_size if labels_path.exists() else 0
+            offsets = offset + np.cumsum([0] + [len(line) for line in lines[:-1]], dtype=np.uint64)
+            with open(labels_path, "ab") as handle:
+                handle.write(b"".join(lines))
+            with open(self.path / "labels.off", "ab") as handle:
+                handle.write(offsets.astype(np.uint64).tobytes())
+            with open(self.path / "signatures.u32", "ab") as handle:
+                handle.write(np.ascontiguousarray(signatures, dtype=np.uint32).tobytes())
+            self._count += len(records)
+            self._add_pending(first_id, signatures)
+            return list(range(first_id, self._count))
+
+    def commit(self) -> None:
+        with self._lock:
+            if self._pending:
+                keys = np.concatenate([chunk[0] for chunk in self._pending])
+                ids = np.concatenate([chunk[1] for chunk in self._pending])
+                self._write_run(keys, ids)
+                self._pending.clear()
+            self._indexed = self._count
+            if len(self._runs) > MAX_RUNS:
+                self._merge_runs()
+            self._write_meta()
+
+    def _write_run(self, keys: np.ndarray, ids: np.ndarray) -> None:
+        order = np.argsort(keys, kind="stable")
+        run = f"run-{self._next_run:06d}"
+        self._next_run += 1
+        keys[order].tofile(self.path / f"{run}.keys")
+        ids[order].tofile(self.path / f"{run}.ids")
+        self._runs.append(run)
+
+    def _merge_runs(self) -> None:
+        old_runs = self._runs
+        keys = np.concatenate([np.asarray(self._run_arrays(run)[0]) for run in old_runs])
+        ids = np.concatenate([np.asarray(self._run_arrays(run)[1]) for run in old_runs])
+        self._runs = []
+        self._write_run(keys, ids)
+        self._write_meta()
+        for run in old_runs:
+            self._mapped_runs.pop(run, None)
+            for suffix in (".keys", ".ids"):
+                (self.path / f"{run}{suffix}").unlink(missing_ok=True)
+
+    def _candidates(self, keys: np.ndarray) -> np.ndarray:
+        found: list[np.ndarray] = []
+        for run in self._runs:
+            run_keys, run_ids = self._run_arrays(run)
+            if len(run_keys) == 0:
+                continue
+            lows = np.searchsorted(run_keys, keys, side="left")
+            highs = np.searchsorted(run_keys, keys, side="right")
+            found.extend(np.asarray(run_ids[low:high]) for low, high in zip(lows, highs) if high > low)
+        for pending_keys, pending_ids in self._pending:
+            found.append(pending_ids[np.isin(pending_keys, keys)])
+        return np.unique(np.concatenate(found)) if found else np.empty(0, dtype=np.uint32)
+
+    def label(self, entry_id: int) -> dict[str, Any]:
+        offsets = np.memmap(self.path / "labels.off", dtype=np.uint64, mode="r")
+        with open(self.path / "labels.jsonl", "rb") as handle:
+            handle.seek(int(offsets[entry_id]))
+            return json.loads(handle.readline())
+
+    def query(
+        self, signature: np.ndarray, top_k: int = 3, min_similarity: float = MIN_SIMILARITY
+    ) -> list[dict[str, Any]]:
+        with self._lock:
+            candidates = self._candidates(band_keys(signature))
+            if len(candidates) == 0:
+                return []
+            rows = self._signature_rows()[candidates]
+            similarity = (rows == signature[None, :]).mean(axis=1)
+            order = np.argsort(-similarity, kind="stable")[:top_k]
+            return [
+                {"id": int(candidates[i]), "similarity": round(float(similarity[i]), 4), **self.label(int(candidates[i]))}
+                for i in order
+                if similarity[i] >= min_similarity
+            ]
+
+
+_INDEXES: dict[str, tuple[tuple[int, ...], CloneIndex]] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def _stamp(path: Path) -> tuple[int, ...]:
+    """What changes when any process adds to the index: meta.json is rewritten and signatures.u32 grows."""
+    stamp: list[int] = []
+    for name in ("meta.json", "signatures.u32"):
+        try:
+            stat = (path / name).stat()
+            stamp.extend((stat.st_ino, stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            stamp.extend((0, 0, 0))
+    return tuple(stamp)
+
+
+def clone_index(kind: str, create: bool = False) -> CloneIndex | None:
+    """Shared index for ``opcode`` or ``source`` shingles under CLONE_INDEX_DIR; None when not configured.
+
+    The on-disk stamp is re-checked on every call, so templates added by another worker process
+    are seen on its next lookup: the index is reopened when its files changed.
+    """
+    root = settings.clone_index_dir
+    if not root:
+        return None
+    path = Path(root) / kind
+    stamp = _stamp(path)
+    with _INDEXES_LOCK:
+        cached = _INDEXES.get(str(path))
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        if not create and not any(stamp):
+            return None
+        index = CloneIndex(path)
+        _INDEXES[str(path)] = (stamp, index)
+        return index
+
+
+def _best_match(kind: str, index: CloneIndex, signature: np.ndarray | None) -> dict[str, Any] | None:
+    matches = index.query(signature, top_k=1) if signature is not None else []
+    if not matches:
+        return None
+    match = matches[0]
+    return {
+        "basis": kind,
+        "template": match.get("label"),
+        "similarity_pct": round(match["similarity"] * 100, 2),
+        "template_risk": match.get("risk"),
+        "template_family": match.get("family"),
+    }
+
+
+def match_clone_family(bytecode: str | None, source: str | None) -> list[dict[str, Any]]:
+    """Nearest labelled templates for the contract's opcode stream and/or source, best first."""
+    matches = []
+    opcode_index = clone_index("opcode") if bytecode else None
+    if opcode_index is not None:
+        matches.append(_best_match("opcode", opcode_index, minhash(opcode_shingles(bytecode))))
+    source_index = clone_index("source") if source else None
+    if source_index is not None:
+        matches.append(_best_match("source", source_index, minhash(source_shingles(source))))
+    return sorted((m for m in matches if m is not None), key=lambda m: -m["similarity_pct"])
+
+
+def add_clone_template(
+    label: str,
+    bytecode: str | None = None,
+    source: str | None = None,
+    meta: dict[str, Any] | None = None,
+) -> dict[str, int]:
+    """Insert a labelled contract into the opcode and/or source index and commit; returns the new ids.
+
+    Writers in different processes take an exclusive lock on the index directory and reopen the
+    index under it, so ids are allocated from the files on disk rather than a stale in-memory count.
+    """
+    added: dict[str, int] = {}
+    root = settings.clone_index_dir
+    for kind, signature in (
+        ("opcode", minhash(opcode_shingles(bytecode)) if bytecode else None),
+        ("source", minhash(source_shingles(source)) if source else None),
+    ):
+        if signature is None or not root:
+            continue
+        path = Path(root) / kind
+        path.mkdir(parents=True, exist_ok=True)
+        with open(path / ".lock", "wb") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            index = clone_index(kind, create=True)
+            added[kind] = index.add(signature, label, meta)
+            index.commit()
+            # Our own write changed the stamp; record it so this process does not reopen needlessly.
+            with _INDEXES_LOCK:
+                _INDEXES[str(path)] = (_stamp(path), index)
+    return added
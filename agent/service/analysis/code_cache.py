@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, Callable, TypeVar
+
+from ..cache import cache_namespace
+from .bytecode import code_hash, decode_bytecode, resolve_minimal_proxy, scan_bytecode
+from .solidity import DIGEST_VERSION, source_digest
+
+T = TypeVar("T")
+
+# Code-level analysis (bytecode features, source digests), keyed by content alone: every instance of
+# the same code shares it. Verdicts are scored per request on top of it.
+_CODE_CACHE = cache_namespace("contract-code")
+# Model narratives (summary + explanations) of a scored verdict for one piece of code.
+_NARRATIVE_CACHE = cache_namespace("contract")
+
+
+def code_identity(chain: str | None, bytecode: str | bytes) -> dict[str, Any] | None:
+    """Content address of runtime code; EIP-1167 clones resolve to their implementation instead.
+
+    ``code_key`` is the keccak code hash, or ``eip1167:<chain>:<implementation>`` for minimal proxies,
+    so every clone of one implementation shares a key whatever proxy variant deployed it.
+    """
+    code = decode_bytecode(bytecode)
+    if not code:
+        return None
+    implementation = resolve_minimal_proxy(code)
+    if implementation is not None:
+        return {
+            "code_key": f"eip1167:{(chain or '').lower()}:{implementation}",
+            "features": {
+                "code_hash": code_hash(code),
+                "code_size": len(code),
+                "minimal_proxy": True,
+                "implementation_address": implementation,
+            },
+        }
+    features = scan_bytecode(code)
+    return {"code_key": features["code_hash"], "features": features} if features is not None else None
+
+
+def code_analysis(chain: str | None, bytecode: str | bytes) -> dict[str, Any] | None:
+    """``code_identity`` through the shared ``contract-code`` namespace, so each code is scanned once per cluster."""
+    code = decode_bytecode(bytecode)
+    if not code:
+        return None
+    implementation = resolve_minimal_proxy(code)
+    key = f"eip1167:{(chain or '').lower()}:{implementation}" if implementation is not None else code_hash(code)
+    record = _CODE_CACHE.get(key)
+    if record is None:
+        # Built outside get_or_build: the scan may go to the CPU pool, and no caller should queue behind it.
+        record = code_identity(chain, code)
+        if record is not None:
+            _CODE_CACHE.set(key, record)
+    return record
+
+
+def cached_source_digest(source: str) -> dict[str, Any]:
+    """``source_digest`` through the shared ``contract-code`` namespace, keyed by digest version and source hash."""
+    key = f"source:v{DIGEST_VERSION}:" + hashlib.sha256(source.encode()).hexdigest()
+    digest = _CODE_CACHE.get(key)
+    if digest is None:
+        digest = source_digest(source)
+        _CODE_CACHE.set(key, digest)
+    return digest
+
+
+def narrative_inputs(payload: dict[str, Any]) -> str:
+    """What a narrative says besides the code: the verdict it explains, the interaction and the language.
+
+    Instance details (address, owner, creator, ...) only reach the narrative through the verdict's
+    reasons, so instances that score the same share one narrative.
+    """
+    risk_score = payload.get("risk_score") or {}
+    lang = "en" if str(payload.get("lang") or "zh").strip().lower().startswith("en") else "zh"
+    canonical = json.dumps(
+        [lang, payload.get("interaction_type"), risk_score.get("risk_level"), risk_score.get("reasons")],
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def cached_narrative(code_key: str, payload: dict[str, Any], builder: Callable[[], T]) -> T:
+    """Reuse the narrative written for this code and verdict, from any worker sharing the cache."""
+    return _NARRATIVE_CACHE.get_or_build(f"{code_key}:{narrative_inputs(payload)}", builder)
+
+
+def assessment_cache_stats() -> dict[str, int]:
+    stats = _NARRATIVE_CACHE.stats
+    return {
+        "entries": len(_NARRATIVE_CACHE.memory),
+        "hits": stats["hits"] + stats["shared_hits"],
+        "misses": stats["misses"],
+    }
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from typing import Any
+
+from .clone_index import match_clone_family
+from .code_cache import cached_source_digest, code_analysis
+
+
+def compact_contract_payload(payload: dict[str, Any]) -> tuple[dict[str, Any], str | None]:
+    """Swap raw bytecode hex and Solidity source for compact digests the model and scorer can read.
+
+    Also returns the code key the narrative is cached under, None when there is no usable bytecode.
+    """
+    code = payload.get("code") or {}
+    source = code.get("source_code")
+    bytecode = code.get("bytecode")
+    identity = code_analysis(payload.get("chain"), bytecode) if bytecode else None
+    # Minimal proxies are all near-identical 45-byte stubs; only real runtime code is matched.
+    clone_bytecode = bytecode if identity is not None and not identity["features"].get("minimal_proxy") else None
+    clones = match_clone_family(clone_bytecode, source)
+    if clones:
+        payload["clone_family"] = clones
+
+    if source:
+        digest = cached_source_digest(source)
+        code["source_code"] = f"<omitted: {digest['source_chars']} chars, sha256={digest['source_hash']}>"
+        payload["source_digest"] = digest
+
+    if not bytecode:
+        return payload, None
+    if identity is None:
+        code["bytecode"] = "<unparsed>"
+        return payload, None
+
+    features = identity["features"]
+    code["bytecode"] = f"<omitted: {features['code_size']} bytes, keccak={features['code_hash']}>"
+    payload["bytecode_features"] = features
+    if features.get("minimal_proxy"):
+        proxy = payload.get("proxy") or {}
+        payload["proxy"] = {
+            **proxy,
+            "is_proxy": True,
+            "implementation_address": proxy.get("implementation_address") or features["implementation_address"],
+        }
+    return payload, identity["code_key"]
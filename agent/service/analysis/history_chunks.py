@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from typing import Any, Iterable
+
+from ..cache import cache_namespace
+
+# Transactions kept per counterparty: the most recent ones are all the phishing context ever shows.
+RELATED_PER_ADDRESS = 3
+_ADDRESS_FIELDS = ("from_address", "to_address", "contract_address")
+_HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class MissingHistoryChunks(LookupError):
+    """A request named history chunks this server has not stored (or has expired); the client re-uploads them."""
+
+    def __init__(self, missing: list[str]) -> None:
+        super().__init__(f"{len(missing)} history chunk(s) not found")
+        self.missing = missing
+
+
+def normalize_address(value: Any) -> str:
+    text = str(value or "").strip().lower()
+    if text.startswith("0x"):
+        text = text[2:]
+    return re.sub(r"[^0-9a-f]", "", text)[:40]
+
+
+def canonical_chunk(transactions: Iterable[dict[str, Any]]) -> bytes:
+    """The bytes a chunk hash covers: a JSON array of the transactions, keys sorted, nulls dropped, no spaces."""
+    rows = [{key: value for key, value in tx.items() if value is not None} for tx in transactions]
+    return json.dumps(rows, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def chunk_hash(transactions: Iterable[dict[str, Any]]) -> str:
+    return hashlib.sha256(canonical_chunk(transactions)).hexdigest()
+
+
+def _newest(transactions: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    # Stable sort: equal timestamps keep history order, as a scan of the full list would.
+    return sorted(transactions, key=lambda tx: int(tx.get("timestamp") or 0), reverse=True)[:RELATED_PER_ADDRESS]
+
+
+def build_digest(transactions: Iterable[dict[str, Any]]) -> dict[str, list[dict[str, Any]]]:
+    """Counterparty address (40 lowercase hex) -> its most recent transactions in this stretch of history."""
+    related: dict[str, list[dict[str, Any]]] = {}
+    for tx in transactions:
+        if not isinstance(tx, dict):
+            continue
+        seen = set()
+        for field in _ADDRESS_FIELDS:
+            address = normalize_address(tx.get(field))
+            if len(address) == 40 and address not in seen:
+                seen.add(address)
+                related.setdefault(address, []).append(tx)
+    return {address: _newest(txs) for address, txs in related.items()}
+
+
+def merge_digests(digests: Iterable[dict[str, list[dict[str, Any]]]]) -> dict[str, list[dict[str, Any]]]:
+    """Digest of the concatenated histories; the inputs (possibly live cache entries) are left untouched."""
+    merged: dict[str, list[dict[str, Any]]] = {}
+    for digest in digests:
+        for address, txs in digest.items():
+            current = merged.get(address)
+            merged[address] = list(txs) if current is None else _newest(current + list(txs))
+    return merged
+
+
+class HistoryChunkStore:
+    """Content-addressed store of per-chunk digests, on the ``history-chunks`` cache namespace.
+
+    The wallet seals its history into immutable chunks named by ``chunk_hash``; the server keeps
+    only each chunk's digest, so a phishing request names its chunks and sends the unsealed tail.
+    With a shared cache tier configured, a chunk uploaded to one worker or node serves all of them.
+    """
+
+    def __init__(self, cache: Any | None = None) -> None:
+        self._cache = cache
+
+    @property
+    def cache(self) -> Any:
+        return self._cache if self._cache is not None else cache_namespace("history-chunks")
+
+    def put(self, expected_hash: str, transactions: list[dict[str, Any]]) -> bool:
+        """Store one chunk; False when its content does not hash to ``expected_hash``."""
+        if chunk_hash(transactions) != expected_hash:
+            return False
+        if self.cache.get(expected_hash) is None:
+            self.cache.set(expected_hash, build_digest(transactions))
+        return True
+
+    def missing(self, hashes: Iterable[str]) -> list[str]:
+        return [value for value in dict.fromkeys(hashes) if not _HASH_PATTERN.match(value) or self.cache.get(value) is None]
+
+    def digest(self, hashes: Iterable[str]) -> dict[str, list[dict[str, Any]]]:
+        """Merged digest of ``hashes`` in history order; raises MissingHistoryChunks naming every absent one."""
+        digests, missing = [], []
+        for value in hashes:
+            found = self.cache.get(value) if _HASH_PATTERN.match(value) else None
+            if found is None:
+                missing.append(value)
+            else:
+                digests.append(found)
+        if missing:
+            raise MissingHistoryChunks(list(dict.fromkeys(missing)))
+        return merge_digests(digests)
+
+
+_STORE = HistoryChunkStore()
+
+
+def history_chunks() -> HistoryChunkStore:
+    return _STORE
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+# Ethereum's keccak256 is the original Keccak submission (pad 0x01), not NIST SHA3-256 (pad 0x06),
+# so hashlib.sha3_256 cannot be used.
+
+_MASK = (1 << 64) - 1
+_RATE = 136
+
+_ROUND_CONSTANTS = (
+    0x0000000000000001, 0x0000000000008082, 0x800000000000808A, 0x8000000080008000,
+    0x000000000000808B, 0x0000000080000001, 0x8000000080008081, 0x8000000000008009,
+    0x000000000000008A, 0x0000000000000088, 0x0000000080008009, 0x000000008000000A,
+    0x000000008000808B, 0x800000000000008B, 0x8000000000008089, 0x8000000000008003,
+    0x8000000000008002, 0x8000000000000080, 0x000000000000800A, 0x800000008000000A,
+    0x8000000080008081, 0x8000000000008080, 0x0000000080000001, 0x8000000080008008,
+)
+
+# (source lane, left rotation, right rotation) for the combined rho and pi steps, indexed by destination lane.
+_RHO_PI: list[tuple[int, int, int]] = [(0, 0, 64)] * 25
+_x, _y = 1, 0
+for _t in range(24):
+    _src = _x + 5 * _y
+    _x, _y = _y, (2 * _x + 3 * _y) % 5
+    _rot = ((_t + 1) * (_t + 2) // 2) % 64
+    _RHO_PI[_x + 5 * _y] = (_src, _rot, 64 - _rot)
+del _x, _y, _t, _src, _rot
+
+_CHI = [(i, (i // 5) * 5 + (i + 1) % 5, (i // 5) * 5 + (i + 2) % 5) for i in range(25)]
+
+
+def _keccak_f(lanes: list[int]) -> list[int]:
+    rho_pi, chi, mask = _RHO_PI, _CHI, _MASK
+    for rc in _ROUND_CONSTANTS:
+        c0 = lanes[0] ^ lanes[5] ^ lanes[10] ^ lanes[15] ^ lanes[20]
+        c1 = lanes[1] ^ lanes[6] ^ lanes[11] ^ lanes[16] ^ lanes[21]
+        c2 = lanes[2] ^ lanes[7] ^ lanes[12] ^ lanes[17] ^ lanes[22]
+        c3 = lanes[3] ^ lanes[8] ^ lanes[13] ^ lanes[18] ^ lanes[23]
+        c4 = lanes[4] ^ lanes[9] ^ lanes[14] ^ lanes[19] ^ lanes[24]
+        d = (
+            c4 ^ (((c1 << 1) | (c1 >> 63)) & mask),
+            c0 ^ (((c2 << 1) | (c2 >> 63)) & mask),
+            c1 ^ (((c3 << 1) | (c3 >> 63)) & mask),
+            c2 ^ (((c4 << 1) | (c4 >> 63)) & mask),
+            c3 ^ (((c0 << 1) | (c0 >> 63)) & mask),
+        )
+        theta = [lane ^ d[i % 5] for i, lane in enumerate(lanes)]
+        b = [((theta[src] << left) | (theta[src] >> right)) & mask for src, left, right in rho_pi]
+        lanes = [b[i] ^ (~b[j] & b[k]) for i, j, k in chi]
+        lanes[0] ^= rc
+    return lanes
+
+
+def keccak256(data: bytes) -> bytes:
+    padded = bytearray(data)
+    pad_len = _RATE - len(padded) % _RATE
+    padded.extend(b"\x00" * pad_len)
+    padded[len(data)] ^= 0x01
+    padded[-1] ^= 0x80
+
+    lanes = [0] * 25
+    for offset in range(0, len(padded), _RATE):
+        block = padded[offset : offset + _RATE]
+        for i in range(_RATE // 8):
+            lanes[i] ^= int.from_bytes(block[8 * i : 8 * i + 8], "little")
+        lanes = _keccak_f(lanes)
+    return b"".join(lane.to_bytes(8, "little") for lane in lanes[:4])
+
+
+def keccak256_hex(data: bytes) -> str:
+    return "0x" + keccak256(data).hex()
+
+
+def function_selector(signature: str) -> str:
+    """4-byte selector of a canonical signature such as ``transfer(address,uint256)``."""
+    return "0x" + keccak256(signature.encode()).hex()[:8]
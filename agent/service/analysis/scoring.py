@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import json
+import math
+import re
+import threading
+from pathlib import Path
+from typing import Any
+
+from ..config import settings
+from ..models import RiskReason, SecurityRiskResponse
+from .solidity import _category
+
+BUNDLED_CONFIG_PATH = Path(__file__).resolve().parent / "data" / "contract_scoring.json"
+
+PRIVILEGE_FIELDS = ("can_upgrade", "can_pause", "can_blacklist", "can_mint", "can_burn")
+TOKEN_FLAG_FIELDS = ("has_transfer_tax", "tax_changeable", "max_tx_limit", "max_wallet_limit", "trading_restrictions")
+EVIDENCE_GROUPS = ("code", "permissions", "token_flags", "proxy", "bytecode_features", "source_digest")
+
+# Privileged-function categories (see solidity.PRIVILEGED_CATEGORIES) mapped to the signal they raise.
+CATEGORY_SIGNALS = {
+    "upgrade": "can_upgrade",
+    "pause": "can_pause",
+    "blacklist": "can_blacklist",
+    "mint": "can_mint",
+    "burn": "can_burn",
+    "fee": "fee_control",
+    "limits": "fee_control",
+    "withdraw": "withdraw_control",
+}
+# A function found in code is weaker evidence than a declared permission: it may be timelocked or renounced.
+CODE_EVIDENCE = 0.8
+
+FLAGGED_TAG_RE = re.compile(r"scam|phish|rug|honeypot|drain|exploit|hack|malicious|fraud", re.I)
+
+_LEVELS = {
+    "en": {"high": "high", "medium": "medium", "low": "low", "unknown": "unknown"},
+    "zh": {"high": "高", "medium": "中", "low": "低", "unknown": "未知"},
+}
+
+
+def extract_signals(payload: dict[str, Any]) -> tuple[dict[str, float], set[str]]:
+    """Signal strengths in [0, 1] from a compacted contract payload, plus the evidence groups present."""
+    signals: dict[str, float] = {}
+    groups: set[str] = set()
+
+    def raise_to(name: str, value: float) -> None:
+        if value > signals.get(name, 0.0):
+            signals[name] = value
+
+    code = payload.get("code") or {}
+    if code.get("verified") is not None:
+        groups.add("code")
+        raise_to("verified_code" if code["verified"] else "unverified_code", 1.0)
+
+    permissions = payload.get("permissions") or {}
+    declared = {field: permissions.get(field) for field in PRIVILEGE_FIELDS if permissions.get(field) is not None}
+    if declared:
+        groups.add("permissions")
+        for field, enabled in declared.items():
+            if enabled:
+                raise_to(field, 1.0)
+
+    token_flags = payload.get("token_flags") or {}
+    for field in TOKEN_FLAG_FIELDS:
+        if token_flags.get(field) is not None:
+            groups.add("token_flags")
+            if token_flags[field]:
+                raise_to(field, 1.0)
+
+    proxy = payload.get("proxy") or {}
+    if proxy.get("is_proxy") is not None:
+        groups.add("proxy")
+        if proxy["is_proxy"]:
+            raise_to("upgradeable_proxy", 1.0)
+
+    features = payload.get("bytecode_features") or {}
+    if features and not features.get("minimal_proxy"):
+        groups.add("bytecode_features")
+        if features.get("has_selfdestruct"):
+            raise_to("selfdestruct", 1.0)
+        if features.get("has_callcode"):
+            raise_to("callcode", 1.0)
+        if features.get("has_delegatecall") and not features.get("eip1967_slots"):
+            raise_to("delegatecall_outside_proxy", 1.0)
+        if features.get("tx_origin_checks"):
+            raise_to("tx_origin_auth", 1.0)
+        for signature in features.get("privileged_functions") or []:
+            signal = CATEGORY_SIGNALS.get(_category(signature.split("(", 1)[0]) or "")
+            if signal:
+                raise_to(signal, CODE_EVIDENCE)
+
+    digest = payload.get("source_digest") or {}
+    if digest:
+        groups.add("source_digest")
+        if digest.get("selfdestruct_sites"):
+            raise_to("selfdestruct", 1.0)
+        if digest.get("tx_origin_sites"):
+            raise_to("tx_origin_auth", 1.0)
+        if digest.get("unguarded_privileged_functions"):
+            raise_to("unguarded_privileged", 1.0)
+        for item in digest.get("privileged_functions") or []:
+            signal = CATEGORY_SIGNALS.get(item.get("category") or "")
+            if signal:
+                raise_to(signal, CODE_EVIDENCE)
+
+    if declared and not any(signals.get(field) for field in PRIVILEGE_FIELDS):
+        raise_to("no_privileges", 1.0)
+
+    for match in payload.get("clone_family") or []:
+        if match.get("template_risk") == "high":
+            raise_to("risky_clone", float(match.get("similarity_pct") or 0.0) / 100)
+
+    for tag in payload.get("tags") or []:
+        if FLAGGED_TAG_RE.search(str(tag.get("label") or "")):
+            confidence = tag.get("confidence")
+            raise_to("flagged_tag", 1.0 if confidence is None else min(max(float(confidence), 0.0), 1.0))
+
+    return signals, groups
+
+
+class ContractScorer:
+    """Logistic model over contract risk signals; weights, thresholds and reason texts come from a JSON config.
+
+    A verdict is ``decisive`` when the score is far enough from the middle, on enough evidence, that a model
+    call could only rephrase it.
+    """
+
+    def __init__(self, config: dict[str, Any]) -> None:
+        self.bias = float(config.get("bias", 0.0))
+        self.signals: dict[str, dict[str, Any]] = config["signals"]
+        self.weights = {name: float(spec["weight"]) for name, spec in self.signals.items()}
+        thresholds = config.get("thresholds") or {}
+        self.high = float(thresholds.get("high", 0.7))
+        self.medium = float(thresholds.get("medium", 0.4))
+        decisive = config.get("decisive") or {}
+        self.decisive_high = float(decisive.get("high", 0.9))
+        self.decisive_low = float(decisive.get("low", 0.1))
+        self.min_coverage = float(decisive.get("min_coverage", 0.3))
+        self.clone_min_similarity = float(config.get("clone_min_similarity_pct", 80)) / 100
+        self.fillers: list[dict[str, Any]] = config.get("fillers") or []
+
+    @classmethod
+    def from_file(cls, path: str | Path) -> "ContractScorer":
+        with open(path, encoding="utf-8") as handle:
+            return cls(json.load(handle))
+
+    def score(self, payload: dict[str, Any]) -> dict[str, Any]:
+        signals, groups = extract_signals(payload)
+        if signals.get("risky_clone", 0.0) < self.clone_min_similarity:
+            signals.pop("risky_clone", None)
+        coverage = len(groups) / len(EVIDENCE_GROUPS)
+        if not groups:
+            return {"score": None, "risk_level": "unknown", "confidence": 0.3, "coverage": 0.0, "decisive": False, "reasons": []}
+
+        contributions = {name: self.weights[name] * value for name, value in signals.items() if name in self.weights}
+        score = 1 / (1 + math.exp(-(self.bias + sum(contributions.values()))))
+        level = "high" if score >= self.high else "medium" if score >= self.medium else "low"
+        # Rank towards the verdict first (what pushed a risky score up, a safe one down), then the caveats.
+        direction = -1 if level == "low" else 1
+        ranked = sorted((c for c in contributions.items() if c[1]), key=lambda c: (c[1] * direction < 0, -abs(c[1])))
+        certainty = abs(2 * score - 1) * min(1.0, coverage * 2)
+        return {
+            "score": round(score, 4),
+            "risk_level": level,
+            "confidence": round(min(0.3 + 0.65 * certainty, 0.95), 2),
+            "coverage": round(coverage, 2),
+            "decisive": coverage >= self.min_coverage and (score >= self.decisive_high or score <= self.decisive_low),
+            "reasons": [{"signal": name, "contribution": round(value, 3)} for name, value in ranked],
+        }
+
+    def _text(self, spec: dict[str, Any], key: str, lang: str) -> str:
+        texts = spec.get(key) or {}
+        return texts.get(lang) or texts.get("en") or ""
+
+    def top_reasons(self, verdict: dict[str, Any], lang: str, explanations: list[str] | None = None) -> list[RiskReason]:
+        reasons = [
+            RiskReason(
+                reason=self._text(self.signals[item["signal"]], "reason", lang),
+                explanation=self._text(self.signals[item["signal"]], "explanation", lang),
+            )
+            for item in verdict["reasons"][:3]
+        ]
+        for filler in self.fillers[: 3 - len(reasons)]:
+            reasons.append(RiskReason(reason=self._text(filler, "reason", lang), explanation=self._text(filler, "explanation", lang)))
+        for reason, explanation in zip(reasons, explanations or []):
+            if explanation and explanation.strip():
+                reason.explanation = explanation.strip()
+        return reasons
+
+    def response(
+        self,
+        verdict: dict[str, Any],
+        lang: str,
+        summary: str | None = None,
+        explanations: list[str] | None = None,
+    ) -> SecurityRiskResponse:
+        """Assemble the API response; the model may only supply the summary and explanation wording."""
+        lang = "en" if lang == "en" else "zh"
+        level = verdict["risk_level"]
+        titles = [self._text(self.signals[item["signal"]], "reason", lang) for item in verdict["reasons"][:3]]
+        if not summary or not summary.strip():
+            if level == "unknown":
+                summary = "Not enough contract data to assess risk." if lang == "en" else "合约数据不足，无法评估风险。"
+            elif lang == "en":
+                summary = f"{level.capitalize()} contract risk: {'; '.join(titles) if titles else 'no notable risk signals'}."
+            else:
+                summary = f"合约风险{_LEVELS['zh'][level]}：{'；'.join(titles) if titles else '未发现显著风险信号'}。"
+        return SecurityRiskResponse(
+            risk_level=_LEVELS[lang][level],
+            summary=summary.strip(),
+            confidence=verdict["confidence"],
+            top_reasons=self.top_reasons(verdict, lang, explanations),
+        )
+
+
+_SCORER: ContractScorer | None = None
+_SCORER_LOCK = threading.Lock()
+
+
+def contract_scorer() -> ContractScorer:
+    """Process-wide scorer: CONTRACT_SCORING_CONFIG when set, else the bundled weights."""
+    global _SCORER
+    with _SCORER_LOCK:
+        if _SCORER is None:
+            _SCORER = ContractScorer.from_file(settings.contract_scoring_config or BUNDLED_CONFIG_PATH)
+        return _SCORER
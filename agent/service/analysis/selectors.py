@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import mmap
+import struct
+import sys
+import threading
+from pathlib import Path
+from typing import Iterable
+
+from ..config import settings
+from .keccak import keccak256
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+BUNDLED_DB_PATH = DATA_DIR / "selectors.bin"
+BUNDLED_SOURCE_PATH = DATA_DIR / "signatures.txt"
+
+# Header: magic, function count, event count. Records are sorted by key and point into a
+# NUL-terminated signature blob that follows the two tables.
+MAGIC = b"LWSELDB1"
+_HEADER = struct.Struct(">8sII")
+_FUNCTION = struct.Struct(">4sI")
+_EVENT = struct.Struct(">32sI")
+
+
+class SelectorDatabase:
+    """Read-only function/event signature table, mmap'd so workers share pages and nothing is parsed at load.
+
+    Lookups binary-search the fixed-width records directly in the mapping: O(log n) with no index in memory.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        with open(self.path, "rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.function_count, self.event_count = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a selector database")
+        self._functions_at = _HEADER.size
+        self._events_at = self._functions_at + self.function_count * _FUNCTION.size
+        self._strings_at = self._events_at + self.event_count * _EVENT.size
+
+    def _string(self, offset: int) -> str:
+        start = self._strings_at + offset
+        return self._map[start : self._map.find(b"\0", start)].decode()
+
+    def _lookup(self, key: bytes, table_at: int, count: int, record: struct.Struct) -> list[str]:
+        width = len(key)
+        low, high = 0, count
+        while low < high:
+            mid = (low + high) // 2
+            at = table_at + mid * record.size
+            if self._map[at : at + width] < key:
+                low = mid + 1
+            else:
+                high = mid
+        matches: list[str] = []
+        while low < count:
+            found, offset = record.unpack_from(self._map, table_at + low * record.size)
+            if found != key:
+                break
+            matches.append(self._string(offset))
+            low += 1
+        return matches
+
+    def functions(self, selector: str | bytes | int) -> list[str]:
+        """All known signatures for a 4-byte selector (collisions included), or [] when unknown."""
+        key = _key_bytes(selector, 4)
+        return self._lookup(key, self._functions_at, self.function_count, _FUNCTION) if key else []
+
+    def events(self, topic: str | bytes | int) -> list[str]:
+        key = _key_bytes(topic, 32)
+        return self._lookup(key, self._events_at, self.event_count, _EVENT) if key else []
+
+    def close(self) -> None:
+        self._map.close()
+
+
+def _key_bytes(value: str | bytes | int, width: int) -> bytes | None:
+    if isinstance(value, int):
+        return value.to_bytes(width, "big") if 0 <= value < 1 << (8 * width) else None
+    if isinstance(value, bytes):
+        return value[:width] if len(value) >= width else None
+    text = value.strip().lower()
+    text = text[2:] if text.startswith("0x") else text
+    try:
+        raw = bytes.fromhex(text[: 2 * width])
+    except ValueError:
+        return None
+    return raw if len(raw) == width else None
+
+
+def build_selector_db(signatures: Iterable[str], path: str | Path) -> None:
+    """Write a database from ``function <sig>`` / ``event <sig>`` lines; '#' comments and blanks are skipped."""
+    functions: set[tuple[bytes, str]] = set()
+    events: set[tuple[bytes, str]] = set()
+    for line in signatures:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        kind, _, signature = line.partition(" ")
+        signature = signature.replace(" ", "")
+        digest = keccak256(signature.encode())
+        if kind == "function":
+            functions.add((digest[:4], signature))
+        elif kind == "event":
+            events.add((digest, signature))
+        else:
+            raise ValueError(f"Unknown signature kind in line: {line!r}")
+
+    blob = bytearray()
+    offsets: dict[str, int] = {}
+
+    def offset_of(signature: str) -> int:
+        if signature not in offsets:
+            offsets[signature] = len(blob)
+            blob.extend(signature.encode() + b"\0")
+        return offsets[signature]
+
+    out = bytearray(_HEADER.pack(MAGIC, len(functions), len(events)))
+    for key, signature in sorted(functions):
+        out.extend(_FUNCTION.pack(key, offset_of(signature)))
+    for key, signature in sorted(events):
+        out.extend(_EVENT.pack(key, offset_of(signature)))
+    out.extend(blob)
+    Path(path).write_bytes(bytes(out))
+
+
+_DB: SelectorDatabase | None = None
+_DB_LOCK = threading.Lock()
+
+
+def selector_db() -> SelectorDatabase:
+    """Process-wide database: SELECTOR_DB_PATH when set, else the bundled table."""
+    global _DB
+    with _DB_LOCK:
+        if _DB is None:
+            _DB = SelectorDatabase(settings.selector_db_path or BUNDLED_DB_PATH)
+        return _DB
+
+
+def decode_selector(selector: str | bytes | int) -> str | None:
+    matches = selector_db().functions(selector)
+    return matches[0] if matches else None
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] != ["build"]:
+        raise SystemExit("usage: python -m service.analysis.selectors build [SOURCE] [OUTPUT]")
+    source = Path(sys.argv[2]) if len(sys.argv) > 2 else BUNDLED_SOURCE_PATH
+    output = Path(sys.argv[3]) if len(sys.argv) > 3 else BUNDLED_DB_PATH
+    with open(source, encoding="utf-8") as lines:
+        build_selector_db(lines, output)
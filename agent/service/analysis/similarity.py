@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from typing import Any
+
+# Hex characters in an address; every ratio is normalised by the full address length.
+ADDRESS_CHARS = 40
+HIGH_SIMILARITY = 0.85
+
+
+def levenshtein_distance(a: str, b: str) -> int:
+    if a == b:
+        return 0
+    if not a:
+        return len(b)
+    if not b:
+        return len(a)
+
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        curr = [i]
+        for j, cb in enumerate(b, start=1):
+            insert_cost = curr[j - 1] + 1
+            delete_cost = prev[j] + 1
+            replace_cost = prev[j - 1] + (0 if ca == cb else 1)
+            curr.append(min(insert_cost, delete_cost, replace_cost))
+        prev = curr
+    return prev[-1]
+
+
+def prefix_match_ratio(a: str, b: str) -> float:
+    matched = 0
+    limit = min(len(a), len(b))
+    for i in range(limit):
+        if a[i] != b[i]:
+            break
+        matched += 1
+    return matched / ADDRESS_CHARS
+
+
+def suffix_match_ratio(a: str, b: str) -> float:
+    matched = 0
+    limit = min(len(a), len(b))
+    for i in range(1, limit + 1):
+        if a[-i] != b[-i]:
+            break
+        matched += 1
+    return matched / ADDRESS_CHARS
+
+
+def head_bag_similarity(target: str, candidate: str, head_len: int = 6) -> float:
+    """Order-tolerant similarity on the first N chars to catch visual-clone prefixes."""
+    if head_len <= 0:
+        return 0.0
+    ta = target[:head_len]
+    ca = candidate[:head_len]
+    if not ta or not ca:
+        return 0.0
+
+    counts_target: dict[str, int] = {}
+    counts_candidate: dict[str, int] = {}
+    for ch in ta:
+        counts_target[ch] = counts_target.get(ch, 0) + 1
+    for ch in ca:
+        counts_candidate[ch] = counts_candidate.get(ch, 0) + 1
+
+    overlap = 0
+    for ch, count in counts_target.items():
+        overlap += min(count, counts_candidate.get(ch, 0))
+    return (2.0 * overlap) / (len(ta) + len(ca))
+
+
+def weighted_similarity(target: str, candidate: str) -> dict[str, Any]:
+    prefix = prefix_match_ratio(target, candidate)
+    suffix = suffix_match_ratio(target, candidate)
+    lev = max(0.0, 1.0 - levenshtein_distance(target, candidate) / ADDRESS_CHARS)
+    head_bag_6 = head_bag_similarity(target, candidate, head_len=6)
+    return {
+        "address": f"0x{candidate}",
+        "prefix_match_ratio": round(prefix, 4),
+        "suffix_match_ratio": round(suffix, 4),
+        "normalized_levenshtein_similarity": round(lev, 4),
+        "head_bag_similarity_6": round(head_bag_6, 4),
+        "similarity": round(max(prefix, suffix, lev, head_bag_6), 4),
+    }
+
+
+def pack_addresses(addresses: list[str]) -> bytes:
+    """40-char hex addresses as one buffer of 20-byte rows: a few KB to pickle instead of a list of str."""
+    return b"".join(bytes.fromhex(address) for address in addresses)
+
+
+def rank_packed(target: bytes, packed: bytes, top_k: int = 3) -> tuple[list[dict[str, Any]], int]:
+    """Top ``top_k`` scores of the packed candidates against ``target``, plus how many are highly similar.
+
+    Ties keep candidate order. Runs in a CPU pool worker for large histories, so input and output stay small.
+    """
+    target_hex = target.hex()
+    scores = [weighted_similarity(target_hex, packed[i : i + 20].hex()) for i in range(0, len(packed), 20)]
+    scores.sort(key=lambda item: item["similarity"], reverse=True)
+    return scores[:top_k], sum(1 for item in scores if item["similarity"] >= HIGH_SIMILARITY)
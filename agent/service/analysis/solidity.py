@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from typing import Any
+
+from ..config import settings
+from ..engines.snapshot_cache import SnapshotCache
+from ..offload import cpu_pool
+
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<comment>//[^\n]*|/\*.*?\*/)
+    |(?P<string>"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')
+    |(?P<ident>[A-Za-z_$][A-Za-z0-9_$]*)
+    |(?P<number>0[xX][0-9a-fA-F_]+|\d[\d_]*(?:\.\d+)?(?:e\d+)?)
+    |(?P<punct>[{}()\[\];,.])
+    |(?P<op>[^\sA-Za-z0-9_${}()\[\];,.'"]+)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+CONTRACT_KINDS = {"contract", "library", "interface", "abstract"}
+VISIBILITIES = {"public", "external", "internal", "private"}
+MUTABILITIES = {"view", "pure", "payable"}
+
+# Checked in order against a function name split into lowercase words ("addToBlackList" ->
+# "add to black list"); the first matching pattern names the category. Patterns match whole
+# words, so "robotics" is not a bot list and "excludeFromFee" is a fee switch, not a blacklist.
+PRIVILEGED_CATEGORIES = (
+    ("upgrade", re.compile(r"\b(upgrade\w*|implementation)\b")),
+    ("ownership", re.compile(r"\bownership\b|^(set|change) (owner|admin)\b")),
+    ("mint", re.compile(r"\b(mint|mints|minting|minter|minters)\b")),
+    ("burn", re.compile(r"\b(burn|burns|burning|burner)\b")),
+    ("pause", re.compile(r"\b(pause|unpause|paused|freeze|unfreeze|frozen)\b")),
+    (
+        "blacklist",
+        re.compile(
+            r"\b(black|blacklist\w*|block|blocked|blocklist\w*|unblock|deny|denylist|ban|banned|unban|bot|bots"
+            r"|whitelist\w*|allowlist\w*)\b|\b(white|allow) list\b"
+        ),
+    ),
+    ("fee", re.compile(r"^(set|update|exclude|include)\b.*\b(fee|fees|tax|taxes|rate)\b")),
+    (
+        "limits",
+        re.compile(r"^set\b.*\b(max|limit|limits|cooldown)\b|^(enable|disable|open) trading\b|^remove limits\b"),
+    ),
+    ("withdraw", re.compile(r"\b(withdraw\w*|rescue\w*|sweep|recover\w*|drain\w*|skim)\b")),
+)
+
+ACCESS_HINT_RE = re.compile(r"^only|auth|admin|owner|role|governance|whennotpaused", re.I)
+# In-body guards: helper calls like OpenZeppelin's _checkOwner()/_checkRole(role) and role/owner
+# predicates used in a require or if, e.g. require(hasRole(MINTER_ROLE, msg.sender)).
+GUARD_CALL_RE = re.compile(
+    r"^_?(check|only|require|ensure|assert|enforce)_?\w*(owner|admin|role|auth\w*|governance|operator)$"
+    r"|^_?(has_?role|is_?owner|is_?admin|is_?authori[sz]ed)$",
+    re.I,
+)
+_SENDER_COMPARISONS = ("==", "!=")
+
+_NAME_WORD_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+
+# Part of shared-cache keys for digests; bump whenever build_source_digest's output changes.
+DIGEST_VERSION = 2
+
+MAX_FUNCTIONS = 40
+MAX_SITES = 20
+MAX_CONTRACTS = 30
+
+_DIGEST_CACHE: SnapshotCache[dict[str, Any]] = SnapshotCache(max_entries=1024)
+
+
+def tokenize(source: str) -> list[tuple[str, str]]:
+    """(kind, text) tokens with comments dropped and string literals kept opaque."""
+    tokens: list[tuple[str, str]] = []
+    for match in _TOKEN_RE.finditer(source):
+        kind = match.lastgroup
+        if kind == "comment":
+            continue
+        tokens.append((kind or "op", match.group()))
+    return tokens
+
+
+def _matching(tokens: list[tuple[str, str]], start: int, open_char: str, close_char: str) -> int:
+    """Index of the token closing the bracket opened at ``start``, or the last index if unbalanced."""
+    depth = 0
+    for i in range(start, len(tokens)):
+        text = tokens[i][1]
+        if text == open_char:
+            depth += 1
+        elif text == close_char:
+            depth -= 1
+            if depth == 0:
+                return i
+    return len(tokens) - 1
+
+
+def name_words(name: str) -> str:
+    """Identifier split at case changes, digits and underscores, lowercased and space-joined."""
+    return " ".join(word.lower() for word in _NAME_WORD_RE.findall(name))
+
+
+def _category(name: str) -> str | None:
+    words = name_words(name)
+    for category, pattern in PRIVILEGED_CATEGORIES:
+        if pattern.search(words):
+            return category
+    return None
+
+
+def _sender_compared(tokens: list[tuple[str, str]], start: int, end: int, i: int) -> bool:
+    """Whether the msg.sender / _msgSender() ending at token ``i`` is one side of == or != (tx.origin aside)."""
+    first = i - 2  # both spellings are three tokens: msg . sender | _msgSender ( )
+    if i + 1 < end and tokens[i + 1][1] in _SENDER_COMPARISONS:
+        return not (i + 2 < end and tokens[i + 2][1] == "tx")
+    if first - 1 > start and tokens[first - 1][1] in _SENDER_COMPARISONS:
+        return not (first - 4 > start and tokens[first - 4][1] == "tx" and tokens[first - 2][1] == "origin")
+    return False
+
+
+def _body_sites(tokens: list[tuple[str, str]], start: int, end: int) -> dict[str, bool]:
+    sites = {
+        "delegatecall": False,
+        "selfdestruct": False,
+        "external_call": False,
+        "tx_origin": False,
+        "assembly": False,
+        "inline_guard": False,
+    }
+    for i in range(start, end):
+        text = tokens[i][1]
+        prev = tokens[i - 1][1] if i > start else ""
+        if text == "sender" and prev == "." and tokens[i - 2][1] == "msg":
+            sites["inline_guard"] = sites["inline_guard"] or _sender_compared(tokens, start, end, i)
+        elif text == ")" and prev == "(" and tokens[i - 2][1] == "_msgSender":
+            sites["inline_guard"] = sites["inline_guard"] or _sender_compared(tokens, start, end, i)
+        elif tokens[i][0] == "ident" and i + 1 < end and tokens[i + 1][1] == "(" and GUARD_CALL_RE.match(text):
+            sites["inline_guard"] = True
+        elif text in ("delegatecall", "callcode") and prev == ".":
+            sites["delegatecall"] = True
+        elif text in ("selfdestruct", "suicide"):
+            sites["selfdestruct"] = True
+        elif text in ("call", "send", "transfer") and prev == "." and tokens[i + 1][1] in ("(", "{"):
+            # address.call / .send / .transfer; token.transfer() also lands here and is an external call too.
+            sites["external_call"] = True
+        elif text == "origin" and prev == "." and tokens[i - 2][1] == "tx":
+            sites["tx_origin"] = True
+        elif text == "assembly":
+            sites["assembly"] = True
+            body_end = _matching(tokens, i + 1, "{", "}") if tokens[i + 1][1] == "{" else i
+            if any(tokens[j][1] == "delegatecall" for j in range(i, body_end)):
+                sites["delegatecall"] = True
+    return sites
+
+
+def _outline(tokens: list[tuple[str, str]]) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    contracts: list[dict[str, Any]] = []
+    functions: list[dict[str, Any]] = []
+    i, size = 0, len(tokens)
+    while i < size:
+        text = tokens[i][1]
+        if text in CONTRACT_KINDS and tokens[i][0] == "ident":
+            kind = text
+            j = i + 1
+            if kind == "abstract" and j < size and tokens[j][1] == "contract":
+                j += 1
+            if j < size and tokens[j][0] == "ident":
+                brace = j
+                while brace < size and tokens[brace][1] not in ("{", ";"):
+                    brace += 1
+                if brace < size and tokens[brace][1] == "{":
+                    end = _matching(tokens, brace, "{", "}")
+                    contract = {"name": tokens[j][1], "kind": kind, "start": brace, "end": end}
+                    contracts.append(contract)
+                    functions.extend(_members(tokens, contract))
+                    i = end + 1
+                    continue
+        i += 1
+    return contracts, functions
+
+
+def _members(tokens: list[tuple[str, str]], contract: dict[str, Any]) -> list[dict[str, Any]]:
+    members: list[dict[str, Any]] = []
+    i, end = contract["start"] + 1, contract["end"]
+    while i < end:
+        text = tokens[i][1]
+        if text not in ("function", "modifier", "constructor", "fallback", "receive") or tokens[i][0] != "ident":
+            if text == "{":
+                i = _matching(tokens, i, "{", "}") + 1
+                continue
+            i += 1
+            continue
+
+        kind = text
+        j = i + 1
+        name = kind
+        if kind in ("function", "modifier") and j < end and tokens[j][0] == "ident":
+            name = tokens[j][1]
+            j += 1
+        if j < end and tokens[j][1] == "(":
+            j = _matching(tokens, j, "(", ")") + 1
+
+        visibility, mutability, modifiers = None, None, []
+        while j < end and tokens[j][1] not in ("{", ";"):
+            word = tokens[j][1]
+            if word in VISIBILITIES:
+                visibility = word
+            elif word in MUTABILITIES:
+                mutability = word
+            elif word == "returns" and j + 1 < end and tokens[j + 1][1] == "(":
+                j = _matching(tokens, j + 1, "(", ")")
+            elif tokens[j][0] == "ident" and word not in ("virtual", "override"):
+                modifiers.append(word)
+            elif word == "(":
+                # Modifier arguments, e.g. onlyRole(MINTER_ROLE), or override(A, B) lists.
+                j = _matching(tokens, j, "(", ")")
+            j += 1
+
+        member = {
+            "contract": contract["name"],
+            "kind": kind,
+            "name": name,
+            "visibility": visibility,
+            "mutability": mutability,
+            "modifiers": modifiers,
+            "sites": {},
+        }
+        if j < end and tokens[j][1] == "{":
+            body_end = _matching(tokens, j, "{", "}")
+            member["sites"] = _body_sites(tokens, j, body_end)
+            j = body_end
+        members.append(member)
+        i = j + 1
+    return members
+
+
+def _label(member: dict[str, Any]) -> str:
+    return f"{member['contract']}.{member['name']}"
+
+
+def build_source_digest(source: str) -> dict[str, Any]:
+    tokens = tokenize(source)
+    contracts, members = _outline(tokens)
+    concrete = [c for c in contracts if c["kind"] in ("contract", "abstract")]
+    # Flattened files list dependencies first; the deployed contract is conventionally the last one.
+    main_contract = concrete[-1]["name"] if concrete else None
+    library_kinds = {c["name"] for c in contracts if c["kind"] in ("library", "interface")}
+
+    functions = [m for m in members if m["kind"] != "modifier" and m["contract"] not in library_kinds]
+    # Modifiers whose body checks the caller guard whatever they decorate, whatever they are called.
+    guard_modifiers = {
+        m["name"]
+        for m in members
+        if m["kind"] == "modifier" and (ACCESS_HINT_RE.search(m["name"]) or m["sites"].get("inline_guard"))
+    }
+    privileged: list[dict[str, Any]] = []
+    for member in functions:
+        if member["visibility"] not in ("public", "external") and member["name"] != "_authorizeUpgrade":
+            continue
+        category = _category(member["name"])
+        if category is None or member["mutability"] in ("view", "pure"):
+            continue
+        privileged.append(
+            {
+                "function": _label(member),
+                "category": category,
+                "modifiers": member["modifiers"],
+                "access_controlled": bool(member["sites"].get("inline_guard"))
+                or any(ACCESS_HINT_RE.search(name) or name in guard_modifiers for name in member["modifiers"]),
+            }
+        )
+    privileged.sort(key=lambda item: (not item["function"].startswith(f"{main_contract}."), item["function"]))
+
+    def sites(flag: str) -> list[str]:
+        return [_label(m) for m in members if m["sites"].get(flag)][:MAX_SITES]
+
+    modifier_names = sorted({m["name"] for m in members if m["kind"] == "modifier"})
+    pragma = re.search(r"pragma\s+solidity\s+([^;]+);", source)
+    return {
+        "source_hash": hashlib.sha256(source.encode()).hexdigest(),
+        "source_chars": len(source),
+        "pragma": pragma.group(1).strip() if pragma else None,
+        "main_contract": main_contract,
+        "contracts": [f"{c['kind']} {c['name']}" for c in contracts][:MAX_CONTRACTS],
+        "access_modifiers": [name for name in modifier_names if name in guard_modifiers],
+        "privileged_functions": privileged[:MAX_FUNCTIONS],
+        "unguarded_privileged_functions": [
+            item["function"] for item in privileged if not item["access_controlled"]
+        ][:MAX_SITES],
+        "delegatecall_sites": sites("delegatecall"),
+        "selfdestruct_sites": sites("selfdestruct"),
+        "external_call_sites": sites("external_call"),
+        "tx_origin_sites": sites("tx_origin"),
+        "assembly_sites": sites("assembly"),
+        "truncated": len(privileged) > MAX_FUNCTIONS or len(contracts) > MAX_CONTRACTS,
+    }
+
+
+def source_digest(source: str) -> dict[str, Any]:
+    """Bounded security outline of Solidity source, cached by source hash."""
+    key = hashlib.sha256(source.encode()).digest()
+    cached = _DIGEST_CACHE.get(key)
+    if cached is not None:
+        return cached
+    return _DIGEST_CACHE.put(
+        key, cpu_pool().run(build_source_digest, source, size=len(source), threshold=settings.cpu_offload_min_bytes)
+    )
@@ -0,0 +1,13 @@
+from .backends import MemoryBackend, RedisBackend, SQLiteBackend
+from .tiered import CacheNamespace, JsonCodec, ModelCodec, cache_namespace, cache_stats
+
+__all__ = [
+    "CacheNamespace",
+    "JsonCodec",
+    "MemoryBackend",
+    "ModelCodec",
+    "RedisBackend",
+    "SQLiteBackend",
+    "cache_namespace",
+    "cache_stats",
+]
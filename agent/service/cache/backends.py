@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+from urllib.parse import unquote, urlparse
+
+
+class MemoryBackend:
+    """Per-process LRU holding live objects (no serialization) with per-entry expiry."""
+
+    def __init__(self, max_entries: int = 4096) -> None:
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: Any, expires_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    """File-backed byte cache shared by every worker process on one host (WAL mode, one file).
+
+    A lock held longer than ``timeout_s`` surfaces as ``sqlite3.OperationalError``, which callers treat as a miss.
+    """
+
+    def __init__(self, path: str, timeout_s: float = 0.5) -> None:
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=timeout_s)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM cache WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def set(self, key: str, value: bytes, expires_at: float) -> None:
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO cache VALUES (?, ?, ?)", (key, value, expires_at))
+            self._writes += 1
+            if self._writes % 1024 == 0:
+                self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+
+class RedisError(RuntimeError):
+    pass
+
+
+class RedisBackend:
+    """Byte cache on any Redis-protocol server (Redis, Valkey, KeyDB, ...), shared across nodes.
+
+    Speaks RESP directly over one socket per process, so no client library is needed. Keys expire
+    server-side via ``SET ... PX``. Connection problems surface as ``OSError``/``RedisError`` and
+    make the tier refuse calls for a few seconds before reconnecting.
+    """
+
+    def __init__(self, url: str, timeout_s: float = 0.5) -> None:
+        parsed = urlparse(url)
+        if parsed.scheme not in ("redis", ""):
+            raise ValueError(f"Unsupported cache url {url!r}")
+        self._address = (parsed.hostname or "127.0.0.1", parsed.port or 6379)
+        self._password = unquote(parsed.password) if parsed.password else None
+        self._db = int(parsed.path.strip("/") or 0)
+        self._timeout_s = timeout_s
+        self._sock: socket.socket | None = None
+        self._reader: Any = None
+        self._down_until = 0.0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> None:
+        self._sock = socket.create_connection(self._address, timeout=self._timeout_s)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._sock.makefile("rb")
+        if self._password:
+            self._roundtrip(b"AUTH", self._password.encode())
+        if self._db:
+            self._roundtrip(b"SELECT", str(self._db).encode())
+
+    def _roundtrip(self, *parts: bytes) -> Any:
+        out = bytearray(b"*%d\r\n" % len(parts))
+        for part in parts:
+            out += b"$%d\r\n%s\r\n" % (len(part), part)
+        assert self._sock is not None
+        self._sock.sendall(out)
+        return self._read_reply()
+
+    def _read_reply(self) -> Any:
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body
+        if kind == b"-":
+            raise RedisError(body.decode(errors="replace"))
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            size = int(body)
+            if size < 0:
+                return None
+            data = self._reader.read(size + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(body)
+            return None if count < 0 else [self._read_reply() for _ in range(count)]
+        raise RedisError(f"Unexpected reply {line!r}")
+
+    def command(self, *parts: bytes) -> Any:
+        with self._lock:
+            if self._sock is None and time.monotonic() < self._down_until:
+                raise ConnectionError("Redis cache tier is backing off after a failure")
+            try:
+                if self._sock is None:
+                    self._connect()
+                return self._roundtrip(*parts)
+            except (OSError, RedisError):
+                self._close()
+                # Don't pay a connect timeout on every request while the server is away.
+                self._down_until = time.monotonic() + 5.0
+                raise
+
+    def _close(self) -> None:
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._reader = None
+
+    def get(self, key: str) -> bytes | None:
+        return self.command(b"GET", key.encode())
+
+    def set(self, key: str, value: bytes, expires_at: float) -> None:
+        ttl_ms = max(1, int((expires_at - time.time()) * 1000))
+        self.command(b"SET", key.encode(), value, b"PX", str(ttl_ms).encode())
+
+    def delete(self, key: str) -> None:
+        self.command(b"DEL", key.encode())
@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from concurrent.futures import Future
+from typing import Any, Callable, Generic, Protocol, TypeVar
+
+from pydantic import BaseModel
+
+from ..config import settings
+from ..model_scheduler import current_priority
+from .backends import MemoryBackend, RedisBackend, RedisError, SQLiteBackend
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+# Shared-tier record: format version, compressed flag, absolute expiry (unix seconds), then the payload.
+_HEADER = struct.Struct(">BBd")
+_FORMAT_VERSION = 1
+_COMPRESS_MIN_BYTES = 512
+# What a shared tier may raise for an unreachable server, a locked or corrupt SQLite file, and so on.
+_TIER_ERRORS = (OSError, RedisError, sqlite3.Error)
+
+
+class Codec(Protocol[T]):
+    def encode(self, value: T) -> bytes: ...
+
+    def decode(self, data: bytes) -> T: ...
+
+
+class ModelCodec(Generic[T]):
+    """Response models as their pydantic-core JSON bytes; decoding re-validates against the model."""
+
+    def __init__(self, model_type: type[BaseModel]) -> None:
+        self.model_type = model_type
+
+    def encode(self, value: T) -> bytes:
+        return self.model_type.__pydantic_serializer__.to_json(value)
+
+    def decode(self, data: bytes) -> T:
+        return self.model_type.model_validate_json(data)  # type: ignore[return-value]
+
+
+class JsonCodec:
+    def encode(self, value: Any) -> bytes:
+        return json.dumps(value, separators=(",", ":"), default=str).encode()
+
+    def decode(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+def pack_record(payload: bytes, expires_at: float) -> bytes:
+    compressed = len(payload) >= _COMPRESS_MIN_BYTES
+    return _HEADER.pack(_FORMAT_VERSION, compressed, expires_at) + (zlib.compress(payload, 1) if compressed else payload)
+
+
+def unpack_record(record: bytes) -> tuple[bytes, float] | None:
+    """(payload, expires_at), or None for records written by another format version."""
+    if len(record) < _HEADER.size:
+        return None
+    version, compressed, expires_at = _HEADER.unpack_from(record)
+    if version != _FORMAT_VERSION:
+        return None
+    payload = record[_HEADER.size :]
+    return (zlib.decompress(payload) if compressed else payload), expires_at
+
+
+class CacheNamespace(Generic[T]):
+    """One logical cache (``contract``, ``slippage``, ...) over an in-process tier and optional shared tiers.
+
+    Reads go through the tiers nearest first and copy a hit back into the nearer tiers with its
+    remaining TTL (read-through); builds and ``set`` write to every tier (write-through). The
+    in-process tier holds live objects; shared tiers hold ``codec`` bytes. A failing shared tier is
+    treated as a miss, never as a request error.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl_s: float,
+        codec: Codec[T],
+        memory: MemoryBackend | None = None,
+        shared: list[Any] | None = None,
+    ) -> None:
+        self.name = name
+        self.ttl_s = ttl_s
+        self.codec = codec
+        self.memory = memory or MemoryBackend(settings.cache_memory_max_entries)
+        self._shared = shared
+        self._building: dict[str, Future] = {}
+        self._building_priority: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "shared_hits": 0, "misses": 0, "errors": 0}
+
+    @property
+    def shared(self) -> list[Any]:
+        """Shared tiers: the ones given, else this process's connections to the configured tiers."""
+        return self._shared if self._shared is not None else _shared_tiers()
+
+    def _key(self, key: str) -> str:
+        return f"lw:{self.name}:{key}"
+
+    def get(self, key: str) -> T | None:
+        value = self.memory.get(key)
+        if value is not None:
+            self.stats["hits"] += 1
+            return value
+        full_key = self._key(key)
+        shared = self.shared
+        for index, tier in enumerate(shared):
+            try:
+                record = tier.get(full_key)
+                unpacked = unpack_record(record) if record is not None else None
+                if unpacked is None or unpacked[1] <= time.time():
+                    continue
+                value = self.codec.decode(unpacked[0])
+            except (*_TIER_ERRORS, ValueError, zlib.error) as exc:
+                self._tier_failed(tier, exc)
+                continue
+            for nearer in shared[:index]:
+                self._write(nearer, full_key, record, unpacked[1])
+            self.memory.set(key, value, unpacked[1])
+            self.stats["shared_hits"] += 1
+            return value
+        self.stats["misses"] += 1
+        return None
+
+    def set(self, key: str, value: T) -> None:
+        expires_at = time.time() + self.ttl_s
+        self.memory.set(key, value, expires_at)
+        shared = self.shared
+        if shared:
+            record = pack_record(self.codec.encode(value), expires_at)
+            full_key = self._key(key)
+            for tier in shared:
+                self._write(tier, full_key, record, expires_at)
+
+    def get_or_build(self, key: str, builder: Callable[[], T]) -> T:
+        """Cached value for ``key``; on a miss in every tier, concurrent callers here share one build.
+
+        An interactive caller never waits on a build started under background priority, whose model
+        calls queue behind every interactive one: it builds the value itself and replaces the
+        pending build as the one later callers share.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        priority = current_priority()
+        with self._lock:
+            pending = self._building.get(key)
+            owner = pending is None or (priority == "interactive" and self._building_priority.get(key) == "background")
+            if owner:
+                pending = self._building[key] = Future()
+                self._building_priority[key] = priority
+        if not owner:
+            return pending.result()
+        try:
+            value = builder()
+            self.set(key, value)
+        except BaseException as exc:
+            pending.set_exception(exc)
+            raise
+        else:
+            pending.set_result(value)
+        finally:
+            with self._lock:
+                # A promoted build may have replaced ours; leave its entry alone.
+                if self._building.get(key) is pending:
+                    del self._building[key]
+                    self._building_priority.pop(key, None)
+        return value
+
+    def delete(self, key: str) -> None:
+        self.memory.delete(key)
+        for tier in self.shared:
+            try:
+                tier.delete(self._key(key))
+            except _TIER_ERRORS as exc:
+                self._tier_failed(tier, exc)
+
+    def _write(self, tier: Any, full_key: str, record: bytes, expires_at: float) -> None:
+        try:
+            tier.set(full_key, record, expires_at)
+        except _TIER_ERRORS as exc:
+            self._tier_failed(tier, exc)
+
+    def _tier_failed(self, tier: Any, exc: Exception) -> None:
+        self.stats["errors"] += 1
+        logger.debug("cache tier %s failed for namespace %s: %s", type(tier).__name__, self.name, exc)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {"ttl_s": self.ttl_s, "entries": len(self.memory), "tiers": self.tier_names(), **self.stats}
+
+    def tier_names(self) -> list[str]:
+        return ["memory"] + [type(tier).__name__.removesuffix("Backend").lower() for tier in self.shared]
+
+
+_SHARED_TIERS: list[Any] | None = None
+_TIERS_LOCK = threading.Lock()
+
+
+def _forget_shared_tiers() -> None:
+    # SQLite handles and sockets must not be shared with a forked worker; it opens its own.
+    global _SHARED_TIERS
+    _SHARED_TIERS = None
+
+
+os.register_at_fork(after_in_child=_forget_shared_tiers)
+
+_NAMESPACES: dict[str, CacheNamespace[Any]] = {}
+_NAMESPACES_LOCK = threading.Lock()
+
+
+def _shared_tiers() -> list[Any]:
+    global _SHARED_TIERS
+    with _TIERS_LOCK:
+        if _SHARED_TIERS is None:
+            tiers: list[Any] = []
+            if settings.cache_sqlite_path:
+                try:
+                    tiers.append(SQLiteBackend(settings.cache_sqlite_path))
+                except (OSError, sqlite3.Error) as exc:
+                    logger.warning("SQLite cache tier %s unavailable: %s", settings.cache_sqlite_path, exc)
+            if settings.cache_redis_url:
+                tiers.append(RedisBackend(settings.cache_redis_url, settings.cache_redis_timeout_s))
+            _SHARED_TIERS = tiers
+        return _SHARED_TIERS
+
+
+def namespace_ttl_s(name: str) -> float:
+    return {
+        "contract": settings.cache_ttl_contract_s,
+        "contract-code": settings.cache_ttl_contract_s,
+        "slippage": settings.cache_ttl_slippage_s,
+        "phishing-index": settings.cache_ttl_phishing_index_s,
+        "history-chunks": settings.cache_ttl_history_chunks_s,
+    }.get(name, settings.cache_ttl_default_s)
+
+
+def cache_namespace(name: str, codec: Codec[Any] | None = None) -> CacheNamespace[Any]:
+    """Process-wide namespace ``name`` over the configured tiers (CACHE_SQLITE_PATH, CACHE_REDIS_URL)."""
+    with _NAMESPACES_LOCK:
+        namespace = _NAMESPACES.get(name)
+        if namespace is None:
+            namespace = _NAMESPACES[name] = CacheNamespace(
+                name, namespace_ttl_s(name), codec or JsonCodec()
+            )
+        return namespace
+
+
+def cache_stats() -> dict[str, Any]:
+    with _NAMESPACES_LOCK:
+        return {name: namespace.snapshot() for name, namespace in _NAMESPACES.items()}
+
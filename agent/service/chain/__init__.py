@@ -0,0 +1,13 @@
+from .contracts import ContractProfileFetcher
+from .fetcher import BlockCachedFetcher
+from .reserves import GET_RESERVES_SELECTOR, ReserveFetcher
+from .rpc import JsonRpcClient, JsonRpcError
+
+__all__ = [
+    "BlockCachedFetcher",
+    "ContractProfileFetcher",
+    "GET_RESERVES_SELECTOR",
+    "JsonRpcClient",
+    "JsonRpcError",
+    "ReserveFetcher",
+]
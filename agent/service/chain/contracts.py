@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from typing import Any, Callable
+
+from ..config import settings
+from .fetcher import BlockCachedFetcher, Call
+from .rpc import JsonRpcClient, JsonRpcError, decode_words
+
+# EIP-1967 slots: keccak256("eip1967.proxy.implementation") - 1 and keccak256("eip1967.proxy.admin") - 1.
+EIP1967_IMPLEMENTATION_SLOT = "0x360894a13ba1a3210667c828492db98dca3e2076cc3735a920a3ca505d382bbc"
+EIP1967_ADMIN_SLOT = "0xb53127684a568b3173ae13b9f8a6016e243e63b6e8ee1178d6a717850b5d6103"
+# keccak256("owner()")[:4]
+OWNER_SELECTOR = "0x8da5cb5b"
+
+
+def _address_word(value: Any) -> str | None:
+    """Address held in the low 20 bytes of a 32-byte word; None for an empty or failed read."""
+    if isinstance(value, JsonRpcError):
+        return None
+    try:
+        words = decode_words(value)
+    except JsonRpcError:
+        return None
+    if not words or words[0] >> 160:
+        return None
+    return "0x" + f"{words[0]:040x}"
+
+
+class ContractProfileFetcher(BlockCachedFetcher):
+    """Runtime code, EIP-1967 implementation/admin slots and ``owner()`` of a contract in one batch.
+
+    Profiles are cached per (chain, address, block number) like reserves. A failed ``eth_getCode``
+    fails the profile; a failed slot read or a reverting ``owner()`` only leaves that field empty.
+    """
+
+    def __init__(
+        self,
+        ttl_s: float | None = None,
+        client_factory: Callable[[str], JsonRpcClient] | None = None,
+        max_entries: int = 4096,
+    ) -> None:
+        super().__init__(
+            settings.contract_profile_ttl_s if ttl_s is None else ttl_s,
+            client_factory=client_factory,
+            max_entries=max_entries,
+        )
+
+    def _calls(self, key: str) -> list[Call]:
+        return [
+            ("eth_getCode", [key, "latest"]),
+            ("eth_getStorageAt", [key, EIP1967_IMPLEMENTATION_SLOT, "latest"]),
+            ("eth_getStorageAt", [key, EIP1967_ADMIN_SLOT, "latest"]),
+            ("eth_call", [{"to": key, "data": OWNER_SELECTOR}, "latest"]),
+        ]
+
+    def _decode(self, key: str, responses: list[Any], block_number: int) -> dict[str, Any]:
+        code, implementation, admin, owner = responses
+        if isinstance(code, JsonRpcError):
+            raise code
+        if not isinstance(code, str) or not code.startswith("0x"):
+            raise JsonRpcError(f"Expected hex code, got {code!r}")
+        implementation_address = _address_word(implementation)
+        admin_address = _address_word(admin)
+        zero = "0x" + "0" * 40
+        return {
+            "block_number": block_number,
+            "bytecode": code if len(code) > 2 else None,
+            "implementation_address": None if implementation_address == zero else implementation_address,
+            "admin_address": None if admin_address == zero else admin_address,
+            # A zero owner is meaningful (renounced), so it is kept.
+            "owner": _address_word(owner) if len(code) > 2 else None,
+        }
+
+    def get_profile(self, chain: str, address: str) -> dict[str, Any]:
+        return self._get_many(chain, [address])[address.lower()]
+
+    def profile_at(self, chain: str, address: str, block_number: int) -> dict[str, Any] | None:
+        return self._snapshot_at(chain, address, block_number)
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Sequence
+
+from ..config import settings
+from .rpc import JsonRpcClient, JsonRpcError, hex_to_int
+
+Call = tuple[str, list[Any]]
+
+
+class BlockCachedFetcher:
+    """Base for on-chain reads that resolve many keys with one batched JSON-RPC request.
+
+    Each refresh sends ``eth_blockNumber`` followed by the calls of every requested key in a single
+    batch. Snapshots are stored under (chain, key, block number) and a per-key pointer to the latest
+    snapshot is trusted for ``ttl_s`` seconds. Concurrent callers asking for a key that is already
+    being fetched wait on the same in-flight future instead of issuing their own request.
+    ``on_snapshot`` is called with (chain, key, snapshot) for every freshly fetched snapshot.
+
+    Subclasses implement ``_calls`` (the JSON-RPC calls for one key) and ``_decode`` (their
+    responses, in call order, into a snapshot; raise to fail only that key).
+    """
+
+    def __init__(
+        self,
+        ttl_s: float,
+        client_factory: Callable[[str], JsonRpcClient] | None = None,
+        max_entries: int = 4096,
+        on_snapshot: Callable[[str, str, dict[str, Any]], None] | None = None,
+    ) -> None:
+        self._ttl_s = ttl_s
+        self._client_factory = client_factory or (
+            lambda url: JsonRpcClient(url, settings.rpc_timeout_s, settings.rpc_max_connections)
+        )
+        self._max_entries = max_entries
+        self._on_snapshot = on_snapshot
+        self._clients: dict[str, JsonRpcClient] = {}
+        self._snapshots: OrderedDict[tuple[str, str, int], dict[str, Any]] = OrderedDict()
+        self._latest: dict[tuple[str, str], tuple[float, tuple[str, str, int]]] = {}
+        self._inflight: dict[tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+
+    def _calls(self, key: str) -> list[Call]:
+        raise NotImplementedError
+
+    def _decode(self, key: str, responses: list[Any], block_number: int) -> dict[str, Any]:
+        raise NotImplementedError
+
+    def _client_for(self, chain: str) -> JsonRpcClient:
+        url = settings.rpc_url_for(chain)
+        if not url:
+            raise JsonRpcError(f"No RPC url configured for chain {chain!r}")
+        with self._lock:
+            client = self._clients.get(url)
+            if client is None:
+                client = self._client_factory(url)
+                self._clients[url] = client
+            return client
+
+    def _get_many(self, chain: str, keys: Sequence[str]) -> dict[str, dict[str, Any]]:
+        chain = chain.lower()
+        wanted = list(dict.fromkeys(key.lower() for key in keys))
+        results: dict[str, dict[str, Any]] = {}
+        waiting: dict[str, Future] = {}
+        owned: dict[str, Future] = {}
+        now = time.monotonic()
+
+        with self._lock:
+            for key in wanted:
+                latest = self._latest.get((chain, key))
+                if latest is not None and latest[0] > now and latest[1] in self._snapshots:
+                    results[key] = self._snapshots[latest[1]]
+                    continue
+                future = self._inflight.get((chain, key))
+                if future is None:
+                    future = Future()
+                    self._inflight[(chain, key)] = future
+                    owned[key] = future
+                else:
+                    waiting[key] = future
+
+        if owned:
+            self._fetch(chain, owned)
+        for key, future in {**owned, **waiting}.items():
+            results[key] = future.result()
+        return results
+
+    def _fetch(self, chain: str, owned: dict[str, Future]) -> None:
+        keys = list(owned)
+        per_key = [self._calls(key) for key in keys]
+        try:
+            client = self._client_for(chain)
+            calls: list[Call] = [("eth_blockNumber", [])]
+            for key_calls in per_key:
+                calls.extend(key_calls)
+            responses = client.batch(calls)
+            if isinstance(responses[0], JsonRpcError):
+                raise responses[0]
+            block_number = hex_to_int(responses[0])
+        except Exception as exc:
+            self._fail(chain, owned, exc)
+            return
+
+        expires_at = time.monotonic() + self._ttl_s
+        offset = 1
+        for key, key_calls in zip(keys, per_key):
+            future = owned[key]
+            key_responses = responses[offset : offset + len(key_calls)]
+            offset += len(key_calls)
+            try:
+                snapshot = self._decode(key, key_responses, block_number)
+            except Exception as exc:
+                self._fail(chain, {key: future}, exc)
+                continue
+
+            cache_key = (chain, key, block_number)
+            with self._lock:
+                self._snapshots[cache_key] = snapshot
+                self._snapshots.move_to_end(cache_key)
+                while len(self._snapshots) > self._max_entries:
+                    self._snapshots.popitem(last=False)
+                self._latest[(chain, key)] = (expires_at, cache_key)
+                self._inflight.pop((chain, key), None)
+            future.set_result(snapshot)
+            if self._on_snapshot is not None:
+                try:
+                    self._on_snapshot(chain, key, snapshot)
+                except Exception:
+                    pass
+
+    def _fail(self, chain: str, owned: dict[str, Future], exc: Exception) -> None:
+        with self._lock:
+            for key in owned:
+                self._inflight.pop((chain, key), None)
+        for future in owned.values():
+            future.set_exception(exc)
+
+    def _snapshot_at(self, chain: str, key: str, block_number: int) -> dict[str, Any] | None:
+        with self._lock:
+            return self._snapshots.get((chain.lower(), key.lower(), block_number))
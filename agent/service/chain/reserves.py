@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Sequence
+
+from ..config import settings
+from .fetcher import BlockCachedFetcher, Call
+from .rpc import JsonRpcClient, JsonRpcError, decode_words
+
+# keccak256("getReserves()")[:4]; eGoldAMM returns (uint256, uint256), Uniswap-v2 pairs add a uint32 timestamp.
+GET_RESERVES_SELECTOR = "0x0902f1ac"
+
+
+class ReserveFetcher(BlockCachedFetcher):
+    """Fetches pool reserves via getReserves() with one batched JSON-RPC request per refresh.
+
+    Snapshots are cached per (chain, pool, block number); see ``BlockCachedFetcher`` for the TTL,
+    in-flight sharing and ``on_snapshot`` semantics.
+    """
+
+    def __init__(
+        self,
+        ttl_s: float | None = None,
+        client_factory: Callable[[str], JsonRpcClient] | None = None,
+        max_entries: int = 4096,
+        on_snapshot: Callable[[str, str, dict[str, Any]], None] | None = None,
+    ) -> None:
+        super().__init__(
+            settings.reserve_cache_ttl_s if ttl_s is None else ttl_s,
+            client_factory=client_factory,
+            max_entries=max_entries,
+            on_snapshot=on_snapshot,
+        )
+
+    def _calls(self, key: str) -> list[Call]:
+        return [("eth_call", [{"to": key, "data": GET_RESERVES_SELECTOR}, "latest"])]
+
+    def _decode(self, key: str, responses: list[Any], block_number: int) -> dict[str, Any]:
+        response = responses[0]
+        if isinstance(response, JsonRpcError):
+            raise response
+        words = decode_words(response)
+        if len(words) < 2:
+            raise JsonRpcError("getReserves() returned too little data")
+        return {"reserve0": words[0], "reserve1": words[1], "block_number": block_number}
+
+    def get_reserves(self, chain: str, pool_address: str) -> dict[str, Any]:
+        return self.get_many(chain, [pool_address])[pool_address.lower()]
+
+    def get_many(self, chain: str, pool_addresses: Sequence[str]) -> dict[str, dict[str, Any]]:
+        return self._get_many(chain, pool_addresses)
+
+    def snapshot_at(self, chain: str, pool_address: str, block_number: int) -> dict[str, Any] | None:
+        return self._snapshot_at(chain, pool_address, block_number)
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import itertools
+import threading
+from typing import Any, Sequence
+
+import httpx
+
+
+class JsonRpcError(RuntimeError):
+    def __init__(self, message: str, code: int | None = None) -> None:
+        super().__init__(message)
+        self.code = code
+
+
+class JsonRpcClient:
+    """Minimal JSON-RPC 2.0 client over one pooled keep-alive HTTP connection set.
+
+    ``batch`` sends every call in a single HTTP request and returns results in call order;
+    a failed entry is returned as a ``JsonRpcError`` instance instead of raising, so one bad
+    call does not discard the rest of the batch.
+    """
+
+    def __init__(self, url: str, timeout_s: float = 3.0, max_connections: int = 8) -> None:
+        if not url:
+            raise ValueError("RPC url is not configured")
+        self.url = url
+        self._client = httpx.Client(
+            timeout=timeout_s,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        self._ids = itertools.count(1)
+        # Guards the id counter and request_count: callers share one client across threads.
+        self._lock = threading.Lock()
+        self.request_count = 0
+
+    def _next_id(self) -> int:
+        with self._lock:
+            return next(self._ids)
+
+    def _post(self, body: Any) -> Any:
+        with self._lock:
+            self.request_count += 1
+        try:
+            response = self._client.post(self.url, json=body)
+            response.raise_for_status()
+            return response.json()
+        except (httpx.HTTPError, ValueError) as exc:
+            raise JsonRpcError(f"RPC transport failed: {exc}") from exc
+
+    @staticmethod
+    def _unwrap(entry: Any) -> Any:
+        if not isinstance(entry, dict):
+            return JsonRpcError("Malformed RPC response entry")
+        error = entry.get("error")
+        if error:
+            if isinstance(error, dict):
+                return JsonRpcError(str(error.get("message") or error), error.get("code"))
+            return JsonRpcError(str(error))
+        return entry.get("result")
+
+    def call(self, method: str, params: Sequence[Any] | None = None) -> Any:
+        body = {"jsonrpc": "2.0", "id": self._next_id(), "method": method, "params": list(params or [])}
+        result = self._unwrap(self._post(body))
+        if isinstance(result, JsonRpcError):
+            raise result
+        return result
+
+    def batch(self, calls: Sequence[tuple[str, Sequence[Any]]]) -> list[Any]:
+        if not calls:
+            return []
+        ids = [self._next_id() for _ in calls]
+        body = [
+            {"jsonrpc": "2.0", "id": call_id, "method": method, "params": list(params)}
+            for call_id, (method, params) in zip(ids, calls)
+        ]
+        payload = self._post(body)
+        if isinstance(payload, dict):
+            # Some nodes answer a rejected batch with one error object.
+            error = self._unwrap(payload)
+            raise error if isinstance(error, JsonRpcError) else JsonRpcError("RPC batch was not answered as a list")
+        if not isinstance(payload, list):
+            raise JsonRpcError("RPC batch was not answered as a list")
+
+        by_id = {entry.get("id"): entry for entry in payload if isinstance(entry, dict)}
+        return [
+            self._unwrap(by_id[call_id]) if call_id in by_id else JsonRpcError("Missing RPC batch entry")
+            for call_id in ids
+        ]
+
+    def close(self) -> None:
+        self._client.close()
+
+
+def hex_to_int(value: Any) -> int:
+    if not isinstance(value, str) or not value.startswith("0x"):
+        raise JsonRpcError(f"Expected hex quantity, got {value!r}")
+    return int(value, 16) if len(value) > 2 else 0
+
+
+def decode_words(data: Any) -> list[int]:
+    """Split ABI-encoded return data into 32-byte unsigned words."""
+    if not isinstance(data, str) or not data.startswith("0x"):
+        raise JsonRpcError(f"Expected hex data, got {data!r}")
+    body = data[2:]
+    return [int(body[i : i + 64], 16) for i in range(0, len(body) - len(body) % 64, 64)]
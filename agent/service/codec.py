@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import json
+import sys
+import time
+from typing import Any, TypeVar
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - the stdlib codec is correct, just slower
+    orjson = None
+
+from .models import (
+    ContractRiskRequest,
+    HistoryChunkUploadRequest,
+    PhishingRiskRequest,
+    PhishingRiskResponse,
+    SlippageRiskRequest,
+)
+
+M = TypeVar("M", bound=BaseModel)
+
+# Built once at import, so no request pays for schema compilation.
+_ADAPTERS: dict[type, TypeAdapter] = {
+    model: TypeAdapter(model)
+    for model in (ContractRiskRequest, HistoryChunkUploadRequest, PhishingRiskRequest, SlippageRiskRequest)
+}
+
+
+def loads(data: bytes | str) -> Any:
+    """Parse JSON; raises ValueError (orjson.JSONDecodeError / json.JSONDecodeError) on bad input."""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def adapter(model_type: type[M]) -> TypeAdapter:
+    found = _ADAPTERS.get(model_type)
+    if found is None:
+        found = _ADAPTERS[model_type] = TypeAdapter(model_type)
+    return found
+
+
+def decode(model_type: type[M], body: bytes) -> M:
+    """Validate a request body against ``model_type``; raises ValueError or pydantic.ValidationError."""
+    # orjson + validate_python beats pydantic's own validate_json on the large transaction lists.
+    return adapter(model_type).validate_python(loads(body))
+
+
+def encode(value: BaseModel) -> bytes:
+    """Model straight to JSON bytes through its pydantic-core serializer; no dict or jsonable_encoder pass."""
+    return type(value).__pydantic_serializer__.to_json(value)
+
+
+class ModelResponse(Response):
+    """JSON response for an already-validated model: serialized once, never re-validated."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return encode(content)
+        return content if isinstance(content, bytes) else dumps(content)
+
+
+def openapi_body(model_type: type[BaseModel]) -> dict[str, Any]:
+    """``openapi_extra`` for a route that reads its body itself; pair with ``register_schemas``."""
+    ref = {"$ref": f"#/components/schemas/{model_type.__name__}"}
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": ref}}}}
+
+
+def register_schemas(openapi: dict[str, Any], models: list[type[BaseModel]]) -> dict[str, Any]:
+    schemas = openapi.setdefault("components", {}).setdefault("schemas", {})
+    for model in models:
+        schema = model.model_json_schema(ref_template="#/components/schemas/{model}")
+        for name, definition in schema.pop("$defs", {}).items():
+            schemas.setdefault(name, definition)
+        schemas.setdefault(model.__name__, schema)
+    return openapi
+
+
+def _benchmark(transactions: int = 5000, rounds: int = 20) -> dict[str, float]:
+    """Per-request codec time (ms) for a phishing request/response with ``transactions`` history entries.
+
+    "before" is FastAPI's default path: stdlib JSON decode and validation on the way in; response
+    re-validation, conversion to Python objects and stdlib JSON encode on the way out.
+    """
+    history = [
+        {
+            "tx_hash": f"0x{i:064x}",
+            "timestamp": 1_700_000_000 + i,
+            "from_address": f"0x{i:040x}",
+            "to_address": f"0x{i * 7:040x}",
+            "value": str(i * 10**15),
+            "tx_type": "transfer",
+            "method_sig": "0xa9059cbb",
+            "success": True,
+        }
+        for i in range(transactions)
+    ]
+    body = json.dumps({"address": "0x" + "1" * 40, "chain": "monad", "transactions": history}).encode()
+    response = PhishingRiskResponse(
+        risk_level="low",
+        summary="benchmark",
+        confidence=0.5,
+        most_similar_address=history[0]["from_address"],
+        most_similar_similarity=0.5,
+        most_similar_transactions=history[:3],
+    )
+    request_field = TypeAdapter(PhishingRiskRequest)
+    response_field = TypeAdapter(PhishingRiskResponse)
+
+    def before() -> None:
+        request_field.validate_python(json.loads(body))
+        content = response_field.dump_python(response_field.validate_python(response), mode="json")
+        json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+    def after() -> None:
+        decode(PhishingRiskRequest, body)
+        encode(response)
+
+    timings = {}
+    for name, run in (("before", before), ("after", after)):
+        run()
+        started = time.perf_counter()
+        for _ in range(rounds):
+            run()
+        timings[name] = (time.perf_counter() - started) / rounds * 1000
+    return {"transactions": transactions, "body_bytes": len(body), **{f"{k}_ms": round(v, 2) for k, v in timings.items()}}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "bench":
+        for size in [int(arg) for arg in sys.argv[2:]] or [100, 1000, 5000]:
+            print(json.dumps(_benchmark(size)))
+    else:
+        print("usage: python -m service.codec bench [transactions ...]", file=sys.stderr)
+        sys.exit(2)
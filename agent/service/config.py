@@ -25,6 +25,66 @@ class Settings:
         self.model_name = env("MODEL_NAME", "")
         self.model_api_key = env("MODEL_API_KEY", "")
         self.request_timeout_s = int(env("REQUEST_TIMEOUT_S", "12"))
+        self.http_host = env("HTTP_HOST", "0.0.0.0")
+        self.http_port = int(env("HTTP_PORT", "8000"))
+        self.http_workers = int(env("HTTP_WORKERS", "1"))
+        self.http_graceful_timeout_s = float(env("HTTP_GRACEFUL_TIMEOUT_S", "30"))
+        self.http_worker_timeout_s = float(env("HTTP_WORKER_TIMEOUT_S", "30"))
+        # Index of this serving process; the supervisor sets it in each forked worker.
+        self.worker_id = 0
+        self.model_max_inflight = int(env("MODEL_MAX_INFLIGHT", "8"))
+        self.model_interactive_max_inflight = int(env("MODEL_INTERACTIVE_MAX_INFLIGHT", "0"))
+        self.model_background_max_inflight = int(env("MODEL_BACKGROUND_MAX_INFLIGHT", "2"))
+        self.shed_queue_high = int(env("SHED_QUEUE_HIGH", "16"))
+        self.shed_queue_low = int(env("SHED_QUEUE_LOW", "4"))
+        self.shed_wait_high_ms = float(env("SHED_WAIT_HIGH_MS", "3000"))
+        self.shed_wait_low_ms = float(env("SHED_WAIT_LOW_MS", "500"))
+        self.cpu_pool_workers = int(env("CPU_POOL_WORKERS", "2"))
+        self.cpu_pool_max_pending = int(env("CPU_POOL_MAX_PENDING", "32"))
+        self.cpu_task_timeout_s = float(env("CPU_TASK_TIMEOUT_S", "10"))
+        self.cpu_offload_min_bytes = int(env("CPU_OFFLOAD_MIN_BYTES", "8192"))
+        self.cpu_offload_min_candidates = int(env("CPU_OFFLOAD_MIN_CANDIDATES", "200"))
+        self.rpc_url = env("RPC_URL", "")
+        self.rpc_timeout_s = float(env("RPC_TIMEOUT_S", "3"))
+        self.rpc_max_connections = int(env("RPC_MAX_CONNECTIONS", "8"))
+        self.reserve_cache_ttl_s = float(env("RESERVE_CACHE_TTL_S", "2"))
+        self.contract_profile_ttl_s = float(env("CONTRACT_PROFILE_TTL_S", "12"))
+        self.reserve_history_size = int(env("RESERVE_HISTORY_SIZE", "64"))
+        self.reserve_history_max_pools = int(env("RESERVE_HISTORY_MAX_POOLS", "2048"))
+        self.prescore_top_k = int(env("PRESCORE_TOP_K", "5"))
+        self.prescore_workers = int(env("PRESCORE_WORKERS", "2"))
+        self.prescore_queue_size = int(env("PRESCORE_QUEUE_SIZE", "256"))
+        self.prescore_ttl_s = float(env("PRESCORE_TTL_S", "600"))
+        self.prescore_interaction_type = env("PRESCORE_INTERACTION_TYPE", "approve")
+        self.job_store_path = env("JOB_STORE_PATH", "")
+        self.job_ttl_s = float(env("JOB_TTL_S", "3600"))
+        self.job_workers = int(env("JOB_WORKERS", "4"))
+        self.job_max_wait_s = float(env("JOB_MAX_WAIT_S", "30"))
+        self.job_lease_s = float(env("JOB_LEASE_S", "30"))
+        self.job_poll_interval_s = float(env("JOB_POLL_INTERVAL_S", "0.5"))
+        self.cache_memory_max_entries = int(env("CACHE_MEMORY_MAX_ENTRIES", "4096"))
+        self.cache_sqlite_path = env("CACHE_SQLITE_PATH", "")
+        self.cache_redis_url = env("CACHE_REDIS_URL", "")
+        self.cache_redis_timeout_s = float(env("CACHE_REDIS_TIMEOUT_S", "0.5"))
+        self.cache_ttl_default_s = float(env("CACHE_TTL_DEFAULT_S", "300"))
+        self.cache_ttl_contract_s = float(env("CACHE_TTL_CONTRACT_S", "3600"))
+        self.cache_ttl_slippage_s = float(env("CACHE_TTL_SLIPPAGE_S", "10"))
+        self.cache_ttl_phishing_index_s = float(env("CACHE_TTL_PHISHING_INDEX_S", "300"))
+        self.cache_ttl_history_chunks_s = float(env("CACHE_TTL_HISTORY_CHUNKS_S", "604800"))
+        self.clone_index_dir = env("CLONE_INDEX_DIR", "")
+        self.admin_token = env("ADMIN_TOKEN", "")
+        self.selector_db_path = env("SELECTOR_DB_PATH", "")
+        self.blocklist_path = env("BLOCKLIST_PATH", "")
+        self.blocklist_check_interval_s = float(env("BLOCKLIST_CHECK_INTERVAL_S", "5"))
+        self.contract_scoring_config = env("CONTRACT_SCORING_CONFIG", "")
+
+    def rpc_url_for(self, chain: str | None) -> str:
+        """Per-chain override via RPC_URL_<CHAIN>, falling back to RPC_URL."""
+        if chain:
+            override = env(f"RPC_URL_{chain.strip().upper()}")
+            if override:
+                return override
+        return self.rpc_url or ""
 
 
 settings = Settings()
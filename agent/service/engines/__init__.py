@@ -0,0 +1,25 @@
+from .amm import (
+    EGOLD_AMM_FEE_BPS,
+    format_units,
+    get_amount_out,
+    parse_units,
+    quote_exact_in,
+)
+from .curve import build_slippage_curve, max_trade_for_slippage, slippage_curve
+from .mev import build_mev_batch, estimate_sandwich
+from .routing import build_route, optimal_split
+
+__all__ = [
+    "EGOLD_AMM_FEE_BPS",
+    "build_mev_batch",
+    "build_route",
+    "build_slippage_curve",
+    "estimate_sandwich",
+    "format_units",
+    "get_amount_out",
+    "max_trade_for_slippage",
+    "optimal_split",
+    "parse_units",
+    "quote_exact_in",
+    "slippage_curve",
+]
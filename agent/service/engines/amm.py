@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from decimal import Decimal, InvalidOperation
+from typing import Any
+
+# Mirrors contracts/dex/eGoldAMM.sol: FEE_BPS = 30, applied as amountIn * 997 / 1000.
+EGOLD_AMM_FEE_BPS = 30
+BPS_DENOMINATOR = 10_000
+DEFAULT_TOKEN_DECIMALS = 18
+
+# Base-unit amounts are uint256 on chain; anything wider than 78 digits is not a real amount.
+MAX_UNITS = 2**256 - 1
+_MAX_UNIT_DIGITS = len(str(MAX_UNITS))
+
+
+def parse_units(value: Any, decimals: int = DEFAULT_TOKEN_DECIMALS) -> int | None:
+    """Convert a human-readable amount into integer base units (wei), truncating extra digits.
+
+    Accepts plain and exponent notation ("1.5", "1e-6", 2.5e-7); negative, non-finite and
+    beyond-uint256 amounts give None.
+    """
+    if value is None or isinstance(value, bool) or decimals < 0:
+        return None
+    if isinstance(value, int):
+        if value < 0 or value > MAX_UNITS or decimals >= _MAX_UNIT_DIGITS:
+            return None if value else 0
+        units = value * 10**decimals
+        return units if units <= MAX_UNITS else None
+    # str() of a float is its shortest round-tripping form, so 0.1 parses as 0.1, not 0.1000000000000000055.
+    text = str(value).strip().replace("_", "")
+    try:
+        amount = Decimal(text)
+    except InvalidOperation:
+        return None
+    if not amount.is_finite() or amount.is_signed():
+        return None
+
+    # Scale with integer arithmetic on the digits: exact at any size, unlike Decimal's 28-digit context.
+    _, digits, exponent = amount.as_tuple()
+    coefficient = int("".join(map(str, digits)))
+    shift = exponent + decimals
+    if coefficient == 0 or shift < -len(digits):
+        return 0
+    if len(digits) + shift > _MAX_UNIT_DIGITS:
+        return None
+    units = coefficient * 10**shift if shift >= 0 else coefficient // 10**-shift
+    return units if units <= MAX_UNITS else None
+
+
+def format_units(value: int, decimals: int = DEFAULT_TOKEN_DECIMALS) -> str:
+    sign = "-" if value < 0 else ""
+    whole, frac = divmod(abs(value), 10**decimals)
+    frac_text = str(frac).rjust(decimals, "0").rstrip("0") if decimals > 0 else ""
+    return f"{sign}{whole}.{frac_text}" if frac_text else f"{sign}{whole}"
+
+
+def get_amount_out(
+    amount_in: int,
+    reserve_in: int,
+    reserve_out: int,
+    fee_bps: int = EGOLD_AMM_FEE_BPS,
+) -> int:
+    """Integer output of an exact-input swap, identical to eGoldAMM.getAmountOut*.
+
+    The contract computes ``amountIn * 997 * reserveOut / (reserveIn * 1000 + amountIn * 997)``;
+    scaling numerator and denominator by ten gives the same floor for the bps form used here.
+    """
+    if amount_in <= 0:
+        raise ValueError("AMM: insufficient input")
+    if reserve_in <= 0 or reserve_out <= 0:
+        raise ValueError("AMM: insufficient liquidity")
+    if not 0 <= fee_bps < BPS_DENOMINATOR:
+        raise ValueError("AMM: invalid fee")
+
+    amount_in_with_fee = amount_in * (BPS_DENOMINATOR - fee_bps)
+    numerator = amount_in_with_fee * reserve_out
+    denominator = reserve_in * BPS_DENOMINATOR + amount_in_with_fee
+    return numerator // denominator
+
+
+def _pct(numerator: int, denominator: int) -> float:
+    return round(numerator * 100 / denominator, 6) if denominator > 0 else 0.0
+
+
+def quote_exact_in(
+    amount_in: int,
+    reserve_in: int,
+    reserve_out: int,
+    decimals_in: int = DEFAULT_TOKEN_DECIMALS,
+    decimals_out: int = DEFAULT_TOKEN_DECIMALS,
+    fee_bps: int = EGOLD_AMM_FEE_BPS,
+) -> dict[str, Any]:
+    """Quote an exact-input swap in wei and split the shortfall against spot into fee and price impact.
+
+    ``spot_amount_out - amount_out == fee_amount_out + price_impact_amount_out`` holds exactly.
+    """
+    amount_out = get_amount_out(amount_in, reserve_in, reserve_out, fee_bps)
+    spot_amount_out = amount_in * reserve_out // reserve_in
+    no_fee_amount_out = get_amount_out(amount_in, reserve_in, reserve_out, 0)
+
+    price_impact_amount_out = spot_amount_out - no_fee_amount_out
+    fee_amount_out = no_fee_amount_out - amount_out
+    in_scale = 10**decimals_in
+    out_scale = 10**decimals_out
+
+    return {
+        "amount_in_wei": amount_in,
+        "amount_out_wei": amount_out,
+        "amount_out": format_units(amount_out, decimals_out),
+        "spot_amount_out_wei": spot_amount_out,
+        "fee_bps": fee_bps,
+        "fee_amount_in_wei": amount_in * fee_bps // BPS_DENOMINATOR,
+        "fee_amount_out_wei": fee_amount_out,
+        "price_impact_amount_out_wei": price_impact_amount_out,
+        "spot_price": reserve_out * in_scale / (reserve_in * out_scale),
+        "execution_price": amount_out * in_scale / (amount_in * out_scale),
+        "fee_pct": _pct(fee_amount_out, spot_amount_out),
+        "price_impact_pct": _pct(price_impact_amount_out, spot_amount_out),
+        "estimated_slippage_pct": _pct(spot_amount_out - amount_out, spot_amount_out),
+    }
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Sequence
+
+import numpy as np
+
+from .amm import BPS_DENOMINATOR, EGOLD_AMM_FEE_BPS
+from .snapshot_cache import SnapshotCache
+
+TICK_BASE = 1.0001
+Q96 = float(2**96)
+
+_LIQUIDITY_EPSILON = 1e-9
+
+
+def tick_to_sqrt_price(tick: np.ndarray | int) -> np.ndarray | float:
+    return np.power(TICK_BASE, np.asarray(tick, dtype=np.float64) / 2.0)
+
+
+class _SwapPath:
+    """Segments walked by a swap in one direction, with prefix sums of input consumed and output produced."""
+
+    def __init__(
+        self,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        liquidity: np.ndarray,
+        amount_in: np.ndarray,
+        amount_out: np.ndarray,
+    ) -> None:
+        self.starts = starts
+        self.ends = ends
+        self.liquidity = liquidity
+        self.cum_in = np.cumsum(amount_in)
+        self.cum_out = np.cumsum(amount_out)
+
+
+class ConcentratedLiquidityIndex:
+    """Uniswap-v3 style liquidity snapshot precomputed for O(log n) exact-input quotes.
+
+    Token0 is x, token1 is y and price is y per x in raw units. Inside a tick range with liquidity L,
+    moving from sqrt price a to b costs ``L * (b - a)`` of y or ``L * (1/b - 1/a)`` of x, so every
+    range's input and output can be computed once and summed; a quote then binary-searches the
+    cumulative input and solves the last, partially crossed range in closed form.
+    """
+
+    def __init__(self, ticks: Sequence[tuple[int, int]], current_tick: int, sqrt_price: float | None = None) -> None:
+        ordered = sorted(ticks)
+        tick_indexes = np.array([tick for tick, _ in ordered], dtype=np.int64)
+        if len(tick_indexes) != len(np.unique(tick_indexes)):
+            raise ValueError("duplicate initialized tick")
+        liquidity_net = np.array([float(net) for _, net in ordered], dtype=np.float64)
+        # Active liquidity for prices in [tick_i, tick_{i+1}).
+        liquidity_after = np.cumsum(liquidity_net)
+        tolerance = _LIQUIDITY_EPSILON * float(np.abs(liquidity_net).max()) if len(liquidity_net) else 0.0
+        if len(liquidity_after) and liquidity_after.min() < -tolerance:
+            raise ValueError("tick liquidity_net values produce negative active liquidity")
+        liquidity_after = np.maximum(liquidity_after, 0.0)
+
+        self.current_tick = current_tick
+        self.sqrt_price = float(sqrt_price) if sqrt_price else float(tick_to_sqrt_price(current_tick))
+        self.tick_count = len(tick_indexes)
+
+        bounds = tick_to_sqrt_price(tick_indexes)
+        position = int(np.searchsorted(tick_indexes, current_tick, side="right"))
+        self.liquidity = float(liquidity_after[position - 1]) if position > 0 else 0.0
+
+        up_bounds = bounds[position:]
+        up_liquidity = np.concatenate(([self.liquidity], liquidity_after[position:-1]))[: len(up_bounds)]
+        up_starts = np.concatenate(([self.sqrt_price], up_bounds[:-1]))[: len(up_bounds)]
+        self._one_for_zero = _SwapPath(
+            up_starts,
+            up_bounds,
+            up_liquidity,
+            up_liquidity * (up_bounds - up_starts),
+            up_liquidity * (1.0 / up_starts - 1.0 / up_bounds),
+        )
+
+        down_bounds = bounds[:position][::-1]
+        down_liquidity = liquidity_after[:position][::-1]
+        down_starts = np.concatenate(([self.sqrt_price], down_bounds[:-1]))[: len(down_bounds)]
+        self._zero_for_one = _SwapPath(
+            down_starts,
+            down_bounds,
+            down_liquidity,
+            down_liquidity * (1.0 / down_bounds - 1.0 / down_starts),
+            down_liquidity * (down_starts - down_bounds),
+        )
+
+    @property
+    def spot_price(self) -> float:
+        return self.sqrt_price * self.sqrt_price
+
+    def _swap(self, amount_in: float, zero_for_one: bool) -> tuple[float, float, int, float]:
+        """Returns (amount_out, unfilled_in, ticks_crossed, final_sqrt_price)."""
+        path = self._zero_for_one if zero_for_one else self._one_for_zero
+        segments = len(path.cum_in)
+        if segments == 0:
+            return 0.0, amount_in, 0, self.sqrt_price
+
+        k = int(np.searchsorted(path.cum_in, amount_in, side="left"))
+        if k >= segments:
+            # Liquidity ran out beyond the last initialized tick.
+            return float(path.cum_out[-1]), float(amount_in - path.cum_in[-1]), segments, float(path.ends[-1])
+
+        consumed_in = path.cum_in[k - 1] if k > 0 else 0.0
+        produced_out = path.cum_out[k - 1] if k > 0 else 0.0
+        remaining = amount_in - consumed_in
+        liquidity = path.liquidity[k]
+        start = path.starts[k]
+        final_sqrt = self._advance(start, liquidity, remaining, zero_for_one)
+        if zero_for_one:
+            partial_out = liquidity * (start - final_sqrt)
+        else:
+            partial_out = liquidity * (1.0 / start - 1.0 / final_sqrt)
+        return float(produced_out + partial_out), 0.0, k, float(final_sqrt)
+
+    @staticmethod
+    def _advance(start: float, liquidity: float, amount_in: float, zero_for_one: bool) -> float:
+        if zero_for_one:
+            return liquidity * start / (liquidity + amount_in * start)
+        return start + amount_in / liquidity
+
+    def quote(self, amount_in: float, zero_for_one: bool = True, fee_bps: int = EGOLD_AMM_FEE_BPS) -> dict[str, Any]:
+        if amount_in <= 0:
+            raise ValueError("amount_in must be positive")
+        fee_factor = 1.0 - fee_bps / BPS_DENOMINATOR
+        amount_out, unfilled_after_fee, ticks_crossed, final_sqrt = self._swap(amount_in * fee_factor, zero_for_one)
+        no_fee_out, _, _, _ = self._swap(amount_in, zero_for_one)
+        filled_in = amount_in - unfilled_after_fee / fee_factor if fee_factor > 0 else 0.0
+
+        spot = self.spot_price if zero_for_one else 1.0 / self.spot_price
+        spot_out = filled_in * spot
+        return {
+            "amount_out": amount_out,
+            "unfilled_amount_in": unfilled_after_fee / fee_factor if fee_factor > 0 else amount_in,
+            "ticks_crossed": ticks_crossed,
+            "spot_price": spot,
+            "final_price": final_sqrt * final_sqrt if zero_for_one else 1.0 / (final_sqrt * final_sqrt),
+            "execution_price": amount_out / filled_in if filled_in > 0 else 0.0,
+            "fee_pct": _pct(max(0.0, no_fee_out - amount_out), spot_out),
+            "price_impact_pct": _pct(max(0.0, spot_out - no_fee_out), spot_out),
+            "estimated_slippage_pct": _pct(max(0.0, spot_out - amount_out), spot_out),
+        }
+
+
+def _pct(numerator: float, denominator: float) -> float:
+    return round(numerator * 100.0 / denominator, 6) if denominator > 0 else 0.0
+
+
+_INDEX_CACHE: SnapshotCache[ConcentratedLiquidityIndex] = SnapshotCache(max_entries=256)
+
+
+def _state_ticks(state: dict[str, Any]) -> list[tuple[int, int]]:
+    return [(int(item["tick"]), int(str(item["liquidity_net"]))) for item in state.get("ticks") or []]
+
+
+def _state_sqrt_price(state: dict[str, Any]) -> float | None:
+    value = state.get("sqrt_price_x96")
+    return int(str(value)) / Q96 if value else None
+
+
+def _state_cache_key(state: dict[str, Any], pool_address: Any) -> tuple[Any, ...]:
+    snapshot_id = state.get("snapshot_id")
+    if snapshot_id:
+        return (str(pool_address or "").lower(), str(snapshot_id))
+    digest = hashlib.sha256()
+    digest.update(f"{state.get('current_tick')}|{state.get('sqrt_price_x96')}".encode())
+    for item in state.get("ticks") or []:
+        digest.update(f"|{item['tick']}:{item['liquidity_net']}".encode())
+    return ("content", digest.hexdigest())
+
+
+def load_concentrated_index(state: dict[str, Any], pool_address: Any = None) -> ConcentratedLiquidityIndex:
+    """Return the cached liquidity index for a pool snapshot, building it on first use."""
+    return _INDEX_CACHE.get_or_build(
+        _state_cache_key(state, pool_address),
+        lambda: ConcentratedLiquidityIndex(
+            _state_ticks(state),
+            int(state["current_tick"]),
+            _state_sqrt_price(state),
+        ),
+    )
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from typing import Any, Sequence
+
+import numpy as np
+
+from ..models import SlippageCurveRequest, SlippageCurveResponse, SlippageThresholdTradeSize
+from .amm import BPS_DENOMINATOR, EGOLD_AMM_FEE_BPS
+
+DEFAULT_SLIPPAGE_THRESHOLDS_PCT = (0.5, 1.0, 3.0)
+
+
+def trade_size_grid(amount_min: float, amount_max: float, points: int, spacing: str = "linear") -> np.ndarray:
+    if spacing == "log" and amount_min > 0:
+        return np.geomspace(amount_min, amount_max, points)
+    return np.linspace(amount_min, amount_max, points)
+
+
+def slippage_curve(
+    reserve_in: float,
+    reserve_out: float,
+    amounts_in: np.ndarray,
+    fee_bps: int = EGOLD_AMM_FEE_BPS,
+) -> dict[str, np.ndarray]:
+    """Constant-product quote for every trade size at once.
+
+    Uses the same decomposition as ``amm.quote_exact_in``: against the spot output ``a * R / r``,
+    price impact costs ``a / (r + a)`` and the total shortfall is ``1 - f * r / (r + f * a)``.
+    """
+    amounts = np.asarray(amounts_in, dtype=np.float64)
+    fee_factor = 1.0 - fee_bps / BPS_DENOMINATOR
+    amounts_with_fee = amounts * fee_factor
+
+    amount_out = amounts_with_fee * reserve_out / (reserve_in + amounts_with_fee)
+    slippage = 1.0 - fee_factor * reserve_in / (reserve_in + amounts_with_fee)
+    price_impact = amounts / (reserve_in + amounts)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        execution_price = np.where(amounts > 0, amount_out / amounts, fee_factor * reserve_out / reserve_in)
+
+    return {
+        "amount_in": amounts,
+        "amount_out": amount_out,
+        "execution_price": execution_price,
+        "slippage_pct": slippage * 100.0,
+        "price_impact_pct": price_impact * 100.0,
+    }
+
+
+def max_trade_for_slippage(reserve_in: float, threshold_pct: float, fee_bps: int = EGOLD_AMM_FEE_BPS) -> float | None:
+    """Largest input whose total slippage stays within ``threshold_pct``.
+
+    Solving ``1 - f * r / (r + f * a) = s`` gives ``a = r * (1 / (1 - s) - 1 / f)``.
+    Returns None when the fee alone already exceeds the threshold.
+    """
+    fee_factor = 1.0 - fee_bps / BPS_DENOMINATOR
+    threshold = threshold_pct / 100.0
+    if not 0.0 < threshold < 1.0:
+        raise ValueError("slippage threshold must be between 0 and 100 percent")
+    if 1.0 - threshold >= fee_factor:
+        return None
+    return reserve_in * (1.0 / (1.0 - threshold) - 1.0 / fee_factor)
+
+
+def max_trade_sizes(
+    reserve_in: float,
+    thresholds_pct: Sequence[float] = DEFAULT_SLIPPAGE_THRESHOLDS_PCT,
+    fee_bps: int = EGOLD_AMM_FEE_BPS,
+) -> list[dict[str, Any]]:
+    return [
+        {
+            "slippage_pct": float(threshold),
+            "max_token_pay_amount": max_trade_for_slippage(reserve_in, threshold, fee_bps),
+        }
+        for threshold in thresholds_pct
+    ]
+
+
+def _to_positive_float(value: Any) -> float | None:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if np.isfinite(number) and number > 0 else None
+
+
+def build_slippage_curve(req: SlippageCurveRequest) -> SlippageCurveResponse:
+    pool = req.pool
+    fee_bps = EGOLD_AMM_FEE_BPS if pool.fee_bps is None else pool.fee_bps
+    reserve_in = _to_positive_float(pool.token_pay_amount)
+    reserve_out = _to_positive_float(pool.token_get_amount)
+    if reserve_in is None or reserve_out is None:
+        return SlippageCurveResponse(has_required_amounts=False, fee_bps=fee_bps)
+
+    if req.token_pay_amounts:
+        parsed = [_to_positive_float(value) for value in req.token_pay_amounts]
+        amounts = np.array([value for value in parsed if value is not None], dtype=np.float64)
+    else:
+        amount_max = _to_positive_float(req.amount_max) or reserve_in * 0.1
+        default_min = amount_max / 1000.0 if req.spacing == "log" else 0.0
+        amount_min = _to_positive_float(req.amount_min) or default_min
+        amounts = trade_size_grid(min(amount_min, amount_max), amount_max, req.points, req.spacing)
+
+    curve = slippage_curve(reserve_in, reserve_out, amounts, fee_bps)
+    return SlippageCurveResponse(
+        has_required_amounts=True,
+        spot_price=reserve_out / reserve_in,
+        fee_bps=fee_bps,
+        token_pay_amounts=curve["amount_in"].tolist(),
+        token_get_amounts=curve["amount_out"].tolist(),
+        execution_prices=curve["execution_price"].tolist(),
+        slippage_pct=np.round(curve["slippage_pct"], 6).tolist(),
+        price_impact_pct=np.round(curve["price_impact_pct"], 6).tolist(),
+        max_trade_sizes=[
+            SlippageThresholdTradeSize.model_validate(item)
+            for item in max_trade_sizes(reserve_in, req.slippage_thresholds_pct, fee_bps)
+        ],
+    )
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+import numpy as np
+
+from ..config import settings
+
+# Ring columns: wall-clock time, reserve0, reserve1, block number (NaN when the caller did not know it).
+_TS, _R0, _R1, _BLOCK = range(4)
+
+
+class ReserveHistory:
+    """Fixed-size ring of reserve snapshots for one pool, stored in reserve0/reserve1 order.
+
+    Appends are O(1). The log-returns of the reserve1/reserve0 price are kept in a parallel ring
+    with running sum and sum of squares, so volatility needs no pass over the window; the sums are
+    rebuilt from the arrays once per ``capacity`` appends to stop float error from accumulating.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        if capacity < 2:
+            raise ValueError("Reserve history needs room for at least two snapshots")
+        self.capacity = capacity
+        self._rows = np.full((capacity, 4), np.nan)
+        self._returns = np.zeros(capacity)
+        self._head = 0
+        self._count = 0
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._since_rebuild = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _slot(self, offset: int) -> int:
+        """Ring slot of the ``offset``-th snapshot, oldest first; negative offsets count from the newest."""
+        if offset < 0:
+            offset += self._count
+        return (self._head - self._count + offset) % self.capacity
+
+    def last(self) -> np.ndarray | None:
+        return self._rows[self._slot(-1)] if self._count else None
+
+    def append(self, reserve0: float, reserve1: float, block_number: int | None, timestamp: float) -> bool:
+        if reserve0 <= 0 or reserve1 <= 0:
+            return False
+        last = self.last()
+        block = math.nan if block_number is None else float(block_number)
+        if last is not None and not math.isnan(block) and not math.isnan(last[_BLOCK]):
+            if block < last[_BLOCK]:
+                return False
+            if block == last[_BLOCK] and last[_R0] == reserve0 and last[_R1] == reserve1:
+                return False
+
+        ret = math.log((reserve1 / reserve0) / (last[_R1] / last[_R0])) if last is not None else 0.0
+        if self._count == self.capacity:
+            # The snapshot after the evicted one becomes the oldest; its return no longer has a predecessor.
+            leaving = self._returns[self._slot(1)]
+            self._sum -= leaving
+            self._sum_sq -= leaving * leaving
+        else:
+            self._count += 1
+        self._rows[self._head] = (timestamp, reserve0, reserve1, block)
+        self._returns[self._head] = ret
+        self._head = (self._head + 1) % self.capacity
+        if self._count > 1:
+            self._sum += ret
+            self._sum_sq += ret * ret
+
+        self._since_rebuild += 1
+        if self._since_rebuild >= self.capacity:
+            self._rebuild_sums()
+        return True
+
+    def _rebuild_sums(self) -> None:
+        self._since_rebuild = 0
+        if self._count < 2:
+            self._sum = self._sum_sq = 0.0
+            return
+        slots = (self._head - self._count + 1 + np.arange(self._count - 1)) % self.capacity
+        window = self._returns[slots]
+        self._sum = float(window.sum())
+        self._sum_sq = float(window @ window)
+
+    def metrics(self, token_pay_index: int = 0) -> dict[str, Any] | None:
+        """Rolling metrics over the window, expressed for a trade paying the token at ``token_pay_index``."""
+        if self._count < 2:
+            return None
+        first, last = self._rows[self._slot(0)], self._rows[self._slot(-1)]
+        pay, get = (_R0, _R1) if token_pay_index == 0 else (_R1, _R0)
+        returns = self._count - 1
+        volatility = 0.0
+        if returns >= 2:
+            variance = (self._sum_sq - self._sum * self._sum / returns) / (returns - 1)
+            volatility = math.sqrt(max(0.0, variance))
+
+        def change_pct(new: float, old: float) -> float:
+            return round((new / old - 1.0) * 100.0, 6)
+
+        blocks = last[_BLOCK] - first[_BLOCK]
+        return {
+            "samples": self._count,
+            "window_seconds": round(float(last[_TS] - first[_TS]), 3),
+            "window_blocks": None if math.isnan(blocks) else int(blocks),
+            "price_volatility_pct": round(volatility * 100.0, 6),
+            "price_drift_pct": change_pct(last[get] / last[pay], first[get] / first[pay]),
+            "reserve_pay_drift_pct": change_pct(last[pay], first[pay]),
+            "reserve_get_drift_pct": change_pct(last[get], first[get]),
+            "liquidity_change_pct": change_pct(
+                math.sqrt(last[_R0]) * math.sqrt(last[_R1]), math.sqrt(first[_R0]) * math.sqrt(first[_R1])
+            ),
+        }
+
+
+class ReserveHistoryStore:
+    """Per-pool reserve histories keyed by (chain, pool), evicting the least recently updated pool."""
+
+    def __init__(self, capacity: int | None = None, max_pools: int | None = None) -> None:
+        self._capacity = settings.reserve_history_size if capacity is None else capacity
+        self._max_pools = settings.reserve_history_max_pools if max_pools is None else max_pools
+        self._pools: OrderedDict[tuple[str, str], ReserveHistory] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._pools)
+
+    def record(
+        self,
+        chain: str,
+        pool_address: str,
+        reserve0: int | float,
+        reserve1: int | float,
+        block_number: int | None = None,
+        timestamp: float | None = None,
+    ) -> bool:
+        key = (chain.lower(), pool_address.lower())
+        with self._lock:
+            history = self._pools.get(key)
+            if history is None:
+                history = ReserveHistory(self._capacity)
+                self._pools[key] = history
+                while len(self._pools) > self._max_pools:
+                    self._pools.popitem(last=False)
+            else:
+                self._pools.move_to_end(key)
+            return history.append(
+                float(reserve0), float(reserve1), block_number, time.time() if timestamp is None else timestamp
+            )
+
+    def record_snapshot(self, chain: str, pool_address: str, snapshot: dict[str, Any]) -> None:
+        """Listener for ``ReserveFetcher`` snapshots."""
+        self.record(chain, pool_address, snapshot["reserve0"], snapshot["reserve1"], snapshot.get("block_number"))
+
+    def resolve_pay_index(
+        self, chain: str, pool_address: str, reserve_pay: int | float, reserve_get: int | float
+    ) -> int:
+        """Guess which getReserves() slot the pay token occupies when the client did not say.
+
+        Picks the orientation whose price is closest to the last recorded one; defaults to 0 for new pools.
+        """
+        with self._lock:
+            history = self._pools.get((chain.lower(), pool_address.lower()))
+            last = history.last() if history is not None else None
+        if last is None or reserve_pay <= 0 or reserve_get <= 0:
+            return 0
+        log_last = math.log(last[_R1] / last[_R0])
+        log_pair = math.log(float(reserve_get) / float(reserve_pay))
+        return 0 if abs(log_pair - log_last) <= abs(-log_pair - log_last) else 1
+
+    def metrics(self, chain: str, pool_address: str, token_pay_index: int = 0) -> dict[str, Any] | None:
+        with self._lock:
+            history = self._pools.get((chain.lower(), pool_address.lower()))
+            return history.metrics(token_pay_index) if history is not None else None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pools.clear()
+
+
+reserve_history = ReserveHistoryStore()
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import math
+from typing import Any
+
+from ..models import MevExposure, SlippageMevBatchRequest, SlippageMevBatchResponse
+from .amm import BPS_DENOMINATOR, DEFAULT_TOKEN_DECIMALS, EGOLD_AMM_FEE_BPS, format_units, get_amount_out, parse_units
+
+_GOLDEN = (math.sqrt(5.0) - 1.0) / 2.0
+
+
+def simulate_sandwich(front_run: int, amount_in: int, reserve_in: int, reserve_out: int, fee_bps: int) -> tuple[int, int]:
+    """Exact front-run / victim / back-run sequence on a constant-product pool.
+
+    Returns (attacker_profit_in_pay_token, victim_amount_out). Reserves grow by the full input,
+    as eGoldAMM does when it syncs reserves to balances after each swap.
+    """
+    if front_run <= 0:
+        return 0, get_amount_out(amount_in, reserve_in, reserve_out, fee_bps)
+    bought = get_amount_out(front_run, reserve_in, reserve_out, fee_bps)
+    reserve_in_1, reserve_out_1 = reserve_in + front_run, reserve_out - bought
+    victim_out = get_amount_out(amount_in, reserve_in_1, reserve_out_1, fee_bps)
+    reserve_in_2, reserve_out_2 = reserve_in_1 + amount_in, reserve_out_1 - victim_out
+    sold_back = get_amount_out(bought, reserve_out_2, reserve_in_2, fee_bps) if bought > 0 else 0
+    return sold_back - front_run, victim_out
+
+
+def max_front_run(amount_in: int, reserve_in: int, reserve_out: int, min_amount_out: int, fee_bps: int) -> int:
+    """Largest front-run that still leaves the victim at least ``min_amount_out``.
+
+    With F = 10000 - fee_bps and D = 10000 the victim's output after a front-run x is
+    ``D*F*a*R*r / ((D*r + F*x) * (D*r + D*x + F*a))``; requiring it to be >= m gives the quadratic
+    ``m*F*D*x^2 + m*(D^2*r + F*D*r + F^2*a)*x + m*D*r*(D*r + F*a) - D*F*a*R*r <= 0``.
+    """
+    if min_amount_out <= 0:
+        raise ValueError("min_amount_out must be positive for a bounded front-run")
+    fee_factor, scale = BPS_DENOMINATOR - fee_bps, BPS_DENOMINATOR
+    a, r, big_r, m = amount_in, reserve_in, reserve_out, min_amount_out
+    qa = m * fee_factor * scale
+    qb = m * (scale * scale * r + fee_factor * scale * r + fee_factor * fee_factor * a)
+    qc = m * scale * r * (scale * r + fee_factor * a) - scale * fee_factor * a * big_r * r
+    if qc >= 0:
+        return 0
+    x = (math.isqrt(qb * qb - 4 * qa * qc) - qb) // (2 * qa)
+
+    # Integer truncation in the contract can leave the victim a few wei short of the smooth bound.
+    step = max(1, x >> 40)
+    while x > 0 and simulate_sandwich(x, a, r, big_r, fee_bps)[1] < m:
+        x -= step
+    return max(0, x)
+
+
+def _profit_float(x: float, a: float, r: float, big_r: float, f: float) -> float:
+    bought = f * x * big_r / (r + f * x)
+    r1, big_r1 = r + x, big_r - bought
+    victim_out = f * a * big_r1 / (r1 + f * a)
+    r2, big_r2 = r1 + a, big_r1 - victim_out
+    return f * bought * r2 / (big_r2 + f * bought) - x
+
+
+def unconstrained_front_run(amount_in: int, reserve_in: int, reserve_out: int, fee_bps: int) -> int:
+    """Profit-maximising front-run when the victim sets no minimum output.
+
+    The profit curve is unimodal in x, so a golden-section search over the closed-form profit
+    expression converges in a fixed number of float evaluations. The optimum can lie far past the
+    pool size for large trades, so the bracket is doubled until profit falls off before searching.
+    """
+    a, r, big_r = float(amount_in), float(reserve_in), float(reserve_out)
+    f = 1.0 - fee_bps / BPS_DENOMINATOR
+    low, high = 0.0, 4.0 * r + a
+    for _ in range(64):
+        if _profit_float(high, a, r, big_r, f) < _profit_float(high / 2, a, r, big_r, f):
+            break
+        low, high = high / 2, high * 2
+    for _ in range(80):
+        left = high - _GOLDEN * (high - low)
+        right = low + _GOLDEN * (high - low)
+        if _profit_float(left, a, r, big_r, f) < _profit_float(right, a, r, big_r, f):
+            low = left
+        else:
+            high = right
+    return int(low)
+
+
+def estimate_sandwich(
+    amount_in: int,
+    reserve_in: int,
+    reserve_out: int,
+    slippage_tolerance_bps: int | None,
+    fee_bps: int = EGOLD_AMM_FEE_BPS,
+) -> dict[str, Any]:
+    expected_out = get_amount_out(amount_in, reserve_in, reserve_out, fee_bps)
+    if slippage_tolerance_bps is None:
+        best = unconstrained_front_run(amount_in, reserve_in, reserve_out, fee_bps)
+    else:
+        min_out = expected_out * (BPS_DENOMINATOR - slippage_tolerance_bps) // BPS_DENOMINATOR
+        best = max_front_run(amount_in, reserve_in, reserve_out, max(1, min_out), fee_bps)
+        f = 1.0 - fee_bps / BPS_DENOMINATOR
+        args = (float(amount_in), float(reserve_in), float(reserve_out), f)
+        # Profit is unimodal: if it is still rising at the tolerance bound, the bound is optimal.
+        if best > 0 and _profit_float(best * (1 + 1e-6), *args) < _profit_float(float(best), *args):
+            best = min(best, unconstrained_front_run(amount_in, reserve_in, reserve_out, fee_bps))
+
+    profit, victim_out = simulate_sandwich(best, amount_in, reserve_in, reserve_out, fee_bps)
+    if best <= 0 or profit <= 0:
+        best, profit, victim_out = 0, 0, expected_out
+    return {
+        "exposed": profit > 0,
+        "front_run_amount_wei": best,
+        "attacker_profit_wei": profit,
+        "victim_amount_out_wei": victim_out,
+        "victim_loss_wei": expected_out - victim_out,
+        "victim_loss_pct": round((expected_out - victim_out) * 100 / expected_out, 6) if expected_out else 0.0,
+    }
+
+
+def estimate_pool_mev(
+    token_pay_amount: Any,
+    pool: dict[str, Any],
+    slippage_tolerance_pct: float | None,
+) -> dict[str, Any] | None:
+    """MEV exposure for a request-shaped trade on a constant-product pool, or None without reserves."""
+    decimals_in = pool.get("token_pay_decimals")
+    decimals_in = DEFAULT_TOKEN_DECIMALS if decimals_in is None else int(decimals_in)
+    decimals_out = pool.get("token_get_decimals")
+    decimals_out = DEFAULT_TOKEN_DECIMALS if decimals_out is None else int(decimals_out)
+    fee_bps = pool.get("fee_bps")
+    fee_bps = EGOLD_AMM_FEE_BPS if fee_bps is None else int(fee_bps)
+
+    amount_in = parse_units(token_pay_amount, decimals_in)
+    reserve_in = parse_units(pool.get("token_pay_amount"), decimals_in)
+    reserve_out = parse_units(pool.get("token_get_amount"), decimals_out)
+    if not amount_in or not reserve_in or not reserve_out or amount_in <= 0 or reserve_in <= 0 or reserve_out <= 0:
+        return None
+    if get_amount_out(amount_in, reserve_in, reserve_out, fee_bps) <= 0:
+        return None
+
+    tolerance_bps = None if slippage_tolerance_pct is None else round(slippage_tolerance_pct * 100)
+    estimate = estimate_sandwich(amount_in, reserve_in, reserve_out, tolerance_bps, fee_bps)
+    return {
+        "exposed": estimate["exposed"],
+        "slippage_tolerance_pct": slippage_tolerance_pct,
+        "front_run_amount": format_units(estimate["front_run_amount_wei"], decimals_in),
+        "attacker_profit": format_units(estimate["attacker_profit_wei"], decimals_in),
+        "victim_loss": format_units(estimate["victim_loss_wei"], decimals_out),
+        "victim_loss_pct": estimate["victim_loss_pct"],
+    }
+
+
+def build_mev_batch(req: SlippageMevBatchRequest) -> SlippageMevBatchResponse:
+    results: list[MevExposure | None] = []
+    for item in req.items:
+        estimate = estimate_pool_mev(item.token_pay_amount, item.pool.model_dump(), item.slippage_tolerance_pct)
+        results.append(MevExposure.model_validate(estimate) if estimate is not None else None)
+    return SlippageMevBatchResponse(results=results)
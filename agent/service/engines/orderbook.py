@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Sequence
+
+import numpy as np
+
+from .snapshot_cache import SnapshotCache
+
+
+def _validated_side(levels: Sequence[tuple[Any, Any]], side: str) -> tuple[np.ndarray, np.ndarray]:
+    if not levels:
+        return np.empty(0, dtype=np.float64), np.empty(0, dtype=np.float64)
+    try:
+        data = np.array([(float(price), float(amount)) for price, amount in levels], dtype=np.float64)
+    except (TypeError, ValueError) as exc:
+        raise ValueError(f"{side} levels must contain numeric price and amount") from exc
+    prices, amounts = data[:, 0], data[:, 1]
+    if not np.all(np.isfinite(data)):
+        raise ValueError(f"{side} levels must be finite")
+    if np.any(prices <= 0) or np.any(amounts < 0):
+        raise ValueError(f"{side} levels need positive prices and non-negative amounts")
+
+    # Best level first: asks ascending, bids descending.
+    order = np.argsort(prices, kind="stable")
+    if side == "bids":
+        order = order[::-1]
+    return prices[order], amounts[order]
+
+
+class _BookSide:
+    def __init__(self, prices: np.ndarray, amounts: np.ndarray) -> None:
+        self.prices = prices
+        self.amounts = amounts
+        self.cum_base = np.cumsum(amounts)
+        self.cum_quote = np.cumsum(amounts * prices)
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+
+class OrderBookIndex:
+    """Order-book snapshot with cumulative depth prefix sums for O(log n) fill quotes.
+
+    Amounts are in the base token, prices in quote per base. A buy spends quote and walks the asks,
+    a sell spends base and walks the bids; the level where the trade stops is found by binary search.
+    """
+
+    def __init__(self, bids: Sequence[tuple[Any, Any]], asks: Sequence[tuple[Any, Any]]) -> None:
+        self._bids = _BookSide(*_validated_side(bids, "bids"))
+        self._asks = _BookSide(*_validated_side(asks, "asks"))
+        if len(self._bids) and len(self._asks) and self._bids.prices[0] > self._asks.prices[0]:
+            raise ValueError("crossed order book: best bid above best ask")
+
+    @property
+    def best_bid(self) -> float | None:
+        return float(self._bids.prices[0]) if len(self._bids) else None
+
+    @property
+    def best_ask(self) -> float | None:
+        return float(self._asks.prices[0]) if len(self._asks) else None
+
+    @property
+    def spread_bps(self) -> float | None:
+        if self.best_bid is None or self.best_ask is None:
+            return None
+        mid = (self.best_bid + self.best_ask) / 2.0
+        return (self.best_ask - self.best_bid) / mid * 10_000.0
+
+    def quote(self, amount_in: float, side: str = "buy") -> dict[str, Any]:
+        """Fill ``amount_in`` (quote token for a buy, base token for a sell) against the book."""
+        if amount_in <= 0:
+            raise ValueError("amount_in must be positive")
+        buying = side == "buy"
+        book = self._asks if buying else self._bids
+        if not len(book):
+            return self._empty_quote(amount_in)
+
+        # A buy is bounded by quote spent, a sell by base sold.
+        cum_in = book.cum_quote if buying else book.cum_base
+        k = int(np.searchsorted(cum_in, amount_in, side="left"))
+        if k >= len(book):
+            filled_in = float(cum_in[-1])
+            amount_out = float(book.cum_base[-1] if buying else book.cum_quote[-1])
+            levels_consumed = len(book)
+            worst_price = float(book.prices[-1])
+        else:
+            consumed_in = float(cum_in[k - 1]) if k > 0 else 0.0
+            produced_out = float((book.cum_base if buying else book.cum_quote)[k - 1]) if k > 0 else 0.0
+            price = float(book.prices[k])
+            remaining = amount_in - consumed_in
+            filled_in = amount_in
+            amount_out = produced_out + (remaining / price if buying else remaining * price)
+            levels_consumed = k + 1
+            worst_price = price
+
+        best_price = float(book.prices[0])
+        if amount_out <= 0 or filled_in <= 0:
+            return self._empty_quote(amount_in)
+        # Average fill price in quote per base for both directions.
+        fill_price = filled_in / amount_out if buying else amount_out / filled_in
+        slippage = (fill_price - best_price) / best_price if buying else (best_price - fill_price) / best_price
+        return {
+            "amount_out": amount_out,
+            "filled_amount_in": filled_in,
+            "unfilled_amount_in": max(0.0, amount_in - filled_in),
+            "levels_consumed": levels_consumed,
+            "best_price": best_price,
+            "worst_price": worst_price,
+            "fill_price": fill_price,
+            "spread_bps": self.spread_bps,
+            "estimated_slippage_pct": round(max(0.0, slippage) * 100.0, 6),
+        }
+
+    @staticmethod
+    def _empty_quote(amount_in: float) -> dict[str, Any]:
+        return {
+            "amount_out": 0.0,
+            "filled_amount_in": 0.0,
+            "unfilled_amount_in": amount_in,
+            "levels_consumed": 0,
+            "best_price": None,
+            "worst_price": None,
+            "fill_price": None,
+            "spread_bps": None,
+            "estimated_slippage_pct": 0.0,
+        }
+
+
+_BOOK_CACHE: SnapshotCache[OrderBookIndex] = SnapshotCache(max_entries=256)
+
+
+def _levels(book: dict[str, Any], side: str) -> list[tuple[Any, Any]]:
+    return [(level["price"], level["amount"]) for level in book.get(side) or []]
+
+
+def _book_cache_key(book: dict[str, Any], pool_address: Any) -> tuple[Any, ...]:
+    snapshot_id = book.get("snapshot_id")
+    if snapshot_id:
+        return (str(pool_address or "").lower(), str(snapshot_id))
+    digest = hashlib.sha256()
+    for side in ("bids", "asks"):
+        digest.update(side.encode())
+        for level in book.get(side) or []:
+            digest.update(f"|{level['price']}:{level['amount']}".encode())
+    return ("content", digest.hexdigest())
+
+
+def load_order_book(book: dict[str, Any], pool_address: Any = None) -> OrderBookIndex:
+    """Return the cached depth index for an order-book snapshot, building it on first use."""
+    return _BOOK_CACHE.get_or_build(
+        _book_cache_key(book, pool_address),
+        lambda: OrderBookIndex(_levels(book, "bids"), _levels(book, "asks")),
+    )
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+from ..models import RouteAllocation, SlippageRouteRequest, SlippageRouteResponse
+from .amm import BPS_DENOMINATOR, DEFAULT_TOKEN_DECIMALS, EGOLD_AMM_FEE_BPS, format_units, get_amount_out, parse_units
+
+
+def optimal_split(
+    reserves_in: np.ndarray,
+    reserves_out: np.ndarray,
+    fee_bps: np.ndarray,
+    amount_in: float,
+) -> np.ndarray:
+    """Output-maximizing split of ``amount_in`` across constant-product pools (water-filling).
+
+    With fee factor f, pool output is ``f*R*a / (r + f*a)`` and its marginal rate is
+    ``f*R*r / (r + f*a)**2``. At the optimum every funded pool has the same marginal rate
+    1/mu**2, so ``a_i = (mu * sqrt(f_i*R_i*r_i) - r_i) / f_i``. Funded pools are a prefix of the pools
+    sorted by their starting marginal rate ``f*R/r``; for a prefix of size k the budget fixes
+    ``mu_k = (A + sum(r/f)) / sum(sqrt(R*r/f))``, and the largest k whose last pool is still
+    worth funding at ``mu_k`` is the answer.
+    """
+    r = np.asarray(reserves_in, dtype=np.float64)
+    big_r = np.asarray(reserves_out, dtype=np.float64)
+    f = 1.0 - np.asarray(fee_bps, dtype=np.float64) / BPS_DENOMINATOR
+    if len(r) == 0 or amount_in <= 0:
+        return np.zeros(len(r))
+
+    order = np.argsort(-(f * big_r / r), kind="stable")
+    r_s, big_r_s, f_s = r[order], big_r[order], f[order]
+    root_frr = np.sqrt(f_s * big_r_s * r_s)
+
+    mu = (amount_in + np.cumsum(r_s / f_s)) / np.cumsum(root_frr / f_s)
+    funded = mu * root_frr > r_s
+    k = int(np.flatnonzero(funded)[-1]) + 1 if funded.any() else 1
+
+    allocation_sorted = np.zeros(len(r))
+    allocation_sorted[:k] = np.maximum(0.0, (mu[k - 1] * root_frr[:k] - r_s[:k]) / f_s[:k])
+    # Normalise float drift so the allocations spend exactly the budget.
+    total = allocation_sorted.sum()
+    if total > 0:
+        allocation_sorted *= amount_in / total
+
+    allocation = np.zeros(len(r))
+    allocation[order] = allocation_sorted
+    return allocation
+
+
+def _split_wei(amount_in: int, allocation: np.ndarray) -> list[int]:
+    total = float(allocation.sum())
+    if total <= 0:
+        return [0] * len(allocation)
+    parts = [int(amount_in * float(share) / total) for share in allocation]
+    parts[int(np.argmax(allocation))] += amount_in - sum(parts)
+    return parts
+
+
+def _slippage_pct(amount_out: int, ideal_out: float) -> float:
+    return round(max(0.0, 1.0 - amount_out / ideal_out) * 100.0, 6) if ideal_out > 0 else 0.0
+
+
+def _parse_pools(req: SlippageRouteRequest, decimals_in: int, decimals_out: int) -> list[dict[str, Any]]:
+    pools: list[dict[str, Any]] = []
+    for pool in req.pools:
+        reserve_in = parse_units(pool.token_pay_amount, decimals_in)
+        reserve_out = parse_units(pool.token_get_amount, decimals_out)
+        if not reserve_in or not reserve_out:
+            continue
+        pools.append(
+            {
+                "pool_address": pool.pool_address,
+                "reserve_in": reserve_in,
+                "reserve_out": reserve_out,
+                "fee_bps": EGOLD_AMM_FEE_BPS if pool.fee_bps is None else pool.fee_bps,
+            }
+        )
+    return pools
+
+
+def build_route(req: SlippageRouteRequest) -> SlippageRouteResponse:
+    decimals_in = DEFAULT_TOKEN_DECIMALS if req.token_pay_decimals is None else req.token_pay_decimals
+    decimals_out = DEFAULT_TOKEN_DECIMALS if req.token_get_decimals is None else req.token_get_decimals
+    amount_in = parse_units(req.token_pay_amount, decimals_in)
+    pools = _parse_pools(req, decimals_in, decimals_out)
+    if not amount_in or not pools:
+        return SlippageRouteResponse(has_required_amounts=False)
+
+    reserves_in = np.array([float(pool["reserve_in"]) for pool in pools])
+    reserves_out = np.array([float(pool["reserve_out"]) for pool in pools])
+    fees = np.array([pool["fee_bps"] for pool in pools], dtype=np.float64)
+    allocation = optimal_split(reserves_in, reserves_out, fees, float(amount_in))
+
+    # Slippage is measured against the best spot price available across all pools.
+    ideal_out = float(amount_in) * float((reserves_out / reserves_in).max())
+
+    allocations: list[RouteAllocation] = []
+    split_out = 0
+    for pool, part in zip(pools, _split_wei(amount_in, allocation)):
+        if part <= 0:
+            continue
+        out = get_amount_out(part, pool["reserve_in"], pool["reserve_out"], pool["fee_bps"])
+        split_out += out
+        allocations.append(
+            RouteAllocation(
+                pool_address=pool["pool_address"],
+                token_pay_amount=format_units(part, decimals_in),
+                expected_amount_out=format_units(out, decimals_out),
+                share_pct=round(part * 100 / amount_in, 6),
+            )
+        )
+    allocations.sort(key=lambda item: item.share_pct, reverse=True)
+
+    fee_factor = 1.0 - fees / BPS_DENOMINATOR
+    single_float = fee_factor * reserves_out * float(amount_in) / (reserves_in + fee_factor * float(amount_in))
+    best_single = int(np.argmax(single_float))
+    best_pool = pools[best_single]
+    single_out = get_amount_out(amount_in, best_pool["reserve_in"], best_pool["reserve_out"], best_pool["fee_bps"])
+    split_slippage = _slippage_pct(split_out, ideal_out)
+    single_slippage = _slippage_pct(single_out, ideal_out)
+
+    return SlippageRouteResponse(
+        has_required_amounts=True,
+        allocations=allocations,
+        expected_amount_out=format_units(split_out, decimals_out),
+        split_slippage_pct=split_slippage,
+        best_single_pool_address=best_pool["pool_address"],
+        single_pool_amount_out=format_units(single_out, decimals_out),
+        single_pool_slippage_pct=single_slippage,
+        slippage_improvement_pct=round(max(0.0, single_slippage - split_slippage), 6),
+    )
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Generic, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SnapshotCache(Generic[T]):
+    """Small thread-safe LRU for precomputed per-snapshot indexes (liquidity curves, order books)."""
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self._max_entries = max_entries
+        self._entries: OrderedDict[Hashable, T] = OrderedDict()
+        self._building: dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> T | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, entry: T) -> T:
+        """Store ``entry`` unless one is already cached for ``key``; returns whichever is cached."""
+        with self._lock:
+            current = self._entries.get(key)
+            if current is not None:
+                return current
+            self.misses += 1
+            self._entries[key] = entry
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+            return entry
+
+    def get_or_build(self, key: Hashable, builder: Callable[[], T]) -> T:
+        """Cached entry for ``key``; concurrent misses on one key share a single ``builder`` call."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            pending = self._building.get(key)
+            if pending is None:
+                self.misses += 1
+                pending = self._building[key] = Future()
+                owner = True
+            else:
+                self.hits += 1
+                owner = False
+
+        if not owner:
+            return pending.result()
+        try:
+            entry = builder()
+        except BaseException as exc:
+            with self._lock:
+                self._building.pop(key, None)
+            pending.set_exception(exc)
+            raise
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+            self._building.pop(key, None)
+        pending.set_result(entry)
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,12 +1,47 @@
+import hashlib
+from typing import Any
+
+from .admission import AdmissionController
+from .analysis.blocklist import blocklist_label
+from .analysis.clone_index import add_clone_template
+from .analysis.contract_context import compact_contract_payload
+from .analysis.history_chunks import MissingHistoryChunks, history_chunks
+from .analysis.scoring import contract_scorer
+from .cache import ModelCodec, cache_namespace, cache_stats
+from .chain import ContractProfileFetcher, JsonRpcError, ReserveFetcher
+from .config import settings
+from .engines.amm import DEFAULT_TOKEN_DECIMALS, format_units, parse_units
+from .engines.curve import build_slippage_curve
+from .engines.history import reserve_history
+from .engines.mev import build_mev_batch
+from .engines.routing import build_route
 from .models import (
+    ContractCodeInfo,
+    ContractJob,
+    ContractPermissions,
+    ContractProxyInfo,
     ContractRiskRequest,
+    ContractTemplateRequest,
+    ContractTemplateResponse,
+    HistoryChunkUploadRequest,
+    HistoryChunkUploadResponse,
     PhishingRiskResponse,
     PhishingRiskRequest,
     SecurityRiskResponse,
+    SlippageCurveRequest,
+    SlippageCurveResponse,
+    SlippageMevBatchRequest,
+    SlippageMevBatchResponse,
+    SlippagePoolStats,
     SlippageRiskRequest,
     SlippageRiskResponse,
+    SlippageRouteRequest,
+    SlippageRouteResponse,
     RiskReason,
 )
+from .jobs import ContractJobManager
+from .model_scheduler import current_priority, model_scheduler
+from .prescore import ContractPrescorer
 
 
 class RiskService:
@@ -14,6 +49,13 @@ class RiskService:
         self._phishing_agent = None
         self._contract_agent = None
         self._slippage_agent = None
+        self._reserve_history = reserve_history
+        self._reserve_fetcher = ReserveFetcher(on_snapshot=self._reserve_history.record_snapshot)
+        self._contract_fetcher = ContractProfileFetcher()
+        self._prescorer = ContractPrescorer(self.warm_contract)
+        self._admission = AdmissionController(model_scheduler)
+        self._contract_jobs = ContractJobManager(self.contract)
+        self._slippage_cache = cache_namespace("slippage", ModelCodec(SlippageRiskResponse))
         try:
             from .agents import ContractRiskAgent, PhishingRiskAgent, SlippageRiskAgent
 
@@ -27,6 +69,10 @@ class RiskService:
         value = (lang or "zh").strip().lower()
         return "en" if value.startswith("en") else "zh"
 
+    def _shed_model_call(self) -> bool:
+        """True when this interactive request should skip the model and get the degraded local answer."""
+        return current_priority() == "interactive" and not self._admission.admit()
+
     def _security_fallback(self, summary: str, reason: str, lang: str = "zh") -> SecurityRiskResponse:
         if self._normalize_lang(lang) == "en":
             return SecurityRiskResponse(
@@ -73,8 +119,28 @@ class RiskService:
             similarity_method="max(prefix,suffix,levenshtein,head_bag_6)",
         )
 
+    def _phishing_blocked(self, label: str, lang: str) -> PhishingRiskResponse:
+        en = self._normalize_lang(lang) == "en"
+        return PhishingRiskResponse(
+            risk_level="high" if en else "高",
+            summary="This address is on a list of known phishing or drainer addresses; do not send funds or approvals to it."
+            if en
+            else "该地址在已知钓鱼/盗币地址名单中，请勿向其转账或授权。",
+            confidence=0.99,
+            most_similar_similarity=0.0,
+            blocklist_label=label,
+        )
+
     def phishing(self, req: PhishingRiskRequest) -> PhishingRiskResponse:
+        """Raises MissingHistoryChunks when ``req.history_chunks`` names chunks the store does not hold."""
         lang = self._normalize_lang(req.lang)
+        label = blocklist_label(req.address)
+        if label is not None:
+            return self._phishing_blocked(label, lang)
+        # Raises MissingHistoryChunks naming every absent chunk before any work is queued.
+        history = history_chunks().digest(req.history_chunks) if req.history_chunks else None
+        # The wallet's history says which contracts it will likely check next; warm their scores now.
+        self._prescorer.submit_wallet(req, history)
         if self._phishing_agent is None:
             return self._phishing_fallback(
                 "Unable to assess risk with current configuration." if lang == "en" else "当前配置下无法完成风险评估。",
@@ -82,7 +148,11 @@ class RiskService:
             )
 
         try:
+            if self._shed_model_call():
+                return self._phishing_agent.run_local(req)
             return self._phishing_agent.run(req)
+        except MissingHistoryChunks:
+            raise
         except Exception:
             return self._phishing_fallback(
                 "Unable to assess phishing risk due to runtime error."
@@ -91,10 +161,94 @@ class RiskService:
                 lang=lang,
             )
 
+    def upload_history_chunks(self, req: HistoryChunkUploadRequest) -> HistoryChunkUploadResponse:
+        store = history_chunks()
+        response = HistoryChunkUploadResponse()
+        for chunk in req.chunks:
+            transactions = [tx.model_dump(exclude_none=True) for tx in chunk.transactions]
+            (response.stored if store.put(chunk.hash, transactions) else response.rejected).append(chunk.hash)
+        return response
+
+    def _with_contract_profile(self, req: ContractRiskRequest) -> ContractRiskRequest:
+        """Fill code, proxy and owner fields the client left empty from one batched on-chain read."""
+        code = req.code or ContractCodeInfo()
+        proxy = req.proxy or ContractProxyInfo()
+        permissions = req.permissions or ContractPermissions()
+        if code.bytecode and proxy.is_proxy is not None and permissions.owner:
+            return req
+        try:
+            profile = self._contract_fetcher.get_profile(req.chain, req.contract_address)
+        except (JsonRpcError, ValueError):
+            return req
+        if not profile["bytecode"]:
+            return req
+
+        update: dict[str, Any] = {}
+        if not code.bytecode:
+            update["code"] = code.model_copy(update={"bytecode": profile["bytecode"]})
+        # An explicit is_proxy from the client is kept as sent; only an unknown one is filled.
+        if proxy.is_proxy is None and profile["implementation_address"]:
+            update["proxy"] = proxy.model_copy(
+                update={
+                    "is_proxy": True,
+                    "implementation_address": proxy.implementation_address or profile["implementation_address"],
+                    "admin_address": proxy.admin_address or profile["admin_address"],
+                }
+            )
+        if not permissions.owner and profile["owner"]:
+            update["permissions"] = permissions.model_copy(update={"owner": profile["owner"]})
+        if not permissions.admin and profile["admin_address"]:
+            base = update.get("permissions", permissions)
+            update["permissions"] = base.model_copy(update={"admin": profile["admin_address"]})
+        return req.model_copy(update=update) if update else req
+
+    def _contract_blocked(self, label: str, lang: str) -> SecurityRiskResponse:
+        if self._normalize_lang(lang) == "en":
+            reasons = [
+                RiskReason(reason="Known malicious address", explanation=f"The contract is on the blocklist as {label}."),
+                RiskReason(reason="Confirmed match", explanation="The address matched the blocklist exactly, not by similarity."),
+                RiskReason(reason="Do not interact", explanation="Avoid approvals, transfers and calls to this contract."),
+            ]
+            summary = "This contract is a known malicious address; do not interact with it."
+        else:
+            reasons = [
+                RiskReason(reason="已知恶意地址", explanation=f"该合约在黑名单中，标记为 {label}。"),
+                RiskReason(reason="精确匹配", explanation="地址与黑名单完全一致，并非相似度推断。"),
+                RiskReason(reason="请勿交互", explanation="不要对该合约授权、转账或调用。"),
+            ]
+            summary = "该合约为已知恶意地址，请勿与其交互。"
+        return SecurityRiskResponse(
+            risk_level="high" if self._normalize_lang(lang) == "en" else "高",
+            summary=summary,
+            confidence=0.99,
+            top_reasons=reasons,
+            blocklist_label=label,
+        )
+
+    def warm_contract(self, req: ContractRiskRequest) -> SecurityRiskResponse | None:
+        """Pre-score step: assess the contract from what the server can read on chain.
+
+        Fetching the profile and running the code-level analysis fills the profile and code caches;
+        the full assessment then caches the model narrative under the code key, the language, the
+        interaction type and the verdict. An interactive check of the same code reuses it whenever
+        the fields the client adds leave its verdict the same; otherwise it builds its own. Without
+        a contract agent only the caches are warmed.
+        """
+        req = self._with_contract_profile(req)
+        if self._contract_agent is None:
+            compact_contract_payload(req.model_dump())
+            return None
+        return self._contract_agent.run(req)
+
     def contract(self, req: ContractRiskRequest) -> SecurityRiskResponse:
         lang = self._normalize_lang(req.lang)
+        implementation = req.proxy.implementation_address if req.proxy else None
+        label = blocklist_label(req.contract_address) or blocklist_label(implementation)
+        if label is not None:
+            return self._contract_blocked(label, lang)
+        req = self._with_contract_profile(req)
         if self._contract_agent is None:
-            return self._security_fallback(
+            return self._contract_scored(req, lang) or self._security_fallback(
                 "Unable to assess contract risk with current configuration."
                 if lang == "en"
                 else "当前配置下无法完成合约风险评估。",
@@ -102,10 +256,19 @@ class RiskService:
                 lang=lang,
             )
 
+        if self._shed_model_call():
+            return self._contract_scored(req, lang) or self._security_fallback(
+                "The service is busy, so contract risk could not be fully assessed."
+                if lang == "en"
+                else "服务繁忙，暂时无法完成合约风险评估。",
+                "Service overloaded" if lang == "en" else "服务过载",
+                lang=lang,
+            ).model_copy(update={"degraded": True})
+
         try:
             return self._contract_agent.run(req)
         except Exception:
-            return self._security_fallback(
+            return self._contract_scored(req, lang) or self._security_fallback(
                 "Unable to assess contract risk due to runtime error."
                 if lang == "en"
                 else "由于运行时错误，无法完成合约风险评估。",
@@ -113,8 +276,88 @@ class RiskService:
                 lang=lang,
             )
 
+    def _contract_scored(self, req: ContractRiskRequest, lang: str) -> SecurityRiskResponse | None:
+        """Score-only assessment without the model; None when there is nothing to score.
+
+        Decisive verdicts never use the model anyway, so only the others are marked degraded.
+        """
+        try:
+            payload, _ = compact_contract_payload(req.model_dump())
+            scorer = contract_scorer()
+            verdict = scorer.score(payload)
+        except Exception:
+            return None
+        if verdict["score"] is None:
+            return None
+        response = scorer.response(verdict, lang)
+        response.degraded = not verdict["decisive"]
+        return response
+
+    def submit_contract_job(self, req: ContractRiskRequest) -> ContractJob:
+        return self._contract_jobs.submit(req)
+
+    async def wait_contract_job(self, job_id: str, timeout_s: float = 0.0) -> ContractJob | None:
+        return await self._contract_jobs.wait(job_id, min(max(timeout_s, 0.0), settings.job_max_wait_s))
+
+    def cache_stats(self) -> dict[str, Any]:
+        return cache_stats()
+
+    def model_scheduler_stats(self) -> dict[str, Any]:
+        return {**model_scheduler.stats(), "admission": self._admission.snapshot()}
+
+    def add_contract_template(self, req: ContractTemplateRequest) -> ContractTemplateResponse:
+        added = add_clone_template(
+            req.label,
+            bytecode=req.bytecode,
+            source=req.source_code,
+            meta={"family": req.family, "risk": req.risk},
+        )
+        return ContractTemplateResponse(
+            indexed=bool(added), opcode_id=added.get("opcode"), source_id=added.get("source")
+        )
+
+    def _with_pool_reserves(self, req: SlippageRiskRequest) -> SlippageRiskRequest:
+        pool = req.pool or SlippagePoolStats()
+        if req.token_pay_index is None or (pool.token_pay_amount and pool.token_get_amount):
+            return req
+        try:
+            snapshot = self._reserve_fetcher.get_reserves(req.chain, req.pool_address)
+        except (JsonRpcError, ValueError):
+            return req
+
+        reserves = (snapshot["reserve0"], snapshot["reserve1"])
+        decimals_in = DEFAULT_TOKEN_DECIMALS if pool.token_pay_decimals is None else pool.token_pay_decimals
+        decimals_out = DEFAULT_TOKEN_DECIMALS if pool.token_get_decimals is None else pool.token_get_decimals
+        pool = pool.model_copy(
+            update={
+                "token_pay_amount": format_units(reserves[req.token_pay_index], decimals_in),
+                "token_get_amount": format_units(reserves[1 - req.token_pay_index], decimals_out),
+                "block_number": snapshot["block_number"],
+            }
+        )
+        return req.model_copy(update={"pool": pool})
+
+    def _record_reserves(self, req: SlippageRiskRequest) -> SlippageRiskRequest:
+        pool = req.pool
+        if pool is None or pool.concentrated is not None or req.orderbook is not None:
+            return req
+        decimals_in = DEFAULT_TOKEN_DECIMALS if pool.token_pay_decimals is None else pool.token_pay_decimals
+        decimals_out = DEFAULT_TOKEN_DECIMALS if pool.token_get_decimals is None else pool.token_get_decimals
+        reserve_pay = parse_units(pool.token_pay_amount, decimals_in)
+        reserve_get = parse_units(pool.token_get_amount, decimals_out)
+        if not reserve_pay or not reserve_get or reserve_pay <= 0 or reserve_get <= 0:
+            return req
+
+        pay_index = req.token_pay_index
+        if pay_index is None:
+            pay_index = self._reserve_history.resolve_pay_index(req.chain, req.pool_address, reserve_pay, reserve_get)
+        reserves = (reserve_pay, reserve_get) if pay_index == 0 else (reserve_get, reserve_pay)
+        self._reserve_history.record(req.chain, req.pool_address, *reserves, block_number=pool.block_number)
+        return req.model_copy(update={"token_pay_index": pay_index})
+
     def slippage(self, req: SlippageRiskRequest) -> SlippageRiskResponse:
         lang = self._normalize_lang(req.lang)
+        req = self._record_reserves(self._with_pool_reserves(req))
         if self._slippage_agent is None:
             return self._slippage_fallback(
                 "Unable to assess slippage risk with current configuration."
@@ -125,7 +368,12 @@ class RiskService:
             )
 
         try:
-            return self._slippage_agent.run(req)
+            if self._shed_model_call():
+                return self._slippage_agent.run_local(req)
+            # Keyed on the enriched request, reserves included: a new block gives a new key.
+            key = hashlib.sha256(req.model_dump_json().encode()).hexdigest()
+            agent = self._slippage_agent
+            return self._slippage_cache.get_or_build(key, lambda: agent.run(req)).model_copy(deep=True)
         except Exception:
             return self._slippage_fallback(
                 "Unable to assess slippage risk due to runtime error."
@@ -134,3 +382,12 @@ class RiskService:
                 "Slippage agent execution failed" if lang == "en" else "滑点风险 Agent 执行失败",
                 lang=lang,
             )
+
+    def slippage_curve(self, req: SlippageCurveRequest) -> SlippageCurveResponse:
+        return build_slippage_curve(req)
+
+    def slippage_route(self, req: SlippageRouteRequest) -> SlippageRouteResponse:
+        return build_route(req)
+
+    def slippage_mev_batch(self, req: SlippageMevBatchRequest) -> SlippageMevBatchResponse:
+        return build_mev_batch(req)
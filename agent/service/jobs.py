@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable
+
+from .config import settings
+from .models import ContractJob, ContractRiskRequest, SecurityRiskResponse
+
+logger = logging.getLogger(__name__)
+
+FINISHED = ("done", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS contract_jobs (
+    job_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    request TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    owner_pid INTEGER NOT NULL DEFAULT 0,
+    lease_until REAL NOT NULL DEFAULT 0
+)
+"""
+# Columns added after the first release; stores created before them are migrated on open.
+_ADDED_COLUMNS = {
+    "owner_pid": "owner_pid INTEGER NOT NULL DEFAULT 0",
+    "lease_until": "lease_until REAL NOT NULL DEFAULT 0",
+}
+
+
+def job_id_for(req: ContractRiskRequest) -> str:
+    """Content address of a request: identical inputs map to the same job."""
+    canonical = json.dumps(req.model_dump(mode="json"), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()[:32]
+
+
+class JobStore:
+    """SQLite-backed job records with a TTL; ``path`` "" keeps them in memory for this process only.
+
+    An unfinished job is leased to the process running it (``owner_pid``, ``lease_until``); the
+    owner renews the lease while it holds the job, so only jobs whose owner has gone away expire.
+    """
+
+    def __init__(self, path: str = "", ttl_s: float = 3600.0, lease_s: float = 30.0) -> None:
+        self.ttl_s = ttl_s
+        self.lease_s = lease_s
+        self._conn = sqlite3.connect(path or ":memory:", check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL" if path else "PRAGMA journal_mode=MEMORY")
+        self._conn.execute(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(contract_jobs)")}
+        for name, definition in _ADDED_COLUMNS.items():
+            if name not in columns:
+                self._conn.execute(f"ALTER TABLE contract_jobs ADD COLUMN {definition}")
+        self._lock = threading.Lock()
+
+    def _row(self, row: tuple[Any, ...] | None) -> ContractJob | None:
+        if row is None:
+            return None
+        job_id, status, result, error, created_at, updated_at = row
+        return ContractJob(
+            job_id=job_id,
+            status=status,
+            result=SecurityRiskResponse.model_validate_json(result) if result else None,
+            error=error,
+            created_at=created_at,
+            updated_at=updated_at,
+        )
+
+    def get(self, job_id: str) -> ContractJob | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT job_id, status, result, error, created_at, updated_at FROM contract_jobs "
+                "WHERE job_id = ? AND expires_at > ?",
+                (job_id, time.time()),
+            ).fetchone()
+        return self._row(row)
+
+    def create(self, job_id: str, request: str) -> tuple[ContractJob, bool]:
+        """Insert a queued job unless a live one exists (failed jobs are retried); returns (job, created)."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("DELETE FROM contract_jobs WHERE expires_at <= ?", (now,))
+            row = self._conn.execute(
+                "SELECT job_id, status, result, error, created_at, updated_at FROM contract_jobs WHERE job_id = ?",
+                (job_id,),
+            ).fetchone()
+            if row is not None and row[1] != "failed":
+                return self._row(row), False  # type: ignore[return-value]
+            self._conn.execute(
+                "INSERT OR REPLACE INTO contract_jobs VALUES (?, 'queued', ?, NULL, NULL, ?, ?, ?, ?, ?)",
+                (job_id, request, now, now, now + self.ttl_s, os.getpid(), now + self.lease_s),
+            )
+        return ContractJob(job_id=job_id, status="queued", created_at=now, updated_at=now), True
+
+    def update(self, job_id: str, status: str, result: str | None = None, error: str | None = None) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE contract_jobs SET status = ?, result = ?, error = ?, updated_at = ?, expires_at = ? "
+                "WHERE job_id = ?",
+                (status, result, error, now, now + self.ttl_s, job_id),
+            )
+
+    def renew(self, job_ids: Iterable[str]) -> None:
+        """Extend this process's lease on the given unfinished jobs."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE contract_jobs SET lease_until = ? "
+                "WHERE job_id = ? AND owner_pid = ? AND status IN ('queued', 'running')",
+                [(now + self.lease_s, job_id, os.getpid()) for job_id in job_ids],
+            )
+
+    def claim_expired(self) -> list[tuple[str, str]]:
+        """Take over unfinished jobs whose lease ran out (their owner died); returns their (job_id, request).
+
+        Each takeover is a conditional UPDATE, so when several processes sweep at once every job goes
+        to exactly one of them.
+        """
+        now = time.time()
+        claimed = []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job_id, request FROM contract_jobs "
+                "WHERE status IN ('queued', 'running') AND lease_until <= ? AND expires_at > ?",
+                (now, now),
+            ).fetchall()
+            for job_id, request in rows:
+                cursor = self._conn.execute(
+                    "UPDATE contract_jobs SET owner_pid = ?, lease_until = ? "
+                    "WHERE job_id = ? AND status IN ('queued', 'running') AND lease_until <= ?",
+                    (os.getpid(), now + self.lease_s, job_id, now),
+                )
+                if cursor.rowcount == 1:
+                    claimed.append((job_id, request))
+        return claimed
+
+
+class ContractJobManager:
+    """Runs contract analyses as jobs on a worker pool so HTTP workers never hold a slow request.
+
+    Submitting an input that already has a live job returns that job instead of starting another.
+    Held jobs' leases are renewed every third of ``lease_s``; on start and on each renewal the
+    manager also takes over jobs whose lease expired, i.e. jobs a crashed or restarted process
+    left unfinished in a file-backed store. Jobs another live process is running are never rerun.
+    """
+
+    def __init__(
+        self,
+        run: Callable[[ContractRiskRequest], SecurityRiskResponse],
+        store: JobStore | None = None,
+        workers: int | None = None,
+        poll_interval_s: float | None = None,
+    ) -> None:
+        self._run = run
+        self._poll_interval_s = settings.job_poll_interval_s if poll_interval_s is None else poll_interval_s
+        self._store = store or JobStore(settings.job_store_path, settings.job_ttl_s, settings.job_lease_s)
+        self._pool = ThreadPoolExecutor(
+            max_workers=settings.job_workers if workers is None else workers, thread_name_prefix="contract-job"
+        )
+        self._waiters: dict[str, list[tuple[asyncio.AbstractEventLoop, asyncio.Future]]] = {}
+        self._lock = threading.Lock()
+        self._held: set[str] = set()
+        self._resume()
+        threading.Thread(target=self._keep_leases, name="contract-job-lease", daemon=True).start()
+
+    def _resume(self) -> None:
+        for job_id, request in self._store.claim_expired():
+            with self._lock:
+                self._held.add(job_id)
+            self._pool.submit(self._execute, job_id, ContractRiskRequest.model_validate_json(request))
+
+    def _keep_leases(self) -> None:
+        while True:
+            time.sleep(max(self._store.lease_s / 3, 0.05))
+            try:
+                with self._lock:
+                    held = list(self._held)
+                self._store.renew(held)
+                self._resume()
+            except sqlite3.Error as exc:
+                # A busy store skips one round; leases are a third used up, so the next round still counts.
+                logger.warning("job lease renewal failed: %s", exc)
+
+    def submit(self, req: ContractRiskRequest) -> ContractJob:
+        job_id = job_id_for(req)
+        job, created = self._store.create(job_id, req.model_dump_json())
+        if created:
+            with self._lock:
+                self._held.add(job_id)
+            self._pool.submit(self._execute, job_id, req)
+        return job
+
+    def get(self, job_id: str) -> ContractJob | None:
+        return self._store.get(job_id)
+
+    def _execute(self, job_id: str, req: ContractRiskRequest) -> None:
+        self._store.update(job_id, "running")
+        try:
+            result = self._run(req)
+            self._store.update(job_id, "done", result=result.model_dump_json())
+        except Exception as exc:
+            self._store.update(job_id, "failed", error=str(exc) or type(exc).__name__)
+        with self._lock:
+            self._held.discard(job_id)
+            waiters = self._waiters.pop(job_id, [])
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(lambda f=future: f.done() or f.set_result(None))
+
+    async def wait(self, job_id: str, timeout_s: float) -> ContractJob | None:
+        """Current job, after waiting up to ``timeout_s`` for it to finish; holds no thread while waiting.
+
+        A job run by this process wakes its waiters as it finishes. One run by another worker on
+        the shared store cannot, so the store is also re-read every ``poll_interval_s``.
+        """
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future = loop.create_future()
+        with self._lock:
+            self._waiters.setdefault(job_id, []).append((loop, future))
+        try:
+            # Registered before reading, so a job finishing in between still wakes us.
+            job = self.get(job_id)
+            if job is None or job.status in FINISHED or timeout_s <= 0:
+                return job
+            deadline = loop.time() + timeout_s
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return job
+                await asyncio.wait({future}, timeout=min(remaining, self._poll_interval_s))
+                job = self.get(job_id)
+                if future.done() or job is None or job.status in FINISHED:
+                    return job
+        finally:
+            with self._lock:
+                waiters = self._waiters.get(job_id)
+                if waiters is not None:
+                    waiters[:] = [item for item in waiters if item[1] is not future]
+                    if not waiters:
+                        del self._waiters[job_id]
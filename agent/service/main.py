@@ -1,53 +1,229 @@
+import hmac
 import os
 import sys
 
-from fastapi import FastAPI
-import uvicorn
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.openapi.utils import get_openapi
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+from starlette.concurrency import run_in_threadpool
 
 if __package__ is None or __package__ == "":
     # Support running as a script: `uv run service/main.py`
     sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+    from service import codec
+    from service.analysis.history_chunks import MissingHistoryChunks
+    from service.config import settings
     from service.handlers import RiskService
+    from service.jobs import FINISHED
+    from service.serving import health_report, serve, worker_failed, worker_request
     from service.models import (
+        ContractJob,
         ContractRiskRequest,
+        ContractTemplateRequest,
+        ContractTemplateResponse,
+        HistoryChunkUploadRequest,
+        HistoryChunkUploadResponse,
         PhishingRiskResponse,
         PhishingRiskRequest,
         SecurityRiskResponse,
+        SlippageCurveRequest,
+        SlippageCurveResponse,
+        SlippageMevBatchRequest,
+        SlippageMevBatchResponse,
         SlippageRiskRequest,
         SlippageRiskResponse,
+        SlippageRouteRequest,
+        SlippageRouteResponse,
     )
 else:
+    from . import codec
+    from .analysis.history_chunks import MissingHistoryChunks
+    from .config import settings
     from .handlers import RiskService
+    from .jobs import FINISHED
+    from .serving import health_report, serve, worker_failed, worker_request
     from .models import (
+        ContractJob,
         ContractRiskRequest,
+        ContractTemplateRequest,
+        ContractTemplateResponse,
+        HistoryChunkUploadRequest,
+        HistoryChunkUploadResponse,
         PhishingRiskResponse,
         PhishingRiskRequest,
         SecurityRiskResponse,
+        SlippageCurveRequest,
+        SlippageCurveResponse,
+        SlippageMevBatchRequest,
+        SlippageMevBatchResponse,
         SlippageRiskRequest,
         SlippageRiskResponse,
+        SlippageRouteRequest,
+        SlippageRouteResponse,
     )
 
 app = FastAPI(title="LumiWallet Risk Service", version="0.1.0")
 service = RiskService()
 
 
-@app.post("/risk/phishing", response_model=PhishingRiskResponse)
-def phishing_risk(req: PhishingRiskRequest) -> PhishingRiskResponse:
-    return service.phishing(req)
+@app.middleware("http")
+async def track_worker_health(request: Request, call_next):
+    with worker_request():
+        response = await call_next(request)
+    if response.status_code >= 500:
+        worker_failed()
+    return response
 
 
-@app.post("/risk/contract", response_model=SecurityRiskResponse)
-def contract_risk(req: ContractRiskRequest) -> SecurityRiskResponse:
-    return service.contract(req)
+@app.get("/health")
+def health() -> dict:
+    return health_report()
 
 
-@app.post("/risk/slippage", response_model=SlippageRiskResponse)
-def slippage_risk(req: SlippageRiskRequest) -> SlippageRiskResponse:
-    return service.slippage(req)
+def _decode_and_run(body: bytes, model_type: type[BaseModel], handler) -> BaseModel:
+    try:
+        req = codec.decode(model_type, body)
+    except ValidationError as exc:
+        errors = exc.errors(include_url=False)
+        raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in errors]) from None
+    except ValueError as exc:
+        raise RequestValidationError(
+            [{"type": "json_invalid", "loc": ("body",), "msg": "JSON decode error", "input": {}, "ctx": {"error": str(exc)}}]
+        ) from None
+    return handler(req)
+
+
+async def _codec_route(request: Request, model_type: type[BaseModel], handler) -> codec.ModelResponse:
+    # Decode, validate and handle on a worker thread; the response model is serialized once, straight to bytes.
+    body = await request.body()
+    return codec.ModelResponse(await run_in_threadpool(_decode_and_run, body, model_type, handler))
+
+
+@app.post(
+    "/risk/phishing", response_model=PhishingRiskResponse, openapi_extra=codec.openapi_body(PhishingRiskRequest)
+)
+async def phishing_risk(request: Request) -> codec.ModelResponse:
+    """409 with ``missing_chunks`` when the request names history chunks to upload first."""
+    try:
+        return await _codec_route(request, PhishingRiskRequest, service.phishing)
+    except MissingHistoryChunks as exc:
+        return codec.ModelResponse(
+            {"detail": "History chunks not found; upload them and retry", "missing_chunks": exc.missing},
+            status_code=409,
+        )
+
+
+@app.post(
+    "/risk/phishing/chunks",
+    response_model=HistoryChunkUploadResponse,
+    openapi_extra=codec.openapi_body(HistoryChunkUploadRequest),
+)
+async def upload_history_chunks(request: Request) -> codec.ModelResponse:
+    return await _codec_route(request, HistoryChunkUploadRequest, service.upload_history_chunks)
+
+
+@app.post("/risk/contract", response_model=SecurityRiskResponse, openapi_extra=codec.openapi_body(ContractRiskRequest))
+async def contract_risk(request: Request) -> codec.ModelResponse:
+    return await _codec_route(request, ContractRiskRequest, service.contract)
+
+
+@app.post("/risk/contract/jobs", response_model=ContractJob, status_code=202)
+def submit_contract_job(req: ContractRiskRequest) -> ContractJob:
+    return service.submit_contract_job(req)
+
+
+@app.get("/risk/contract/jobs/{job_id}", response_model=ContractJob)
+async def contract_job(job_id: str, wait: float = 0.0) -> ContractJob:
+    """Job status; ``wait`` long-polls up to that many seconds (capped) for the job to finish."""
+    job = await service.wait_contract_job(job_id, wait)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job
+
+
+@app.get("/risk/contract/jobs/{job_id}/events")
+async def contract_job_events(job_id: str) -> StreamingResponse:
+    """Server-sent events: the current status, then the final status once the job finishes."""
+    job = await service.wait_contract_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+
+    async def stream():
+        current = job
+        yield f"event: {current.status}\ndata: {current.model_dump_json()}\n\n"
+        while current.status not in FINISHED:
+            latest = await service.wait_contract_job(job_id, 15.0)
+            if latest is None:
+                return
+            if latest.status == current.status:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: {latest.status}\ndata: {latest.model_dump_json()}\n\n"
+            current = latest
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+def require_admin(x_admin_token: str | None = Header(default=None)) -> None:
+    """Guard for endpoints that change shared data: the X-Admin-Token header must equal ADMIN_TOKEN."""
+    if not settings.admin_token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token.encode(), settings.admin_token.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@app.post("/risk/contract/templates", response_model=ContractTemplateResponse, dependencies=[Depends(require_admin)])
+def contract_template(req: ContractTemplateRequest) -> ContractTemplateResponse:
+    return service.add_contract_template(req)
+
+
+@app.get("/risk/cache")
+def cache_stats() -> dict:
+    return service.cache_stats()
+
+
+@app.get("/risk/scheduler")
+def model_scheduler_stats() -> dict:
+    return service.model_scheduler_stats()
+
+
+@app.post("/risk/slippage", response_model=SlippageRiskResponse, openapi_extra=codec.openapi_body(SlippageRiskRequest))
+async def slippage_risk(request: Request) -> codec.ModelResponse:
+    return await _codec_route(request, SlippageRiskRequest, service.slippage)
+
+
+@app.post("/risk/slippage/curve", response_model=SlippageCurveResponse)
+def slippage_curve(req: SlippageCurveRequest) -> SlippageCurveResponse:
+    return service.slippage_curve(req)
+
+
+@app.post("/risk/slippage/route", response_model=SlippageRouteResponse)
+def slippage_route(req: SlippageRouteRequest) -> SlippageRouteResponse:
+    return service.slippage_route(req)
+
+
+@app.post("/risk/slippage/mev", response_model=SlippageMevBatchResponse)
+def slippage_mev_batch(req: SlippageMevBatchRequest) -> SlippageMevBatchResponse:
+    return service.slippage_mev_batch(req)
+
+
+def _openapi() -> dict:
+    # Bodies read by _codec_route are not FastAPI parameters, so their schemas are registered here.
+    if app.openapi_schema is None:
+        schema = get_openapi(title=app.title, version=app.version, routes=app.routes)
+        app.openapi_schema = codec.register_schemas(
+            schema, [PhishingRiskRequest, HistoryChunkUploadRequest, ContractRiskRequest, SlippageRiskRequest]
+        )
+    return app.openapi_schema
+
+
+app.openapi = _openapi
 
 
 def run_http_server() -> None:
-    uvicorn.run("service.main:app", host="0.0.0.0", port=8000, reload=False)
+    serve()
 
 
 if __name__ == "__main__":
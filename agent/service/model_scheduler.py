@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator
+
+from .config import settings
+
+# Highest priority first: a free slot always goes to the first class with a queued call.
+PRIORITY_CLASSES = ("interactive", "background")
+
+_priority: ContextVar[str] = ContextVar("model_call_priority", default="interactive")
+
+
+@contextmanager
+def model_priority(priority: str) -> Iterator[None]:
+    """Run model calls made inside the block (in this thread or task) under ``priority``."""
+    if priority not in PRIORITY_CLASSES:
+        raise ValueError(f"Unknown model call priority {priority!r}")
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+class _Ticket:
+    __slots__ = ("priority", "flow", "enqueued_at", "granted")
+
+    def __init__(self, priority: str, flow: str) -> None:
+        self.priority = priority
+        self.flow = flow
+        self.enqueued_at = time.monotonic()
+        self.granted = threading.Event()
+
+
+class _ClassState:
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.inflight = 0
+        # flow -> FIFO of waiting tickets; flows are served round-robin so one busy caller cannot starve others.
+        self.flows: OrderedDict[str, deque[_Ticket]] = OrderedDict()
+        self.queued = 0
+        self.admitted = 0
+        self.completed = 0
+        self.timeouts = 0
+        self.wait_total_s = 0.0
+        self.wait_max_s = 0.0
+        self.wait_recent_s = 0.0
+
+    def next_ticket(self) -> _Ticket:
+        flow, tickets = next(iter(self.flows.items()))
+        ticket = tickets.popleft()
+        if tickets:
+            self.flows.move_to_end(flow)
+        else:
+            del self.flows[flow]
+        self.queued -= 1
+        return ticket
+
+    def oldest_wait_s(self, now: float) -> float:
+        return max((now - tickets[0].enqueued_at for tickets in self.flows.values()), default=0.0)
+
+
+class ModelCallScheduler:
+    """Admission control for model-provider calls.
+
+    A global in-flight cap (matched to the provider's rate limit) is shared by priority classes,
+    each with its own concurrency limit. Whenever a slot frees up, the highest class with a queued
+    call gets it, so interactive checks overtake queued background work without interrupting calls
+    already running. Within a class, callers are grouped into flows served round-robin.
+    """
+
+    def __init__(self, max_inflight: int, class_limits: dict[str, int] | None = None) -> None:
+        self.max_inflight = max(1, max_inflight)
+        limits = class_limits or {}
+        self._classes = {
+            name: _ClassState(max(1, min(limits.get(name, self.max_inflight), self.max_inflight)))
+            for name in PRIORITY_CLASSES
+        }
+        self._inflight = 0
+        self._lock = threading.Lock()
+
+    def _dispatch(self) -> None:
+        while self._inflight < self.max_inflight:
+            for state in self._classes.values():
+                if state.flows and state.inflight < state.limit:
+                    break
+            else:
+                return
+            ticket = state.next_ticket()
+            wait_s = time.monotonic() - ticket.enqueued_at
+            state.inflight += 1
+            state.admitted += 1
+            state.wait_total_s += wait_s
+            state.wait_max_s = max(state.wait_max_s, wait_s)
+            state.wait_recent_s = 0.8 * state.wait_recent_s + 0.2 * wait_s
+            self._inflight += 1
+            ticket.granted.set()
+
+    def acquire(self, priority: str | None = None, flow: str = "default", timeout_s: float | None = None) -> str:
+        """Block until a slot is granted; returns the class to pass to ``release``.
+
+        Raises TimeoutError if no slot was granted within ``timeout_s``.
+        """
+        priority = priority or current_priority()
+        ticket = _Ticket(priority, flow)
+        with self._lock:
+            state = self._classes[priority]
+            state.flows.setdefault(flow, deque()).append(ticket)
+            state.queued += 1
+            self._dispatch()
+
+        if ticket.granted.wait(timeout_s):
+            return priority
+        with self._lock:
+            if ticket.granted.is_set():
+                return priority
+            tickets = state.flows.get(flow)
+            if tickets is not None:
+                tickets.remove(ticket)
+                if not tickets:
+                    del state.flows[flow]
+            state.queued -= 1
+            state.timeouts += 1
+        raise TimeoutError(f"No {priority} model call slot within {timeout_s}s")
+
+    def release(self, priority: str) -> None:
+        with self._lock:
+            state = self._classes[priority]
+            state.inflight -= 1
+            state.completed += 1
+            self._inflight -= 1
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, flow: str = "default", priority: str | None = None, timeout_s: float | None = None) -> Iterator[None]:
+        granted = self.acquire(priority, flow, timeout_s)
+        try:
+            yield
+        finally:
+            self.release(granted)
+
+    def pressure(self, priority: str = "interactive") -> tuple[int, float]:
+        """(queued calls, age in seconds of the oldest one) for one class; cheap enough to check per request."""
+        with self._lock:
+            state = self._classes[priority]
+            return state.queued, state.oldest_wait_s(time.monotonic())
+
+    def stats(self) -> dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            classes = {
+                name: {
+                    "limit": state.limit,
+                    "inflight": state.inflight,
+                    "queued": state.queued,
+                    "admitted": state.admitted,
+                    "completed": state.completed,
+                    "timeouts": state.timeouts,
+                    "avg_wait_ms": round(state.wait_total_s / state.admitted * 1000, 3) if state.admitted else 0.0,
+                    "max_wait_ms": round(state.wait_max_s * 1000, 3),
+                    "recent_wait_ms": round(state.wait_recent_s * 1000, 3),
+                    "oldest_queued_ms": round(state.oldest_wait_s(now) * 1000, 3),
+                }
+                for name, state in self._classes.items()
+            }
+            return {"max_inflight": self.max_inflight, "inflight": self._inflight, "classes": classes}
+
+
+model_scheduler = ModelCallScheduler(
+    settings.model_max_inflight,
+    {
+        "interactive": settings.model_interactive_max_inflight or settings.model_max_inflight,
+        "background": settings.model_background_max_inflight,
+    },
+)
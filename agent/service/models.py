@@ -1,4 +1,4 @@
-from typing import Any, Dict, List, Literal, Optional
+from typing import Annotated, Any, Dict, List, Literal, Optional
 from pydantic import BaseModel, Field
 
 
@@ -33,10 +33,30 @@ class PhishingRiskRequest(BaseModel):
         default=None,
         description="Locally stored historical transactions used for address similarity comparison",
     )
+    history_chunks: Optional[List[str]] = Field(
+        default=None,
+        max_length=256,
+        description="Hashes of sealed history chunks uploaded to /risk/phishing/chunks, oldest first; "
+        "transactions then carries only the history after them",
+    )
+
+
+class HistoryChunk(BaseModel):
+    hash: str = Field(description="sha256 hex of the chunk's canonical JSON: keys sorted, nulls dropped, no spaces")
+    transactions: List[AccountTransaction] = Field(min_length=1, max_length=2000)
+
+
+class HistoryChunkUploadRequest(BaseModel):
+    chunks: List[HistoryChunk] = Field(min_length=1, max_length=64)
+
+
+class HistoryChunkUploadResponse(BaseModel):
+    stored: List[str] = Field(default_factory=list)
+    rejected: List[str] = Field(default_factory=list, description="Chunks whose content does not match their hash")
 
 
 class ContractCodeInfo(BaseModel):
-    verified: bool
+    verified: Optional[bool] = Field(default=None, description="Source verification status; None when unknown")
     source_code: Optional[str] = None
     bytecode: Optional[str] = None
     compiler_version: Optional[str] = None
@@ -98,11 +118,68 @@ class ContractRiskRequest(BaseModel):
     extra_features: Optional[Dict[str, Any]] = None
 
 
+class ContractTemplateRequest(BaseModel):
+    label: str = Field(description="Template name reported on matches, e.g. a known rug-pull kit")
+    family: Optional[str] = None
+    risk: Optional[Literal["high", "medium", "low"]] = None
+    bytecode: Optional[str] = Field(default=None, description="Runtime bytecode, indexed by opcode shingles")
+    source_code: Optional[str] = Field(default=None, description="Solidity source, indexed by token shingles")
+
+
+class ContractTemplateResponse(BaseModel):
+    indexed: bool
+    opcode_id: Optional[int] = None
+    source_id: Optional[int] = None
+
+
+class LiquidityTick(BaseModel):
+    tick: int = Field(ge=-887272, le=887272)
+    liquidity_net: str = Field(description="Signed liquidityNet of the initialized tick")
+
+
+class ConcentratedLiquidityState(BaseModel):
+    current_tick: int = Field(ge=-887272, le=887272)
+    sqrt_price_x96: Optional[str] = None
+    ticks: List[LiquidityTick] = Field(default_factory=list, max_length=50000)
+    zero_for_one: bool = Field(default=True, description="True when the pay token is token0 of the pool")
+    snapshot_id: Optional[str] = Field(
+        default=None,
+        description="Block number or other snapshot id; identical ids reuse the cached liquidity index",
+    )
+
+
 class SlippagePoolStats(BaseModel):
     price_impact_pct: Optional[float] = None
     token_pay_amount: Optional[str] = None
     token_get_amount: Optional[str] = None
+    token_pay_decimals: Optional[int] = Field(default=None, ge=0, le=36, description="Decimals of the pay token, default 18")
+    token_get_decimals: Optional[int] = Field(default=None, ge=0, le=36, description="Decimals of the get token, default 18")
+    fee_bps: Optional[int] = Field(default=None, ge=0, lt=10000, description="Pool swap fee in bps, default 30 (eGoldAMM)")
     type: Optional[str] = "AMM"
+    block_number: Optional[int] = Field(default=None, description="Block the reserves were read at, when fetched server-side")
+    concentrated: Optional[ConcentratedLiquidityState] = Field(
+        default=None,
+        description="Tick liquidity snapshot, used when type is CLMM",
+    )
+
+
+class OrderBookLevel(BaseModel):
+    price: str = Field(description="Quote token per base token")
+    amount: str = Field(description="Base token amount available at this price")
+
+
+class OrderBookStats(BaseModel):
+    bids: Optional[List[OrderBookLevel]] = Field(default=None, max_length=20000)
+    asks: Optional[List[OrderBookLevel]] = Field(default=None, max_length=20000)
+    spread_bps: Optional[float] = None
+    side: Literal["buy", "sell"] = Field(
+        default="buy",
+        description="buy: pay the quote token and walk the asks | sell: pay the base token and walk the bids",
+    )
+    snapshot_id: Optional[str] = Field(
+        default=None,
+        description="Identical snapshot ids reuse the cached depth index",
+    )
 
 
 class SlippageRiskRequest(BaseModel):
@@ -114,6 +191,53 @@ class SlippageRiskRequest(BaseModel):
         default="swap", description="swap"
     )
     pool: Optional[SlippagePoolStats] = None
+    orderbook: Optional[OrderBookStats] = None
+    slippage_tolerance_pct: Optional[float] = Field(
+        default=None,
+        gt=0,
+        lt=100,
+        description="Minimum-output tolerance of the swap; omitted means no minimum (eGoldAMM has none)",
+    )
+    token_pay_index: Optional[Literal[0, 1]] = Field(
+        default=None,
+        description="Position of the pay token in the pool's getReserves() output; "
+        "when set and pool reserves are missing, the service reads them from chain",
+    )
+
+
+class SlippageCurveRequest(BaseModel):
+    pool_address: Optional[str] = None
+    chain: str = "monad"
+    pool: SlippagePoolStats
+    token_pay_amounts: Optional[List[str]] = Field(
+        default=None,
+        max_length=2000,
+        description="Explicit trade sizes; when omitted the range amount_min..amount_max is sampled",
+    )
+    amount_min: Optional[str] = None
+    amount_max: Optional[str] = None
+    points: int = Field(default=200, ge=2, le=2000)
+    spacing: Literal["linear", "log"] = "linear"
+    slippage_thresholds_pct: List[Annotated[float, Field(gt=0, lt=100)]] = Field(
+        default_factory=lambda: [0.5, 1.0, 3.0],
+        max_length=16,
+        description="Total slippage limits (%) for which the largest allowed trade size is returned",
+    )
+
+
+class RoutePoolReserves(BaseModel):
+    pool_address: str
+    token_pay_amount: str = Field(description="Pool reserve of the pay token")
+    token_get_amount: str = Field(description="Pool reserve of the get token")
+    fee_bps: Optional[int] = Field(default=None, ge=0, lt=10000, description="Default 30 (eGoldAMM)")
+
+
+class SlippageRouteRequest(BaseModel):
+    chain: str = "monad"
+    token_pay_amount: str
+    token_pay_decimals: Optional[int] = Field(default=None, ge=0, le=36)
+    token_get_decimals: Optional[int] = Field(default=None, ge=0, le=36)
+    pools: List[RoutePoolReserves] = Field(min_length=1, max_length=2000)
 
 
 class RiskReason(BaseModel):
@@ -139,6 +263,23 @@ class SecurityRiskResponse(BaseModel):
         max_length=3,
         description="最关键的 3 条风险原因及解释，按重要性排序",
     )
+    degraded: bool = Field(
+        default=False,
+        description="True when the model step was skipped (overload or unavailable) and the result is local-only",
+    )
+    blocklist_label: Optional[str] = Field(
+        default=None,
+        description="Set when the address is on the known-malicious blocklist; the verdict then comes from the list alone",
+    )
+
+
+class ContractJob(BaseModel):
+    job_id: str = Field(description="Derived from the request content; identical submissions share one job")
+    status: Literal["queued", "running", "done", "failed"]
+    result: Optional[SecurityRiskResponse] = None
+    error: Optional[str] = None
+    created_at: float
+    updated_at: float
 
 
 class PhishingRiskResponse(BaseModel):
@@ -164,6 +305,23 @@ class PhishingRiskResponse(BaseModel):
         default="max(prefix,suffix,levenshtein,head_bag_6)",
         description="相似度计算方法说明",
     )
+    degraded: bool = Field(
+        default=False,
+        description="True when the model step was skipped (overload or unavailable) and the result is local-only",
+    )
+    blocklist_label: Optional[str] = Field(
+        default=None,
+        description="Set when the address is on the known-malicious blocklist; the verdict then comes from the list alone",
+    )
+
+
+class MevExposure(BaseModel):
+    exposed: bool = Field(description="Whether a profitable sandwich exists for this trade")
+    slippage_tolerance_pct: Optional[float] = None
+    front_run_amount: str = Field(description="Attacker's optimal front-run size, in the pay token")
+    attacker_profit: str = Field(description="Attacker's maximum profit, in the pay token")
+    victim_loss: str = Field(description="Output the user loses to the sandwich, in the get token")
+    victim_loss_pct: float
 
 
 class SlippageRiskResponse(BaseModel):
@@ -171,3 +329,67 @@ class SlippageRiskResponse(BaseModel):
         description="滑点大小的定性等级。英文可用 high/medium/low/unknown，中文可用 高/中/低/未知。"
     )
     summary: str = Field(description="一句通俗解释为什么会发生这种滑点")
+    mev_exposure: Optional[MevExposure] = Field(
+        default=None,
+        description="Deterministic sandwich/MEV exposure for constant-product pools",
+    )
+    degraded: bool = Field(
+        default=False,
+        description="True when the model step was skipped (overload or unavailable) and the result is local-only",
+    )
+
+
+class SlippageThresholdTradeSize(BaseModel):
+    slippage_pct: float
+    max_token_pay_amount: Optional[float] = Field(
+        default=None,
+        description="Largest trade size within this slippage; null when the pool fee alone exceeds it",
+    )
+
+
+class SlippageCurveResponse(BaseModel):
+    has_required_amounts: bool
+    spot_price: Optional[float] = None
+    fee_bps: int
+    token_pay_amounts: List[float] = Field(default_factory=list)
+    token_get_amounts: List[float] = Field(default_factory=list)
+    execution_prices: List[float] = Field(default_factory=list)
+    slippage_pct: List[float] = Field(default_factory=list)
+    price_impact_pct: List[float] = Field(default_factory=list)
+    max_trade_sizes: List[SlippageThresholdTradeSize] = Field(default_factory=list)
+
+
+class RouteAllocation(BaseModel):
+    pool_address: str
+    token_pay_amount: str
+    expected_amount_out: str
+    share_pct: float
+
+
+class SlippageRouteResponse(BaseModel):
+    has_required_amounts: bool
+    allocations: List[RouteAllocation] = Field(default_factory=list)
+    expected_amount_out: Optional[str] = None
+    split_slippage_pct: Optional[float] = None
+    best_single_pool_address: Optional[str] = None
+    single_pool_amount_out: Optional[str] = None
+    single_pool_slippage_pct: Optional[float] = None
+    slippage_improvement_pct: Optional[float] = None
+
+
+class SlippageMevItem(BaseModel):
+    token_pay_amount: str
+    pool: SlippagePoolStats
+    slippage_tolerance_pct: Optional[float] = Field(default=None, gt=0, lt=100)
+
+
+class SlippageMevBatchRequest(BaseModel):
+    chain: str = "monad"
+    items: List[SlippageMevItem] = Field(min_length=1, max_length=1000)
+
+
+class SlippageMevBatchResponse(BaseModel):
+    results: List[Optional[MevExposure]] = Field(
+        default_factory=list,
+        description="One entry per item, in order; null when reserves or amounts are unusable",
+    )
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, TypeVar
+
+from .config import settings
+
+T = TypeVar("T")
+
+# Set in pool worker processes: work submitted from inside a task runs inline instead of nesting pools.
+_IN_WORKER = False
+
+
+def _mark_worker() -> None:
+    global _IN_WORKER
+    _IN_WORKER = True
+
+
+class CpuPool:
+    """Process pool for CPU-bound analysis stages, so they don't hold the GIL the serving threads need.
+
+    Callers pass a module-level function and compact arguments (bytes, str, tuples) that pickle cheaply.
+    Work below ``threshold`` runs inline, where the hand-off would cost more than it saves, as does work
+    arriving while ``max_pending`` tasks are already queued. A task that overruns ``timeout_s`` raises
+    TimeoutError; its worker cannot be interrupted, so the pool is torn down and rebuilt on next use.
+    A pool that breaks under a task (a crashed worker) costs that task an inline run, not an error.
+
+    Processes start on the first offloaded task, never at import. Call the pool from outside cache
+    builders: a builder holds every concurrent caller of its key for as long as it runs.
+    """
+
+    def __init__(self, workers: int | None = None, max_pending: int | None = None, timeout_s: float | None = None) -> None:
+        self.workers = settings.cpu_pool_workers if workers is None else workers
+        self.max_pending = settings.cpu_pool_max_pending if max_pending is None else max_pending
+        self.timeout_s = settings.cpu_task_timeout_s if timeout_s is None else timeout_s
+        self._executor: ProcessPoolExecutor | None = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self.stats = {"offloaded": 0, "inline": 0, "saturated": 0, "timeouts": 0, "broken": 0}
+
+    def _count(self, outcome: str) -> None:
+        with self._lock:
+            self.stats[outcome] += 1
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # forkserver: workers start from a clean interpreter, not a copy of a threaded server process.
+            self._executor = ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context("forkserver"), initializer=_mark_worker
+            )
+        return self._executor
+
+    def _discard(self, executor: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.kill()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, fn: Callable[..., T], *args: Any, size: int = 0, threshold: int = 0) -> T:
+        with self._lock:
+            wanted = self.workers > 0 and size >= threshold and not _IN_WORKER
+            offload = wanted and self._pending < self.max_pending
+            if offload:
+                executor = self._pool()
+                self._pending += 1
+            else:
+                self.stats["saturated" if wanted else "inline"] += 1
+        if not offload:
+            return fn(*args)
+        try:
+            future = executor.submit(fn, *args)
+            try:
+                result = future.result(self.timeout_s)
+            except TimeoutError:
+                self._count("timeouts")
+                self._discard(executor)
+                raise TimeoutError(f"{getattr(fn, '__name__', fn)} exceeded {self.timeout_s}s in the CPU pool") from None
+        except BrokenProcessPool:
+            self._count("broken")
+            self._discard(executor)
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+        self._count("offloaded")
+        return result
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            self._discard(executor)
+
+
+_POOL: CpuPool | None = None
+_POOL_LOCK = threading.Lock()
+
+
+def cpu_pool() -> CpuPool:
+    """Process-wide pool sized by CPU_POOL_WORKERS (0 runs everything inline)."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = CpuPool()
+        return _POOL
+
+
+def _forget_pool() -> None:
+    # A forked serving worker must not share its parent's pool processes; it starts its own on first use.
+    global _POOL, _POOL_LOCK
+    _POOL = None
+    _POOL_LOCK = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_pool)
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Sequence
+
+from .config import settings
+from .model_scheduler import model_priority
+from .models import AccountTransaction, ContractCodeInfo, ContractRiskRequest, PhishingRiskRequest
+
+
+def select_contracts(transactions: Sequence[AccountTransaction], top_k: int) -> list[str]:
+    """Up to ``top_k`` contract addresses a wallet is likely to touch next.
+
+    Slots alternate between the most frequent and the most recent contracts, so both a wallet's
+    regular dapps and whatever it started using lately are covered.
+    """
+    counts: Counter[str] = Counter()
+    last_seen: dict[str, int] = {}
+    for tx in transactions:
+        address = (tx.contract_address or "").strip().lower()
+        if not address:
+            continue
+        counts[address] += 1
+        last_seen[address] = max(last_seen.get(address, 0), tx.timestamp)
+
+    by_frequency = sorted(counts, key=lambda address: (-counts[address], -last_seen[address]))
+    by_recency = sorted(counts, key=lambda address: -last_seen[address])
+    selected: list[str] = []
+    for pair in zip(by_frequency, by_recency):
+        for address in pair:
+            if len(selected) < top_k and address not in selected:
+                selected.append(address)
+    return selected
+
+
+def digest_contract_calls(digest: dict[str, list[dict[str, Any]]]) -> list[AccountTransaction]:
+    """Contract interactions kept in a history-chunk digest, each transaction once.
+
+    A digest keeps only the newest few transactions per counterparty, so recency survives but a
+    contract's frequency in sealed history is capped at ``RELATED_PER_ADDRESS``.
+    """
+    calls: dict[tuple[Any, str], dict[str, Any]] = {}
+    for txs in digest.values():
+        for tx in txs:
+            contract = str(tx.get("contract_address") or "").strip().lower()
+            if contract:
+                calls.setdefault((tx.get("tx_hash"), contract), tx)
+    return [AccountTransaction.model_validate(tx) for tx in calls.values()]
+
+
+class ContractPrescorer:
+    """Warms a wallet's likely next contracts in the background so interactive checks hit the cache.
+
+    ``score`` (``RiskService.warm_contract``) assesses each contract from its on-chain profile, in
+    the wallet's language and for ``PRESCORE_INTERACTION_TYPE`` (the approval flow's ``approve``).
+    The request is marked unverified, as the approval flow reports a contract the explorer has no
+    source for: that check carries nothing the server lacks, so it scores the same and reuses the
+    narrative. Checks of verified contracts add source and declared permissions and still reuse
+    the code analysis.
+    Work goes through a bounded queue drained by a small pool of daemon threads: when the queue is
+    full new work is dropped rather than queued behind, and a contract warmed within ``ttl_s`` is
+    not scheduled again. Model calls made by the workers run in the ``background`` priority class.
+    """
+
+    def __init__(
+        self,
+        score: Callable[[ContractRiskRequest], Any],
+        top_k: int | None = None,
+        workers: int | None = None,
+        queue_size: int | None = None,
+        ttl_s: float | None = None,
+    ) -> None:
+        self._score = score
+        self.top_k = settings.prescore_top_k if top_k is None else top_k
+        self._workers = settings.prescore_workers if workers is None else workers
+        self._ttl_s = settings.prescore_ttl_s if ttl_s is None else ttl_s
+        self._queue: queue.Queue[ContractRiskRequest] = queue.Queue(
+            maxsize=settings.prescore_queue_size if queue_size is None else queue_size
+        )
+        self._recent: dict[tuple[str, str, str], float] = {}
+        self._threads: list[threading.Thread] = []
+        self._lock = threading.Lock()
+        self.stats = {"queued": 0, "skipped": 0, "dropped": 0, "completed": 0, "failed": 0}
+
+    def _ensure_workers(self) -> None:
+        if self._threads:
+            return
+        for index in range(self._workers):
+            thread = threading.Thread(target=self._work, name=f"contract-prescore-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit_wallet(self, req: PhishingRiskRequest, history: dict[str, list[dict[str, Any]]] | None = None) -> int:
+        """Queue the wallet's top contracts for scoring; returns how many were queued. Never blocks.
+
+        ``history`` is the merged digest of ``req.history_chunks``; its contract calls are ranked
+        together with the unsealed tail in ``req.transactions``.
+        """
+        transactions = (digest_contract_calls(history) if history else []) + list(req.transactions or [])
+        if self.top_k <= 0 or self._workers <= 0 or not transactions:
+            return 0
+        chain = req.chain.lower()
+        lang = "en" if (req.lang or "zh").strip().lower().startswith("en") else "zh"
+        queued = 0
+        now = time.monotonic()
+        with self._lock:
+            self._ensure_workers()
+            for address in select_contracts(transactions, self.top_k):
+                key = (chain, address, lang)
+                if self._recent.get(key, 0.0) > now:
+                    self.stats["skipped"] += 1
+                    continue
+                try:
+                    self._queue.put_nowait(
+                        ContractRiskRequest(
+                            contract_address=address,
+                            chain=chain,
+                            lang=lang,
+                            interaction_type=settings.prescore_interaction_type or None,
+                            code=ContractCodeInfo(verified=False),
+                        )
+                    )
+                except queue.Full:
+                    self.stats["dropped"] += 1
+                    continue
+                self._recent[key] = now + self._ttl_s
+                self.stats["queued"] += 1
+                queued += 1
+            if len(self._recent) > 4 * self._queue.maxsize:
+                self._recent = {key: expiry for key, expiry in self._recent.items() if expiry > now}
+        return queued
+
+    def _work(self) -> None:
+        while True:
+            req = self._queue.get()
+            try:
+                with model_priority("background"):
+                    self._score(req)
+                outcome = "completed"
+            except Exception:
+                outcome = "failed"
+            with self._lock:
+                self.stats[outcome] += 1
+            self._queue.task_done()
+
+    def join(self) -> None:
+        """Block until everything queued so far has been scored."""
+        self._queue.join()
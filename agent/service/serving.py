@@ -0,0 +1,365 @@
+from __future__ import annotations
+
+import asyncio
+import importlib
+import logging
+import mmap
+import os
+import signal
+import socket
+import struct
+import time
+import traceback
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+import uvicorn
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+PACKAGE = __package__ or "service"
+APP = f"{PACKAGE}.main:app"
+
+# Imported by the supervisor before forking so every worker shares the pages copy-on-write.
+PRELOAD_MODULES = ("numpy", "langchain", "langchain_openai", "fastapi", "pydantic", f"{PACKAGE}.handlers", f"{PACKAGE}.agents")
+
+# One 64-byte slot per worker; every field is 8 bytes wide, so field i lives at offset 8 * i.
+_FIELDS = ("pid", "generation", "started_at", "heartbeat_at", "ready", "requests", "inflight", "errors")
+_CODES = dict(zip(_FIELDS, "qqddqqqq"))
+_SLOT = struct.Struct("<" + "".join(_CODES.values()))
+_OFFSETS = {name: 8 * i for i, name in enumerate(_FIELDS)}
+
+
+class WorkerHealthTable:
+    """Per-worker status slots in anonymous shared memory; created before fork, so all processes see one table.
+
+    Each worker writes only its own slot, and only while the slot's pid is its own: a replacement
+    worker that claims the slot during a reload silences the draining one.
+    """
+
+    def __init__(self, slots: int) -> None:
+        self.slots = slots
+        self._map = mmap.mmap(-1, _SLOT.size * slots)
+
+    def _get(self, index: int, field: str) -> Any:
+        return struct.unpack_from(f"<{_CODES[field]}", self._map, index * _SLOT.size + _OFFSETS[field])[0]
+
+    def _put(self, index: int, field: str, value: Any) -> None:
+        struct.pack_into(f"<{_CODES[field]}", self._map, index * _SLOT.size + _OFFSETS[field], value)
+
+    def claim(self, index: int, pid: int, generation: int) -> None:
+        now = time.time()
+        _SLOT.pack_into(self._map, index * _SLOT.size, pid, generation, now, now, 0, 0, 0, 0)
+
+    def restore(self, slot: dict[str, Any]) -> None:
+        """Write back a slot as ``read`` returned it, e.g. to hand it back to a worker that was not replaced."""
+        _SLOT.pack_into(self._map, slot["index"] * _SLOT.size, *(slot[field] for field in _FIELDS))
+
+    def owns(self, index: int, pid: int) -> bool:
+        return self._get(index, "pid") == pid
+
+    def beat(self, index: int, pid: int, ready: bool) -> None:
+        if self.owns(index, pid):
+            self._put(index, "heartbeat_at", time.time())
+            self._put(index, "ready", int(ready))
+
+    def add(self, index: int, pid: int, field: str, delta: int) -> None:
+        if self.owns(index, pid):
+            self._put(index, field, self._get(index, field) + delta)
+
+    def read(self, index: int) -> dict[str, Any]:
+        slot = dict(zip(_FIELDS, _SLOT.unpack_from(self._map, index * _SLOT.size)))
+        slot["index"] = index
+        slot["ready"] = bool(slot["ready"])
+        slot["heartbeat_age_s"] = round(max(time.time() - slot["heartbeat_at"], 0.0), 3) if slot["pid"] else None
+        return slot
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        return [self.read(index) for index in range(self.slots)]
+
+
+_WORKER: tuple[WorkerHealthTable, int] | None = None
+
+
+def _current_worker() -> tuple[WorkerHealthTable, int]:
+    """This process's slot; a process not started by the supervisor gets a one-slot table of its own."""
+    global _WORKER
+    if _WORKER is None or not _WORKER[0].owns(_WORKER[1], os.getpid()):
+        table = WorkerHealthTable(1)
+        table.claim(0, os.getpid(), 0)
+        table.beat(0, os.getpid(), ready=True)
+        _WORKER = (table, 0)
+    return _WORKER
+
+
+@contextmanager
+def worker_request() -> Iterator[None]:
+    """Count one request against this worker's health slot."""
+    table, index = _current_worker()
+    pid = os.getpid()
+    table.add(index, pid, "inflight", 1)
+    try:
+        yield
+    except BaseException:
+        table.add(index, pid, "errors", 1)
+        raise
+    finally:
+        table.add(index, pid, "inflight", -1)
+        table.add(index, pid, "requests", 1)
+
+
+def worker_failed() -> None:
+    table, index = _current_worker()
+    table.add(index, os.getpid(), "errors", 1)
+
+
+def health_report() -> dict[str, Any]:
+    table, index = _current_worker()
+    if table.slots == 1:
+        table.beat(index, os.getpid(), ready=True)
+    workers = [slot for slot in table.snapshot() if slot["pid"]]
+    return {"worker": table.read(index), "workers": workers}
+
+
+def warm_shared_data(refresh: bool = False) -> None:
+    """Open the read-only data (selector table, scoring weights, clone indexes, blocklist) in this process.
+
+    mmap'd tables opened before fork are mapped once and shared by every worker; ``refresh``
+    drops the current handles first so a reload picks up files replaced on disk.
+    """
+    from .analysis import blocklist, clone_index, scoring, selectors
+
+    if refresh:
+        with blocklist._LIST_LOCK:
+            blocklist._LIST = blocklist._STAMP = blocklist._CHECKED_AT = None
+        with selectors._DB_LOCK:
+            selectors._DB = None
+        with scoring._SCORER_LOCK:
+            scoring._SCORER = None
+        with clone_index._INDEXES_LOCK:
+            clone_index._INDEXES.clear()
+    selectors.selector_db()
+    scoring.contract_scorer()
+    for kind in ("opcode", "source"):
+        clone_index.clone_index(kind)
+    blocklist.blocklist()
+
+
+class Supervisor:
+    """Pre-fork process manager: one listening socket, ``workers`` uvicorn processes serving it.
+
+    SIGHUP re-reads shared data and replaces workers one at a time (the new worker is ready before
+    the old one is asked to drain; a replacement that never gets ready is killed, its old worker
+    kept, and the reload stopped there); SIGTERM/SIGINT drain every worker and exit. Workers that
+    die are respawned, and workers whose event loop stops heart-beating for ``worker_timeout_s``
+    are killed.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        workers: int,
+        graceful_timeout_s: float | None = None,
+        worker_timeout_s: float | None = None,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        self.graceful_timeout_s = settings.http_graceful_timeout_s if graceful_timeout_s is None else graceful_timeout_s
+        self.worker_timeout_s = settings.http_worker_timeout_s if worker_timeout_s is None else worker_timeout_s
+        self.generation = 0
+        self.table = WorkerHealthTable(self.workers)
+        self._pids: dict[int, int] = {}
+        self._draining: dict[int, float] = {}
+        self._spawned_at: dict[int, float] = {}
+        self._sock: socket.socket | None = None
+        self._reload = False
+        self._stopping = False
+
+    def preload(self, refresh: bool = False) -> None:
+        for module in PRELOAD_MODULES:
+            try:
+                importlib.import_module(module)
+            except ImportError:
+                logger.warning("preload of %s failed", module)
+        warm_shared_data(refresh=refresh)
+
+    def _bind(self) -> socket.socket:
+        family = socket.AF_INET6 if ":" in self.host else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        return sock
+
+    def run(self) -> None:
+        self.preload()
+        self._sock = self._bind()
+        signal.signal(signal.SIGHUP, lambda *_: setattr(self, "_reload", True))
+        signal.signal(signal.SIGTERM, lambda *_: setattr(self, "_stopping", True))
+        signal.signal(signal.SIGINT, lambda *_: setattr(self, "_stopping", True))
+        for index in range(self.workers):
+            self._spawn(index)
+        try:
+            while not self._stopping:
+                self._reap()
+                self._check_heartbeats()
+                if self._reload:
+                    self._reload = False
+                    self._rolling_reload()
+                time.sleep(0.2)
+        finally:
+            self._shutdown()
+
+    def _spawn(self, index: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self._serve_child(index)
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        self._pids[index] = pid
+        self._spawned_at[index] = time.monotonic()
+
+    def _serve_child(self, index: int) -> None:
+        global _WORKER
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, signal.SIG_DFL)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        self.table.claim(index, os.getpid(), self.generation)
+        _WORKER = (self.table, index)
+        settings.worker_id = index
+        config = uvicorn.Config(APP, timeout_graceful_shutdown=int(self.graceful_timeout_s))
+        config.setup_event_loop()
+        server = uvicorn.Server(config)
+        asyncio.run(self._serve_with_heartbeat(server, index))
+
+    async def _serve_with_heartbeat(self, server: uvicorn.Server, index: int) -> None:
+        async def heartbeat() -> None:
+            pid = os.getpid()
+            while True:
+                self.table.beat(index, pid, ready=server.started)
+                await asyncio.sleep(1.0)
+
+        task = asyncio.create_task(heartbeat())
+        try:
+            assert self._sock is not None
+            await server.serve(sockets=[self._sock])
+        finally:
+            task.cancel()
+
+    def _reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            self._draining.pop(pid, None)
+            for index, current in list(self._pids.items()):
+                if current == pid:
+                    del self._pids[index]
+                    logger.warning("worker %s (pid %s) exited with status %s", index, pid, status)
+                    if not self._stopping:
+                        # A worker that dies right after starting is likely to again: don't spin.
+                        if time.monotonic() - self._spawned_at.get(index, 0.0) < 5.0:
+                            time.sleep(1.0)
+                        self._spawn(index)
+
+    def _check_heartbeats(self) -> None:
+        now = time.time()
+        for index, pid in list(self._pids.items()):
+            slot = self.table.read(index)
+            if slot["ready"] and slot["pid"] == pid and now - slot["heartbeat_at"] > self.worker_timeout_s:
+                logger.warning("worker %s (pid %s) stopped heart-beating; killing it", index, pid)
+                self._kill(pid, signal.SIGKILL)
+        for pid, deadline in list(self._draining.items()):
+            if time.monotonic() > deadline:
+                self._kill(pid, signal.SIGKILL)
+                self._draining.pop(pid, None)
+
+    def _rolling_reload(self) -> None:
+        self.generation += 1
+        self.preload(refresh=True)
+        for index, old_pid in list(self._pids.items()):
+            previous = self.table.read(index)
+            self._spawn(index)
+            new_pid = self._pids[index]
+            if not self._wait_ready(index):
+                logger.error("worker %s (pid %s) never became ready; keeping pid %s and stopping the reload", index, new_pid, old_pid)
+                self._pids[index] = old_pid
+                self.table.restore(previous)
+                self._kill(new_pid, signal.SIGKILL)
+                return
+            self._draining[old_pid] = time.monotonic() + self.graceful_timeout_s
+            self._kill(old_pid, signal.SIGTERM)
+
+    def _wait_ready(self, index: int) -> bool:
+        pid = self._pids[index]
+        deadline = time.monotonic() + max(self.worker_timeout_s, 5.0)
+        while time.monotonic() < deadline and not self._stopping:
+            slot = self.table.read(index)
+            if slot["pid"] == pid and slot["ready"]:
+                return True
+            try:
+                if os.waitpid(pid, os.WNOHANG)[0] == pid:
+                    return False  # died while starting (e.g. the new code fails to import)
+            except ChildProcessError:
+                return False
+            time.sleep(0.05)
+        return False
+
+    def _kill(self, pid: int, signum: int) -> None:
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def _shutdown(self) -> None:
+        self._stopping = True
+        pids = list(self._pids.values()) + list(self._draining)
+        for pid in pids:
+            self._kill(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout_s
+        while pids and time.monotonic() < deadline:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid:
+                pids = [item for item in pids if item != pid]
+            else:
+                time.sleep(0.05)
+        for pid in pids:
+            self._kill(pid, signal.SIGKILL)
+        if self._sock is not None:
+            self._sock.close()
+
+
+def serve(host: str | None = None, port: int | None = None, workers: int | None = None) -> None:
+    """HTTP entrypoint: a single uvicorn process for HTTP_WORKERS=1, else the pre-fork supervisor."""
+    host = settings.http_host if host is None else host
+    port = settings.http_port if port is None else port
+    workers = settings.http_workers if workers is None else workers
+    if workers > 1 and not settings.job_store_path:
+        # An in-memory job store lives in one worker; polls routed to the others would 404.
+        raise SystemExit("HTTP_WORKERS > 1 needs a file-backed job store shared by the workers: set JOB_STORE_PATH")
+    if workers <= 1:
+        uvicorn.run(APP, host=host, port=port, reload=False)
+        return
+    Supervisor(host, port, workers).run()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    # Under ``python -m`` this file is __main__; workers must share state with the module the app imports.
+    importlib.import_module(f"{PACKAGE}.serving").serve()
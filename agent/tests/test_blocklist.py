@@ -0,0 +1,97 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+try:
+    from service import handlers
+    from service.analysis import blocklist as blocklist_module
+    from service.analysis.blocklist import Blocklist, blocklist_label, build_blocklist
+    from service.config import settings
+    from service.models import ContractRiskRequest, PhishingRiskRequest
+except ModuleNotFoundError:
+    from agent.service import handlers
+    from agent.service.analysis import blocklist as blocklist_module
+    from agent.service.analysis.blocklist import Blocklist, blocklist_label, build_blocklist
+    from agent.service.config import settings
+    from agent.service.models import ContractRiskRequest, PhishingRiskRequest
+
+import pytest
+
+POISONER = "0x84bc7ee53e8b2eb827738148b902d45f10eda2b8"
+DRAINER = "0x0000000000000000000000000000000000d4a1e4"
+
+
+@pytest.fixture
+def blocklist_file(tmp_path, monkeypatch) -> Path:
+    path = tmp_path / "blocklist.bin"
+    build_blocklist([f"{POISONER} address-poisoning", f"{DRAINER.upper().replace('0X', '0x')} drainer"], path)
+    monkeypatch.setattr(settings, "blocklist_path", str(path))
+    monkeypatch.setattr(settings, "blocklist_check_interval_s", 0.0)
+    monkeypatch.setattr(blocklist_module, "_CHECKED_AT", None)
+    return path
+
+
+def test_lookup_confirms_listed_addresses_only(tmp_path) -> None:
+    listed = [f"0x{i * 7919:040x}" for i in range(1, 5001)]
+    path = tmp_path / "list.bin"
+    assert build_blocklist(["# known bad", *listed, f"{listed[0]} duplicate", ""], path) == 5000
+    table = Blocklist(path)
+
+    assert all(table.lookup(address) == "blocklisted" for address in listed[::97])
+    assert table.lookup(listed[3].upper().replace("0X", "0x")) == "blocklisted"
+    assert table.lookup("0x" + "f" * 40) is None
+    assert table.lookup("not an address") is None
+    # The filter is ~1.2 bytes per entry; false positives never reach the caller.
+    assert table.bits // 8 < 1.3 * 5000
+    unlisted = [f"0x{i * 7919 + 1:040x}" for i in range(1, 20001)]
+    assert all(table.lookup(address) is None for address in unlisted)
+    assert sum(table._in_filter(bytes.fromhex(address[2:])) for address in unlisted) < 20000 * 0.03
+
+
+def test_rebuilt_file_is_swapped_in_without_restart(blocklist_file) -> None:
+    assert blocklist_label(POISONER) == "address-poisoning"
+    assert blocklist_label(DRAINER) == "drainer"
+
+    build_blocklist([f"{DRAINER} drainer", "0x" + "ab" * 20 + " drainer"], blocklist_file)
+    assert blocklist_label(POISONER) is None
+    assert blocklist_label("0x" + "ab" * 20) == "drainer"
+
+
+def test_build_cli_writes_a_loadable_list(tmp_path) -> None:
+    source = tmp_path / "addresses.txt"
+    source.write_text(f"{POISONER} address-poisoning\n", encoding="utf-8")
+    output = tmp_path / "out.bin"
+    agent_dir = Path(__file__).resolve().parents[1]
+    subprocess.run(
+        [sys.executable, "-m", "service.analysis.blocklist", "build", str(source), str(output)],
+        cwd=agent_dir,
+        env={**os.environ, "MODEL_API_KEY": os.environ.get("MODEL_API_KEY", "test")},
+        check=True,
+        capture_output=True,
+    )
+    assert Blocklist(output).lookup(POISONER) == "address-poisoning"
+
+
+class _NoModel:
+    def run(self, req):
+        raise AssertionError("blocklisted requests must not reach the model")
+
+    run_local = run
+
+
+def test_blocklisted_requests_skip_the_model(blocklist_file) -> None:
+    service = handlers.RiskService()
+    service._phishing_agent = service._contract_agent = _NoModel()
+
+    phishing = service.phishing(PhishingRiskRequest(address=POISONER, lang="en"))
+    assert (phishing.risk_level, phishing.blocklist_label) == ("high", "address-poisoning")
+
+    contract = service.contract(ContractRiskRequest(contract_address=DRAINER, chain="monad", lang="zh"))
+    assert (contract.risk_level, contract.blocklist_label) == ("高", "drainer")
+    assert len(contract.top_reasons) == 3
+
+    proxied = service.contract(
+        ContractRiskRequest(contract_address="0x" + "1" * 40, proxy={"is_proxy": True, "implementation_address": DRAINER})
+    )
+    assert proxied.blocklist_label == "drainer"
@@ -0,0 +1,149 @@
+import socketserver
+import sqlite3
+import threading
+import time
+
+import pytest
+
+try:
+    from service.cache import CacheNamespace, MemoryBackend, ModelCodec, RedisBackend, SQLiteBackend
+    from service.models import SecurityRiskResponse
+except ModuleNotFoundError:
+    from agent.service.cache import CacheNamespace, MemoryBackend, ModelCodec, RedisBackend, SQLiteBackend
+    from agent.service.models import SecurityRiskResponse
+
+
+class StubRedisServer:
+    """Local RESP server with GET / SET [PX] / DEL, standing in for Redis."""
+
+    def __init__(self) -> None:
+        self.data: dict[bytes, tuple[bytes, float]] = {}
+        self.commands: list[bytes] = []
+        stub = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self) -> None:
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    parts = []
+                    for _ in range(int(line[1:-2])):
+                        size = int(self.rfile.readline()[1:-2])
+                        parts.append(self.rfile.read(size + 2)[:-2])
+                    self.wfile.write(stub._answer(parts))
+
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"redis://127.0.0.1:{self.server.server_address[1]}/0"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def _answer(self, parts: list[bytes]) -> bytes:
+        command = parts[0].upper()
+        self.commands.append(command)
+        if command == b"GET":
+            value, expires_at = self.data.get(parts[1], (None, 0.0))
+            if value is None or expires_at <= time.time():
+                return b"$-1\r\n"
+            return b"$%d\r\n%s\r\n" % (len(value), value)
+        if command == b"SET":
+            ttl_s = int(parts[4]) / 1000 if len(parts) > 4 and parts[3].upper() == b"PX" else 3600.0
+            self.data[parts[1]] = (parts[2], time.time() + ttl_s)
+            return b"+OK\r\n"
+        if command == b"DEL":
+            return b":%d\r\n" % int(self.data.pop(parts[1], None) is not None)
+        return b"-ERR unknown command\r\n"
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def redis_server():
+    server = StubRedisServer()
+    yield server
+    server.close()
+
+
+def _response(summary: str) -> SecurityRiskResponse:
+    reasons = [{"reason": f"reason {i}", "explanation": "stub " * 200} for i in range(3)]
+    return SecurityRiskResponse(risk_level="low", summary=summary, confidence=0.6, top_reasons=reasons)
+
+
+def _namespace(shared: list, ttl_s: float = 60.0) -> CacheNamespace:
+    return CacheNamespace("contract", ttl_s, ModelCodec(SecurityRiskResponse), memory=MemoryBackend(16), shared=shared)
+
+
+def test_sqlite_tier_is_shared_between_workers(tmp_path) -> None:
+    path = str(tmp_path / "cache.sqlite")
+    worker_a = _namespace([SQLiteBackend(path)])
+    worker_b = _namespace([SQLiteBackend(path)])
+    builds: list[str] = []
+
+    first = worker_a.get_or_build("k", lambda: builds.append("a") or _response("from a"))
+    second = worker_b.get_or_build("k", lambda: builds.append("b") or _response("from b"))
+
+    assert builds == ["a"]
+    assert second == first
+    assert worker_b.stats["shared_hits"] == 1
+    # The shared hit was copied into worker b's own memory tier.
+    worker_b.get("k")
+    assert worker_b.stats["hits"] == 1
+
+
+def test_redis_tier_read_through_backfills_nearer_tiers(tmp_path, redis_server) -> None:
+    node_a = _namespace([RedisBackend(redis_server.url)])
+    node_a.set("k", _response("remote"))
+    sqlite = SQLiteBackend(str(tmp_path / "cache.sqlite"))
+    node_b = _namespace([sqlite, RedisBackend(redis_server.url)])
+
+    assert node_b.get("k").summary == "remote"
+    assert sqlite.get("lw:contract:k") is not None
+    assert redis_server.commands.count(b"SET") == 1
+
+    node_b.delete("k")
+    assert node_a.shared[0].get("lw:contract:k") is None
+
+
+def test_entries_expire_with_the_namespace_ttl(redis_server) -> None:
+    namespace = _namespace([RedisBackend(redis_server.url)], ttl_s=0.05)
+    namespace.set("k", _response("short"))
+    assert namespace.get("k") is not None
+    time.sleep(0.1)
+    assert namespace.get("k") is None
+    assert _namespace([RedisBackend(redis_server.url)]).get("k") is None
+
+
+def test_unreachable_redis_is_a_miss_not_an_error(redis_server) -> None:
+    url = redis_server.url
+    redis_server.close()
+    namespace = _namespace([RedisBackend(url, timeout_s=0.1)])
+
+    assert namespace.get_or_build("k", lambda: _response("built")).summary == "built"
+    assert namespace.get("k").summary == "built"
+    assert namespace.stats["errors"] >= 1
+
+
+def test_locked_sqlite_tier_is_a_miss_not_an_error(tmp_path) -> None:
+    path = str(tmp_path / "cache.sqlite")
+    tier = SQLiteBackend(path, timeout_s=0.05)
+    namespace = _namespace([tier])
+    namespace.set("k", _response("before lock"))
+
+    # WAL readers carry on under another connection's exclusive lock; writers get "database is locked".
+    holder = sqlite3.connect(path, isolation_level=None)
+    holder.execute("BEGIN EXCLUSIVE")
+    try:
+        namespace.set("k", _response("during lock"))
+        namespace.delete("k")
+        assert namespace.get_or_build("j", lambda: _response("built")).summary == "built"
+        assert namespace.stats["errors"] == 3
+    finally:
+        holder.execute("ROLLBACK")
+        holder.close()
+
+    tier._conn.close()
+    namespace.memory.clear()
+    assert namespace.get("k") is None
+    assert namespace.stats["errors"] == 4
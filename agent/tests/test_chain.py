@@ -0,0 +1,249 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable
+
+import pytest
+
+try:
+    from service.chain.contracts import (
+        EIP1967_ADMIN_SLOT,
+        EIP1967_IMPLEMENTATION_SLOT,
+        OWNER_SELECTOR,
+        ContractProfileFetcher,
+    )
+    from service.chain.reserves import GET_RESERVES_SELECTOR, ReserveFetcher
+    from service.chain.rpc import JsonRpcClient, JsonRpcError
+    from service.config import settings
+    from service.handlers import RiskService
+    from service.models import ContractRiskRequest, SlippageRiskRequest
+except ModuleNotFoundError:
+    from agent.service.chain.contracts import (
+        EIP1967_ADMIN_SLOT,
+        EIP1967_IMPLEMENTATION_SLOT,
+        OWNER_SELECTOR,
+        ContractProfileFetcher,
+    )
+    from agent.service.chain.reserves import GET_RESERVES_SELECTOR, ReserveFetcher
+    from agent.service.chain.rpc import JsonRpcClient, JsonRpcError
+    from agent.service.config import settings
+    from agent.service.handlers import RiskService
+    from agent.service.models import ContractRiskRequest, SlippageRiskRequest
+
+
+POOL = "0x00000000000000000000000000000000000000aa"
+
+
+class StubRpcServer:
+    """Local JSON-RPC endpoint; ``methods`` maps a method name to a handler over its params."""
+
+    def __init__(self, methods: dict[str, Callable[[list[Any]], Any]], delay_s: float = 0.0) -> None:
+        self.methods = methods
+        self.delay_s = delay_s
+        self.http_requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                stub.http_requests += 1
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                time.sleep(stub.delay_s)
+                if isinstance(body, list):
+                    payload: Any = [stub._answer(item) for item in body]
+                else:
+                    payload = stub._answer(body)
+                data = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        self._thread.start()
+
+    def _answer(self, item: dict[str, Any]) -> dict[str, Any]:
+        handler = self.methods.get(item["method"])
+        if handler is None:
+            return {"jsonrpc": "2.0", "id": item["id"], "error": {"code": -32601, "message": "method not found"}}
+        try:
+            return {"jsonrpc": "2.0", "id": item["id"], "result": handler(item["params"])}
+        except Exception as exc:
+            return {"jsonrpc": "2.0", "id": item["id"], "error": {"code": 3, "message": str(exc)}}
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def _words(*values: int) -> str:
+    return "0x" + "".join(f"{value:064x}" for value in values)
+
+
+def _reserves_call(params: list[Any]) -> str:
+    call = params[0]
+    assert call["data"] == GET_RESERVES_SELECTOR
+    if call["to"] != POOL:
+        raise ValueError("execution reverted")
+    return _words(1000 * 10**18, 900 * 10**18)
+
+
+@pytest.fixture
+def rpc_stub(monkeypatch: pytest.MonkeyPatch):
+    stub = StubRpcServer({"eth_blockNumber": lambda params: "0x10", "eth_call": _reserves_call}, delay_s=0.05)
+    monkeypatch.setattr(settings, "rpc_url", stub.url)
+    yield stub
+    stub.close()
+
+
+def test_rpc_batch_returns_results_in_order(rpc_stub: StubRpcServer) -> None:
+    client = JsonRpcClient(rpc_stub.url)
+    results = client.batch([("eth_blockNumber", []), ("eth_unknown", []), ("eth_blockNumber", [])])
+
+    assert results[0] == "0x10"
+    assert isinstance(results[1], JsonRpcError)
+    assert results[2] == "0x10"
+    assert rpc_stub.http_requests == 1
+
+
+def test_reserve_fetcher_caches_and_shares_inflight(rpc_stub: StubRpcServer) -> None:
+    fetcher = ReserveFetcher(ttl_s=60)
+    results: list[dict[str, Any]] = []
+    threads = [threading.Thread(target=lambda: results.append(fetcher.get_reserves("monad", POOL))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert rpc_stub.http_requests == 1
+    assert all(item == {"reserve0": 1000 * 10**18, "reserve1": 900 * 10**18, "block_number": 16} for item in results)
+    assert fetcher.snapshot_at("monad", POOL.upper().replace("0X", "0x"), 16) is not None
+
+    fetcher.get_reserves("monad", POOL)
+    assert rpc_stub.http_requests == 1
+
+
+def test_reserve_fetcher_ttl_expiry_and_errors(rpc_stub: StubRpcServer) -> None:
+    fetcher = ReserveFetcher(ttl_s=0)
+    fetcher.get_reserves("monad", POOL)
+    fetcher.get_reserves("monad", POOL)
+    assert rpc_stub.http_requests == 2
+
+    with pytest.raises(JsonRpcError):
+        fetcher.get_reserves("monad", "0x00000000000000000000000000000000000000bb")
+
+
+def test_slippage_request_fills_reserves_from_chain(rpc_stub: StubRpcServer) -> None:
+    service = RiskService()
+    req = service._with_pool_reserves(
+        SlippageRiskRequest(pool_address=POOL, token_pay_amount="10", token_pay_index=1)
+    )
+
+    assert req.pool is not None
+    assert req.pool.token_pay_amount == "900"
+    assert req.pool.token_get_amount == "1000"
+    assert req.pool.block_number == 16
+
+
+def test_fetched_reserves_feed_pool_history(rpc_stub: StubRpcServer) -> None:
+    service = RiskService()
+    service._reserve_history.clear()
+    service._reserve_fetcher.get_reserves("monad", POOL)
+    req = service._record_reserves(
+        SlippageRiskRequest(
+            pool_address=POOL,
+            token_pay_amount="10",
+            pool={"token_pay_amount": "800", "token_get_amount": "1100", "block_number": 17},
+        )
+    )
+
+    assert req.token_pay_index == 1
+    metrics = service._reserve_history.metrics("monad", POOL, req.token_pay_index)
+    assert metrics["samples"] == 2
+    assert metrics["window_blocks"] == 1
+    assert metrics["reserve_pay_drift_pct"] == round((800 / 900 - 1) * 100, 6)
+
+
+PROXY = "0x00000000000000000000000000000000000000cc"
+IMPLEMENTATION = 0xBE << 152
+OWNER = 0x11 << 152
+
+
+def _storage(params: list[Any]) -> str:
+    address, slot = params[0], params[1]
+    if address == PROXY and slot == EIP1967_IMPLEMENTATION_SLOT:
+        return _words(IMPLEMENTATION)
+    if address == PROXY and slot == EIP1967_ADMIN_SLOT:
+        return _words(0xAD)
+    return _words(0)
+
+
+def _owner_call(params: list[Any]) -> str:
+    call = params[0]
+    if call["data"] != OWNER_SELECTOR or call["to"] != PROXY:
+        raise ValueError("execution reverted")
+    return _words(OWNER)
+
+
+@pytest.fixture
+def contract_rpc_stub(monkeypatch: pytest.MonkeyPatch):
+    stub = StubRpcServer(
+        {
+            "eth_blockNumber": lambda params: "0x20",
+            "eth_getCode": lambda params: "0x6080604052" if params[0] == PROXY else "0x",
+            "eth_getStorageAt": _storage,
+            "eth_call": _owner_call,
+        }
+    )
+    monkeypatch.setattr(settings, "rpc_url", stub.url)
+    yield stub
+    stub.close()
+
+
+def test_contract_profile_is_one_batched_request(contract_rpc_stub: StubRpcServer) -> None:
+    fetcher = ContractProfileFetcher(ttl_s=60)
+    profile = fetcher.get_profile("monad", PROXY.upper().replace("0X", "0x"))
+
+    assert profile == {
+        "block_number": 32,
+        "bytecode": "0x6080604052",
+        "implementation_address": f"0x{IMPLEMENTATION:040x}",
+        "admin_address": f"0x{0xAD:040x}",
+        "owner": f"0x{OWNER:040x}",
+    }
+    assert contract_rpc_stub.http_requests == 1
+    assert fetcher.get_profile("monad", PROXY) is profile
+    assert fetcher.profile_at("monad", PROXY, 32) is profile
+    assert contract_rpc_stub.http_requests == 1
+
+    eoa = fetcher.get_profile("monad", POOL)
+    assert eoa["bytecode"] is None and eoa["owner"] is None
+
+
+def test_contract_request_is_enriched_from_chain(contract_rpc_stub: StubRpcServer) -> None:
+    service = RiskService()
+    req = service._with_contract_profile(
+        ContractRiskRequest(contract_address=PROXY, permissions={"owner": "0x" + "22" * 20, "can_mint": True})
+    )
+
+    assert req.code is not None and req.code.bytecode == "0x6080604052" and req.code.verified is None
+    assert req.proxy is not None and req.proxy.is_proxy is True
+    assert req.proxy.implementation_address == f"0x{IMPLEMENTATION:040x}"
+    assert req.permissions.owner == "0x" + "22" * 20
+    assert req.permissions.admin == f"0x{0xAD:040x}"
+    assert req.permissions.can_mint is True
+    assert contract_rpc_stub.http_requests == 1
+
+    untouched = ContractRiskRequest(contract_address=POOL)
+    assert service._with_contract_profile(untouched) is untouched
+
+    declared = service._with_contract_profile(ContractRiskRequest(contract_address=PROXY, proxy={"is_proxy": False}))
+    assert declared.proxy is not None and declared.proxy.is_proxy is False
+    assert declared.proxy.implementation_address is None
+    assert declared.code is not None and declared.code.bytecode == "0x6080604052"
@@ -0,0 +1,67 @@
+import json
+
+try:
+    from service import codec
+    from service import main as service_main
+    from service.models import PhishingRiskRequest, PhishingRiskResponse
+except ModuleNotFoundError:
+    from agent.service import codec
+    from agent.service import main as service_main
+    from agent.service.models import PhishingRiskRequest, PhishingRiskResponse
+
+from fastapi.testclient import TestClient
+
+BODY = {
+    "address": "0x" + "1" * 40,
+    "lang": "en",
+    "transactions": [
+        {"tx_hash": f"0x{i}", "timestamp": i, "from_address": f"0x{i:040x}", "value": "1", "success": True}
+        for i in range(50)
+    ],
+}
+
+
+def test_decode_and_encode_match_pydantic() -> None:
+    body = json.dumps(BODY).encode()
+    decoded = codec.decode(PhishingRiskRequest, body)
+    assert decoded == PhishingRiskRequest.model_validate(BODY)
+
+    response = PhishingRiskResponse(
+        risk_level="low",
+        summary="ok",
+        confidence=0.5,
+        most_similar_similarity=0.5,
+        most_similar_transactions=BODY["transactions"][:2],
+    )
+    assert json.loads(codec.encode(response)) == json.loads(response.model_dump_json())
+
+
+def test_codec_routes_keep_fastapi_validation_errors() -> None:
+    client = TestClient(service_main.app)
+
+    missing = client.post("/risk/phishing", json={"chain": "monad"})
+    assert missing.status_code == 422
+    assert missing.json()["detail"][0]["loc"] == ["body", "address"]
+
+    broken = client.post("/risk/contract", content=b"{not json", headers={"Content-Type": "application/json"})
+    assert broken.status_code == 422
+    assert broken.json()["detail"][0]["type"] == "json_invalid"
+
+
+def test_codec_routes_return_model_json_and_document_their_bodies() -> None:
+    client = TestClient(service_main.app)
+    response = client.post("/risk/phishing", json=BODY)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    PhishingRiskResponse.model_validate_json(response.content)
+
+    spec = client.get("/openapi.json").json()
+    body_schema = spec["paths"]["/risk/phishing"]["post"]["requestBody"]["content"]["application/json"]["schema"]
+    assert body_schema == {"$ref": "#/components/schemas/PhishingRiskRequest"}
+    assert "AccountTransaction" in spec["components"]["schemas"]
+
+
+def test_benchmark_reports_both_paths() -> None:
+    result = codec._benchmark(transactions=20, rounds=2)
+    assert result["transactions"] == 20
+    assert result["before_ms"] > 0 and result["after_ms"] > 0
@@ -0,0 +1,579 @@
+import json
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+try:
+    from service.agents.ContractAgent import ContractRiskAgent, ContractRiskLLMNarrative
+    from service.agents.PhishingAgent import PhishingRiskAgent
+    from service.analysis import clone_index as clone_index_module
+    from service.analysis import solidity as solidity_module
+    from service.analysis.bytecode import disassemble, resolve_minimal_proxy, scan_bytecode, strip_metadata
+    from service.analysis.keccak import function_selector, keccak256_hex
+    from service.analysis.clone_index import CloneIndex, add_clone_template, minhash, opcode_shingles
+    from service.analysis.scoring import BUNDLED_CONFIG_PATH, ContractScorer
+    from service.analysis.selectors import SelectorDatabase, build_selector_db, decode_selector
+    from service.analysis.solidity import source_digest, tokenize
+    from service.config import settings
+    from service import main as service_main
+    from service.handlers import RiskService
+    from service.models import ContractRiskRequest, SecurityRiskResponse
+except ModuleNotFoundError:
+    from agent.service.agents.ContractAgent import ContractRiskAgent, ContractRiskLLMNarrative
+    from agent.service.agents.PhishingAgent import PhishingRiskAgent
+    from agent.service.analysis import clone_index as clone_index_module
+    from agent.service.analysis import solidity as solidity_module
+    from agent.service.analysis.bytecode import disassemble, resolve_minimal_proxy, scan_bytecode, strip_metadata
+    from agent.service.analysis.keccak import function_selector, keccak256_hex
+    from agent.service.analysis.clone_index import CloneIndex, add_clone_template, minhash, opcode_shingles
+    from agent.service.analysis.scoring import BUNDLED_CONFIG_PATH, ContractScorer
+    from agent.service.analysis.selectors import SelectorDatabase, build_selector_db, decode_selector
+    from agent.service.analysis.solidity import source_digest, tokenize
+    from agent.service.config import settings
+    from agent.service import main as service_main
+    from agent.service.handlers import RiskService
+    from agent.service.models import ContractRiskRequest, SecurityRiskResponse
+
+
+IMPLEMENTATION_SLOT = "360894a13ba1a3210667c828492db98dca3e2076cc3735a920a3ca505d382bbc"
+
+
+def _runtime_code() -> str:
+    transfer_ownership = function_selector("transferOwnership(address)")[2:]
+    pause = function_selector("pause()")[2:]
+    parts = [
+        "60003560e01c",  # PUSH1 0 CALLDATALOAD PUSH1 0xe0 SHR
+        f"8063{transfer_ownership}14610040" "57",  # DUP1 PUSH4 sel EQ PUSH2 dest JUMPI
+        f"63{pause}811461005057",  # PUSH4 sel DUP2 EQ PUSH2 dest JUMPI
+        f"8063{'ff' * 4}11610060" "57",  # DUP1 PUSH4 GT PUSH2 JUMPI: binary-search split, not a selector
+        "6000546001600160a01b031633146100705700",  # owner SLOAD ... CALLER EQ PUSH2 JUMPI STOP
+        f"7f{IMPLEMENTATION_SLOT}54",  # PUSH32 slot SLOAD
+        "5f5f365f5f5af4",  # DELEGATECALL
+        "7fff" + "ff" * 31,  # PUSH32 of 0xff bytes must not count as SELFDESTRUCT
+    ]
+    metadata = "a264" + "69706673" + "5822" + "00" * 34 + "64" + "736f6c63" + "43" + "000814" + "0033"
+    return "0x" + "".join(parts) + metadata
+
+
+def test_keccak256_matches_known_vectors() -> None:
+    assert keccak256_hex(b"") == "0xc5d2460186f7233c927e7db2dcc703c0e500b653ca82273b7bfad8045d85a470"
+    assert function_selector("transfer(address,uint256)") == "0xa9059cbb"
+    assert function_selector("getReserves()") == "0x0902f1ac"
+
+
+def test_disassemble_skips_push_data_and_metadata() -> None:
+    code = bytes.fromhex(_runtime_code()[2:])
+    body = strip_metadata(code)
+    assert len(body) < len(code)
+
+    opcodes, values = disassemble(bytes.fromhex("61ffff00"))
+    assert opcodes == [0x61, 0x00]
+    assert values == [0xFFFF, -1]
+
+
+def test_scan_bytecode_extracts_features() -> None:
+    features = scan_bytecode(_runtime_code())
+
+    assert features is not None
+    assert features["selectors"] == [function_selector("transferOwnership(address)"), function_selector("pause()")]
+    assert features["privileged_functions"] == ["pause()", "transferOwnership(address)"]
+    assert features["has_delegatecall"] is True
+    assert features["has_selfdestruct"] is False
+    assert features["eip1967_slots"] == ["implementation"]
+    assert features["functions"] == ["transferOwnership(address)", "pause()"]
+    assert features["owner_gated_checks"] == 1
+    assert features["tx_origin_checks"] == 0
+    assert features["code_hash"] == keccak256_hex(bytes.fromhex(_runtime_code()[2:]))
+    assert scan_bytecode(_runtime_code().upper().replace("0X", "0x")) is features
+    assert scan_bytecode("0xzz") is None
+
+
+def test_contract_prompt_uses_features_instead_of_hex() -> None:
+    agent = ContractRiskAgent.__new__(ContractRiskAgent)
+    req = ContractRiskRequest(contract_address="0xdef", code={"verified": False, "bytecode": _runtime_code()})
+    payload, code_key = agent._compact_code(req.model_dump())
+    prompt = agent._build_user_prompt("contract_risk", payload, lang="en")
+
+    assert _runtime_code()[2:] not in prompt
+    assert "bytecode_features.has_delegatecall=True" in prompt
+    assert payload["code"]["bytecode"].startswith("<omitted:")
+    assert code_key == payload["bytecode_features"]["code_hash"]
+
+
+def _minimal_proxy(implementation: str, push0: bool = False) -> str:
+    if push0:
+        return "0x365f5f375f5f365f73" + implementation + "5af43d5f5f3e5f3d91602a57fd5bf3"
+    return "0x363d3d373d3d3d363d73" + implementation + "5af43d82803e903d91602b57fd5bf3"
+
+
+def test_minimal_proxy_clones_share_one_assessment() -> None:
+    implementation = "be" * 20
+    assert resolve_minimal_proxy(bytes.fromhex(_minimal_proxy(implementation)[2:])) == "0x" + implementation
+    assert resolve_minimal_proxy(bytes.fromhex(_runtime_code()[2:])) is None
+
+    agent = ContractRiskAgent.__new__(ContractRiskAgent)
+    calls: list[dict] = []
+
+    def run_payload(task, payload, lang="zh"):
+        calls.append(payload)
+        return ContractRiskLLMNarrative(summary=f"clone #{len(calls)}", explanations=["stub"] * 3)
+
+    agent.run_payload = run_payload
+    permissions = {"owner": "0x" + "11" * 20, "can_mint": True}
+    clone_a = ContractRiskRequest(
+        contract_address="0x" + "0a" * 20,
+        code={"verified": False, "bytecode": _minimal_proxy(implementation)},
+        permissions=permissions,
+    )
+    clone_b = ContractRiskRequest(
+        contract_address="0x" + "0b" * 20,
+        code={"verified": False, "bytecode": _minimal_proxy(implementation, push0=True)},
+        permissions=permissions,
+    )
+    other_owner = ContractRiskRequest(
+        contract_address="0x" + "0c" * 20,
+        code={"verified": False, "bytecode": _minimal_proxy(implementation)},
+        permissions={**permissions, "owner": "0x" + "22" * 20},
+    )
+    no_mint = ContractRiskRequest(
+        contract_address="0x" + "0d" * 20,
+        code={"verified": False, "bytecode": _minimal_proxy(implementation)},
+        permissions={**permissions, "can_mint": False},
+    )
+
+    first = agent.run(clone_a)
+    assert agent.run(clone_b).summary == first.summary == "clone #1"
+    # The owner is an instance detail that does not change the verdict, so the narrative is shared.
+    assert agent.run(other_owner).summary == "clone #1"
+    # Instance signals are scored per request; a different verdict gets a narrative of its own.
+    renounced = agent.run(no_mint)
+    assert (first.risk_level, renounced.risk_level) == ("高", "低")
+    assert renounced.summary == "clone #2"
+    assert len(calls) == 2
+    assert calls[0]["proxy"] == {"is_proxy": True, "implementation_address": "0x" + implementation}
+
+
+LIBRARY_SOURCE = """
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.20;
+
+interface IERC20 {
+    function transfer(address to, uint256 amount) external returns (bool);
+}
+
+library Address {
+    function functionDelegateCall(address target, bytes memory data) internal returns (bytes memory) {
+        (bool ok, bytes memory ret) = target.delegatecall(data);
+        require(ok);
+        return ret;
+    }
+}
+
+abstract contract Ownable {
+    address private _owner;
+    modifier onlyOwner() {
+        require(msg.sender == _owner, "Ownable: caller is not the owner");
+        _;
+    }
+    function transferOwnership(address newOwner) public virtual onlyOwner {
+        _owner = newOwner;
+    }
+}
+"""
+
+TOKEN_SOURCE = """
+/* function mint(address to) external { } -- commented out, must be ignored */
+contract ScamToken is Ownable {
+    mapping(address => bool) private _bots;
+    uint256 public taxFee;
+    string private constant NOTE = "function burn() public {}";
+
+    function setTaxFee(uint256 fee) external onlyOwner {
+        taxFee = fee;
+    }
+
+    function addBots(address[] memory bots) public {
+        for (uint256 i = 0; i < bots.length; i++) {
+            _bots[bots[i]] = true;
+        }
+    }
+
+    function mint(address to, uint256 amount) external onlyOwner returns (bool) {
+        return true;
+    }
+
+    function rescueETH() external {
+        require(tx.origin == owner());
+        payable(msg.sender).transfer(address(this).balance);
+    }
+
+    function kill() external onlyOwner {
+        selfdestruct(payable(msg.sender));
+    }
+
+    function balanceOf(address account) public view returns (uint256) {
+        return 0;
+    }
+}
+"""
+
+
+def test_tokenize_drops_comments_and_keeps_strings_opaque() -> None:
+    tokens = tokenize('/* mint */ string s = "burn"; // pause')
+    assert ("ident", "mint") not in tokens
+    assert ("string", '"burn"') in tokens
+    assert all(text != "pause" for _, text in tokens)
+
+
+def test_source_digest_extracts_security_outline() -> None:
+    digest = source_digest(LIBRARY_SOURCE + TOKEN_SOURCE)
+
+    assert digest["main_contract"] == "ScamToken"
+    assert digest["pragma"] == "^0.8.20"
+    assert digest["access_modifiers"] == ["onlyOwner"]
+    functions = {item["function"]: item for item in digest["privileged_functions"]}
+    assert functions["ScamToken.setTaxFee"]["category"] == "fee"
+    assert functions["ScamToken.mint"]["access_controlled"] is True
+    assert functions["ScamToken.addBots"]["category"] == "blacklist"
+    assert functions["Ownable.transferOwnership"]["category"] == "ownership"
+    assert "ScamToken.balanceOf" not in functions
+    assert "ScamToken.burn" not in functions
+    assert digest["privileged_functions"][0]["function"].startswith("ScamToken.")
+    assert set(digest["unguarded_privileged_functions"]) == {"ScamToken.addBots", "ScamToken.rescueETH"}
+    assert digest["delegatecall_sites"] == ["Address.functionDelegateCall"]
+    assert digest["selfdestruct_sites"] == ["ScamToken.kill"]
+    assert digest["tx_origin_sites"] == ["ScamToken.rescueETH"]
+    assert digest["external_call_sites"] == ["ScamToken.rescueETH"]
+
+
+INLINE_GUARD_SOURCE = """
+contract Guarded is Ownable {
+    address private dev;
+    modifier isDev() {
+        require(dev == _msgSender(), "not dev");
+        _;
+    }
+    function setFee(uint256 fee) external {
+        require(msg.sender == owner(), "not owner");
+    }
+    function mint(address to, uint256 amount) external {
+        _checkOwner();
+    }
+    function pause() external {
+        if (msg.sender != dev) revert();
+    }
+    function grantMinter(address account) external {
+        require(hasRole(DEFAULT_ADMIN_ROLE, msg.sender));
+    }
+    function burn(uint256 amount) external isDev {
+    }
+    function withdraw() external {
+        require(msg.sender == tx.origin);
+        payable(msg.sender).transfer(address(this).balance);
+    }
+    function excludeFromFee(address account) external onlyOwner {
+    }
+    function robotics() external {
+    }
+    function setBotProtection(bool on) external {
+        balances[msg.sender] = 0;
+    }
+}
+"""
+
+
+def test_source_digest_sees_inline_owner_checks_and_whole_word_categories() -> None:
+    digest = source_digest(LIBRARY_SOURCE + INLINE_GUARD_SOURCE)
+    functions = {item["function"]: item for item in digest["privileged_functions"]}
+
+    for name in ("setFee", "mint", "pause", "burn"):
+        assert functions[f"Guarded.{name}"]["access_controlled"] is True, name
+    assert functions["Guarded.grantMinter"]["category"] == "mint"
+    assert functions["Guarded.grantMinter"]["access_controlled"] is True
+    assert "isDev" in digest["access_modifiers"]
+    # msg.sender == tx.origin only rejects contracts, and indexing by msg.sender checks nothing.
+    assert set(digest["unguarded_privileged_functions"]) == {"Guarded.withdraw", "Guarded.setBotProtection"}
+
+    assert functions["Guarded.excludeFromFee"]["category"] == "fee"
+    assert functions["Guarded.setBotProtection"]["category"] == "blacklist"
+    assert "Guarded.robotics" not in functions
+
+
+@pytest.mark.parametrize(
+    ("name", "category"),
+    [
+        ("robotics", None),
+        ("excludeFromFee", "fee"),
+        ("setAdministrator", None),
+        ("addToBlackList", "blacklist"),
+        ("setWhitelist", "blacklist"),
+        ("unblock", "blacklist"),
+        ("setMaxTxAmount", "limits"),
+        ("openTrading", "limits"),
+        ("rescueETH", "withdraw"),
+        ("_authorizeUpgrade", "upgrade"),
+        ("totalMinted", None),
+        ("remintable", None),
+        ("botanicalGarden", None),
+    ],
+)
+def test_privileged_categories_match_whole_name_words(name, category) -> None:
+    assert solidity_module._category(name) == category
+
+
+def test_contract_prompt_uses_source_digest() -> None:
+    padding = "\n".join(
+        f"contract Filler{i} {{ function helper{i}(uint256 x) internal pure returns (uint256) {{ return x * {i}; }} }}"
+        for i in range(800)
+    )
+    source = LIBRARY_SOURCE + padding + TOKEN_SOURCE
+    agent = ContractRiskAgent.__new__(ContractRiskAgent)
+    req = ContractRiskRequest(contract_address="0xdef", code={"verified": True, "source_code": source})
+    payload, _ = agent._compact_code(req.model_dump())
+    prompt = agent._build_user_prompt("contract_risk", payload, lang="en")
+
+    assert "taxFee = fee" not in prompt
+    assert "source_digest.main_contract='ScamToken'" in prompt
+    assert len(prompt) * 10 < len(source)
+    assert source_digest(source) is payload["source_digest"]
+
+
+def _random_runtime(seed: int, instructions: int = 3000) -> bytes:
+    rng = np.random.default_rng(seed)
+    plain = [0x01, 0x02, 0x03, 0x10, 0x14, 0x15, 0x16, 0x33, 0x35, 0x50, 0x51, 0x52, 0x54, 0x55, 0x56, 0x57, 0x5B, 0x80, 0x81, 0x90]
+    out = bytearray()
+    for _ in range(instructions):
+        if rng.random() < 0.3:
+            width = int(rng.integers(1, 33))
+            out.append(0x5F + width)
+            out.extend(rng.integers(0, 256, width, dtype=np.uint8).tobytes())
+        else:
+            out.append(plain[int(rng.integers(0, len(plain)))])
+    return bytes(out)
+
+
+def _light_edit(code: bytes) -> bytes:
+    """Change every PUSH immediate and splice a few extra instructions in, as a template fork would."""
+    opcodes = bytearray()
+    pc = 0
+    while pc < len(code):
+        op = code[pc]
+        opcodes.append(op)
+        if 0x60 <= op <= 0x7F:
+            width = op - 0x5F
+            opcodes.extend(b"\xaa" * width)
+            pc += width
+        pc += 1
+        if pc % 997 < 2:
+            opcodes.extend(b"\x33\x54\x14\x57")
+    return bytes(opcodes)
+
+
+@pytest.fixture
+def clone_dir(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "clone_index_dir", str(tmp_path))
+    clone_index_module._INDEXES.clear()
+    yield tmp_path
+    clone_index_module._INDEXES.clear()
+
+
+def test_clone_index_finds_light_edits_and_persists(clone_dir) -> None:
+    template = _random_runtime(1)
+    index = CloneIndex(clone_dir / "opcode")
+    template_id = index.add(minhash(opcode_shingles(template)), "rug-kit-a", {"risk": "high"})
+    index.add(minhash(opcode_shingles(_random_runtime(2))), "benign-token")
+    assert index.query(minhash(opcode_shingles(_light_edit(template))))[0]["id"] == template_id
+    index.commit()
+
+    index.add(minhash(opcode_shingles(_random_runtime(3))), "uncommitted")
+    reopened = CloneIndex(clone_dir / "opcode")
+    assert len(reopened) == 3
+    match = reopened.query(minhash(opcode_shingles(_light_edit(template))))[0]
+    assert match["label"] == "rug-kit-a"
+    assert match["risk"] == "high"
+    assert match["similarity"] > 0.8
+    assert reopened.query(minhash(opcode_shingles(_random_runtime(3))))[0]["label"] == "uncommitted"
+    assert reopened.query(minhash(opcode_shingles(_random_runtime(4)))) == []
+
+
+def test_clone_index_merges_runs(clone_dir) -> None:
+    index = CloneIndex(clone_dir / "opcode")
+    for seed in range(clone_index_module.MAX_RUNS + 3):
+        index.add(minhash(opcode_shingles(_random_runtime(100 + seed, 400))), f"t{seed}")
+        index.commit()
+
+    assert len(list((clone_dir / "opcode").glob("run-*.keys"))) <= clone_index_module.MAX_RUNS
+    for seed in range(clone_index_module.MAX_RUNS + 3):
+        assert index.query(minhash(opcode_shingles(_random_runtime(100 + seed, 400))))[0]["label"] == f"t{seed}"
+
+
+def test_templates_added_by_another_process_are_seen_and_ids_do_not_collide(clone_dir) -> None:
+    served = clone_index_module.clone_index("opcode", create=True)
+    # Another worker process holds its own CloneIndex over the same directory.
+    other = CloneIndex(clone_dir / "opcode")
+    other.add(minhash(opcode_shingles(_random_runtime(7))), "from-other-worker")
+    other.commit()
+
+    refreshed = clone_index_module.clone_index("opcode")
+    assert refreshed is not served
+    assert refreshed.query(minhash(opcode_shingles(_random_runtime(7))))[0]["label"] == "from-other-worker"
+    assert add_clone_template("local", bytecode="0x" + _random_runtime(8).hex()) == {"opcode": 1}
+    assert clone_index_module.clone_index("opcode") is clone_index_module.clone_index("opcode")
+
+
+def test_template_endpoint_requires_the_admin_token(clone_dir, monkeypatch) -> None:
+    client = TestClient(service_main.app)
+    body = {"label": "rug-kit", "bytecode": "0x" + _random_runtime(9).hex()}
+
+    monkeypatch.setattr(settings, "admin_token", "")
+    assert client.post("/risk/contract/templates", json=body).status_code == 403
+    monkeypatch.setattr(settings, "admin_token", "s3cret")
+    assert client.post("/risk/contract/templates", json=body).status_code == 401
+    assert client.post("/risk/contract/templates", json=body, headers={"X-Admin-Token": "wrong"}).status_code == 401
+    assert len(clone_index_module.clone_index("opcode", create=True)) == 0
+
+    added = client.post("/risk/contract/templates", json=body, headers={"X-Admin-Token": "s3cret"})
+    assert added.status_code == 200
+
+
+def test_contract_context_reports_clone_family(clone_dir) -> None:
+    template = _random_runtime(5)
+    assert add_clone_template("honeypot-v2", bytecode="0x" + template.hex(), meta={"risk": "high"}) == {"opcode": 0}
+
+    agent = ContractRiskAgent.__new__(ContractRiskAgent)
+    req = ContractRiskRequest(
+        contract_address="0xdef", code={"verified": False, "bytecode": "0x" + _light_edit(template).hex()}
+    )
+    payload, _ = agent._compact_code(req.model_dump())
+    match = payload["clone_family"][0]
+    assert match["template"] == "honeypot-v2"
+    assert match["template_risk"] == "high"
+    assert match["similarity_pct"] > 80
+
+
+def test_selector_db_binary_search_with_collisions(tmp_path) -> None:
+    path = tmp_path / "selectors.bin"
+    build_selector_db(
+        [
+            "# comment",
+            "function transfer(address,uint256)",
+            "function approve(address,uint256)",
+            # Real selector collision with burn(uint256): 0x42966c68.
+            "function collate_propagate_storage(bytes16)",
+            "function burn(uint256)",
+            "event Transfer(address,address,uint256)",
+        ],
+        path,
+    )
+    db = SelectorDatabase(path)
+
+    assert db.function_count == 4
+    assert db.functions("0xa9059cbb") == ["transfer(address,uint256)"]
+    assert db.functions("0x095ea7b3000000000000000000000000") == ["approve(address,uint256)"]
+    assert sorted(db.functions(0x42966C68)) == ["burn(uint256)", "collate_propagate_storage(bytes16)"]
+    assert db.functions("0xffffffff") == []
+    assert db.functions("nonsense") == []
+    assert db.events(keccak256_hex(b"Transfer(address,address,uint256)")) == ["Transfer(address,address,uint256)"]
+
+
+def test_bundled_selectors_decode_transactions() -> None:
+    assert decode_selector("0x095ea7b3") == "approve(address,uint256)"
+    assert decode_selector("0xa22cb465") == "setApprovalForAll(address,bool)"
+
+    agent = PhishingRiskAgent.__new__(PhishingRiskAgent)
+    payload = agent._decode_methods(
+        {
+            "transactions": [
+                {"method_sig": "0xa22cb465000000000000000000000000"},
+                {"method_sig": "0x12345678"},
+                {"method_sig": "transfer(address,uint256)"},
+            ]
+        }
+    )
+    assert [tx.get("method_name") for tx in payload["transactions"]] == ["setApprovalForAll(address,bool)", "unknown", None]
+
+
+def _no_model_agent() -> ContractRiskAgent:
+    agent = ContractRiskAgent.__new__(ContractRiskAgent)
+
+    def run_payload(*args, **kwargs):
+        raise AssertionError("clear-cut contracts must not wait on the model")
+
+    agent.run_payload = run_payload
+    return agent
+
+
+def test_clear_cut_contracts_skip_the_model() -> None:
+    agent = _no_model_agent()
+    safe = agent.run(
+        ContractRiskRequest(
+            contract_address="0x" + "01" * 20,
+            code={"verified": True},
+            permissions={"can_upgrade": False, "can_pause": False, "can_blacklist": False, "can_mint": False},
+        )
+    )
+    assert safe.risk_level == "低"
+    assert [r.reason for r in safe.top_reasons[:2]] == ["无特权控制", "源码已验证"]
+
+    rug = agent.run(
+        ContractRiskRequest(
+            contract_address="0x" + "02" * 20,
+            lang="en",
+            code={"verified": False},
+            permissions={"can_upgrade": True, "can_blacklist": True, "can_mint": True},
+        )
+    )
+    assert rug.risk_level == "high"
+    assert rug.confidence > 0.6
+    assert [r.reason for r in rug.top_reasons] == ["Blacklist control", "Unverified code", "Upgradeable logic"]
+
+
+def test_model_only_phrases_the_scored_verdict() -> None:
+    agent = ContractRiskAgent.__new__(ContractRiskAgent)
+    prompts: list[dict] = []
+
+    def run_payload(task, payload, lang="zh"):
+        prompts.append(payload)
+        return ContractRiskLLMNarrative(summary="Owner can mint.", explanations=["minting explained"])
+
+    agent.run_payload = run_payload
+    resp = agent.run(
+        ContractRiskRequest(
+            contract_address="0x" + "03" * 20,
+            lang="en",
+            code={"verified": True},
+            permissions={"can_mint": True, "can_pause": True},
+        )
+    )
+
+    assert prompts[0]["risk_score"]["risk_level"] == resp.risk_level == "low"
+    assert resp.summary == "Owner can mint."
+    assert resp.top_reasons[0].reason == "Verified source code"
+    assert resp.top_reasons[0].explanation == "minting explained"
+    assert resp.top_reasons[1].reason == "Owner can mint"
+    assert len(resp.top_reasons) == 3
+
+
+def test_scorer_weights_come_from_config() -> None:
+    with open(BUNDLED_CONFIG_PATH, encoding="utf-8") as handle:
+        config = json.load(handle)
+    payload = {"code": {"verified": True}, "permissions": {"can_pause": True}}
+    assert ContractScorer(config).score(payload)["risk_level"] == "low"
+
+    config["signals"]["can_pause"]["weight"] = 6.0
+    verdict = ContractScorer(config).score(payload)
+    assert verdict["risk_level"] == "high"
+    assert verdict["reasons"][0]["signal"] == "can_pause"
+    assert ContractScorer(config).score({"contract_address": "0x"})["score"] is None
+
+
+def test_service_scores_locally_without_agent() -> None:
+    service = RiskService()
+    service._contract_agent = None
+    resp = service.contract(
+        ContractRiskRequest(contract_address="0x" + "04" * 20, lang="en", code={"verified": False, "source_code": TOKEN_SOURCE})
+    )
+
+    assert resp.risk_level == "high"
+    assert "Self-destruct" in [r.reason for r in resp.top_reasons]
@@ -0,0 +1,103 @@
+import json
+
+try:
+    from service import main as service_main
+    from service.agents import PhishingRiskAgent
+    from service.analysis.history_chunks import (
+        HistoryChunkStore,
+        MissingHistoryChunks,
+        build_digest,
+        chunk_hash,
+        history_chunks,
+    )
+    from service.cache import CacheNamespace, JsonCodec
+except ModuleNotFoundError:
+    from agent.service import main as service_main
+    from agent.service.agents import PhishingRiskAgent
+    from agent.service.analysis.history_chunks import (
+        HistoryChunkStore,
+        MissingHistoryChunks,
+        build_digest,
+        chunk_hash,
+        history_chunks,
+    )
+    from agent.service.cache import CacheNamespace, JsonCodec
+
+import pytest
+from fastapi.testclient import TestClient
+
+TARGET = "0x84bc7ee53e8b2eb827738148b902d45f10eda2b9"
+LOOKALIKE = "0x84bc7ee53e8b2eb827738148b902d45f10eda2b8"
+
+
+def _history(count: int) -> list[dict]:
+    history = [
+        {"tx_hash": f"0x{i:x}", "timestamp": i, "from_address": TARGET, "to_address": f"0x{i:040x}", "value": "1"}
+        for i in range(1, count + 1)
+    ]
+    for i in (5, 17, 40, 41):
+        history[i]["to_address"] = LOOKALIKE
+    return history
+
+
+def _store() -> HistoryChunkStore:
+    return HistoryChunkStore(CacheNamespace("history-chunks-test", 60, JsonCodec(), shared=[]))
+
+
+def test_chunked_history_gives_the_same_context_as_the_full_list() -> None:
+    agent = PhishingRiskAgent()
+    history = _history(60)
+    chunks, tail = [history[:25], history[25:50]], history[50:]
+    store = _store()
+    hashes = [chunk_hash(chunk) for chunk in chunks]
+    assert all(store.put(value, chunk) for value, chunk in zip(hashes, chunks))
+
+    full = agent._compute_similarity_context({"address": TARGET, "transactions": history})
+    chunked = agent._compute_similarity_context({"address": TARGET, "transactions": tail}, store.digest(hashes))
+
+    assert chunked == full
+    assert full["most_similar_address"] == LOOKALIKE
+    assert [tx["tx_hash"] for tx in full["most_similar_transactions"]] == ["0x2a", "0x29", "0x12"]
+
+
+def test_store_rejects_mismatched_content_and_reports_missing_chunks() -> None:
+    store = _store()
+    chunk = _history(60)[:3]
+    assert not store.put("0" * 64, chunk)
+    assert store.put(chunk_hash(chunk), chunk)
+    assert store.missing([chunk_hash(chunk), "f" * 64, "not-a-hash"]) == ["f" * 64, "not-a-hash"]
+    with pytest.raises(MissingHistoryChunks) as raised:
+        store.digest([chunk_hash(chunk), "f" * 64])
+    assert raised.value.missing == ["f" * 64]
+
+
+def test_digest_keeps_the_newest_transactions_per_address() -> None:
+    digest = build_digest(_history(60))
+    assert len(digest) == 58
+    assert [tx["timestamp"] for tx in digest[LOOKALIKE[2:]]] == [42, 41, 18]
+    assert len(digest[TARGET[2:]]) == 3
+
+
+def test_phishing_route_asks_for_missing_chunks_then_uses_them() -> None:
+    client = TestClient(service_main.app)
+    history = _history(60)
+    chunk = [{key: value for key, value in tx.items() if value is not None} for tx in history[:50]]
+    name = chunk_hash(chunk)
+    body = {"address": TARGET, "lang": "en", "history_chunks": [name], "transactions": history[50:52]}
+
+    missing = client.post("/risk/phishing", json=body)
+    assert missing.status_code == 409
+    assert missing.json()["missing_chunks"] == [name]
+
+    uploads = [{"hash": name, "transactions": chunk}, {"hash": "0" * 64, "transactions": chunk}]
+    upload = client.post("/risk/phishing/chunks", json={"chunks": uploads})
+    assert upload.status_code == 200
+    assert upload.json() == {"stored": [name], "rejected": ["0" * 64]}
+    assert history_chunks().missing([name]) == []
+
+    steady = client.post("/risk/phishing", json={**body, "transactions": []})
+    assert steady.status_code == 200
+    assert len(json.dumps({**body, "transactions": []})) < 300
+    context = PhishingRiskAgent()._build_similarity_context({**body, "transactions": []})
+    assert context["most_similar_address"] == LOOKALIKE
+    assert context["candidate_count"] == 47
@@ -0,0 +1,112 @@
+import asyncio
+import threading
+
+try:
+    from service import main as service_main
+    from service.jobs import ContractJobManager, JobStore, job_id_for
+    from service.models import ContractRiskRequest, SecurityRiskResponse
+except ModuleNotFoundError:
+    from agent.service import main as service_main
+    from agent.service.jobs import ContractJobManager, JobStore, job_id_for
+    from agent.service.models import ContractRiskRequest, SecurityRiskResponse
+
+from fastapi.testclient import TestClient
+
+
+def _response(summary: str) -> SecurityRiskResponse:
+    reasons = [{"reason": f"reason {i}", "explanation": "stub"} for i in range(3)]
+    return SecurityRiskResponse(risk_level="low", summary=summary, confidence=0.6, top_reasons=reasons)
+
+
+def test_identical_submissions_share_one_job() -> None:
+    release = threading.Event()
+    calls: list[str] = []
+
+    def run(req: ContractRiskRequest) -> SecurityRiskResponse:
+        calls.append(req.contract_address)
+        release.wait(2)
+        return _response(f"assessed {req.contract_address}")
+
+    manager = ContractJobManager(run, JobStore(), workers=2)
+    req = ContractRiskRequest(contract_address="0xabc", lang="en")
+    first = manager.submit(req)
+    second = manager.submit(ContractRiskRequest(contract_address="0xabc", lang="en"))
+    assert first.job_id == second.job_id == job_id_for(req)
+    assert manager.submit(ContractRiskRequest(contract_address="0xabd", lang="en")).job_id != first.job_id
+
+    assert asyncio.run(manager.wait(first.job_id, 0.01)).status in ("queued", "running")
+    release.set()
+    job = asyncio.run(manager.wait(first.job_id, 2))
+    assert job.status == "done"
+    assert job.result.summary == "assessed 0xabc"
+    assert sorted(calls) == ["0xabc", "0xabd"]
+    assert manager.get("missing") is None
+
+
+def test_file_store_resumes_only_jobs_whose_lease_expired(tmp_path) -> None:
+    path = str(tmp_path / "jobs.sqlite")
+    req = ContractRiskRequest(contract_address="0xdef")
+    live = ContractRiskRequest(contract_address="0xfed")
+    # A lease of 0 stands in for an owner that died without finishing its job.
+    JobStore(path, lease_s=0).create(job_id_for(req), req.model_dump_json())
+    JobStore(path, lease_s=60).create(job_id_for(live), live.model_dump_json())
+
+    ran: list[str] = []
+
+    def run(r: ContractRiskRequest) -> SecurityRiskResponse:
+        ran.append(r.contract_address)
+        return _response("resumed")
+
+    manager = ContractJobManager(run, JobStore(path), workers=1)
+    job = asyncio.run(manager.wait(job_id_for(req), 2))
+    assert job.status == "done" and job.result.summary == "resumed"
+    assert JobStore(path).get(job.job_id).status == "done"
+    # The other job is still leased to a live owner, so it is neither rerun nor claimable.
+    assert ran == ["0xdef"]
+    assert JobStore(path).get(job_id_for(live)).status == "queued"
+    assert JobStore(path).claim_expired() == []
+
+    expired = JobStore(str(tmp_path / "ttl.sqlite"), ttl_s=0)
+    expired.create("job", req.model_dump_json())
+    assert expired.get("job") is None
+
+
+def test_waiter_sees_a_job_finished_by_another_worker(tmp_path) -> None:
+    path = str(tmp_path / "jobs.sqlite")
+    release = threading.Event()
+
+    def run(req: ContractRiskRequest) -> SecurityRiskResponse:
+        release.wait(2)
+        return _response("from the other worker")
+
+    runner = ContractJobManager(run, JobStore(path), workers=1)
+    poller = ContractJobManager(run, JobStore(path), workers=1, poll_interval_s=0.05)
+    job_id = runner.submit(ContractRiskRequest(contract_address="0x123")).job_id
+
+    async def wait_then_release():
+        waiting = asyncio.ensure_future(poller.wait(job_id, 5))
+        await asyncio.sleep(0.1)
+        release.set()
+        return await waiting
+
+    job = asyncio.run(wait_then_release())
+    assert job.status == "done" and job.result.summary == "from the other worker"
+
+
+def test_job_api_submit_poll_and_events(monkeypatch) -> None:
+    monkeypatch.setattr(service_main.service, "_contract_agent", None)
+    client = TestClient(service_main.app)
+    body = {"contract_address": "0x" + "05" * 20, "lang": "en", "code": {"verified": True}}
+
+    submitted = client.post("/risk/contract/jobs", json=body)
+    assert submitted.status_code == 202
+    job_id = submitted.json()["job_id"]
+
+    polled = client.get(f"/risk/contract/jobs/{job_id}", params={"wait": 5}).json()
+    assert polled["status"] == "done"
+    assert polled["result"]["risk_level"] == "low"
+
+    events = client.get(f"/risk/contract/jobs/{job_id}/events")
+    assert events.headers["content-type"].startswith("text/event-stream")
+    assert events.text.startswith("event: done\ndata: ")
+    assert client.get("/risk/contract/jobs/unknown").status_code == 404
@@ -0,0 +1,205 @@
+import threading
+import time
+
+import pytest
+
+try:
+    from service.admission import AdmissionController
+    from service.agents import agent as agent_module
+    from service.agents.PhishingAgent import PhishingRiskAgent
+    from service.agents.SlippageAgent import SlippageRiskAgent
+    from service.cache import CacheNamespace, JsonCodec
+    from service.config import settings
+    from service.handlers import RiskService
+    from service.model_scheduler import ModelCallScheduler, current_priority, model_priority
+    from service.models import ContractRiskRequest, PhishingRiskRequest, SlippageRiskRequest
+except ModuleNotFoundError:
+    from agent.service.admission import AdmissionController
+    from agent.service.agents import agent as agent_module
+    from agent.service.agents.PhishingAgent import PhishingRiskAgent
+    from agent.service.agents.SlippageAgent import SlippageRiskAgent
+    from agent.service.cache import CacheNamespace, JsonCodec
+    from agent.service.config import settings
+    from agent.service.handlers import RiskService
+    from agent.service.model_scheduler import ModelCallScheduler, current_priority, model_priority
+    from agent.service.models import ContractRiskRequest, PhishingRiskRequest, SlippageRiskRequest
+
+
+def _waiter(scheduler: ModelCallScheduler, order: list[str], name: str, priority: str, flow: str = "default"):
+    queued = scheduler.stats()["classes"][priority]["queued"]
+    thread = threading.Thread(target=lambda: (scheduler.acquire(priority, flow), order.append(name)), daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 2
+    while scheduler.stats()["classes"][priority]["queued"] == queued and not order[-1:] == [name]:
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+    return thread
+
+
+def _wait_for(order: list[str], size: int) -> None:
+    deadline = time.monotonic() + 2
+    while len(order) < size:
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_interactive_overtakes_queued_background_work() -> None:
+    scheduler = ModelCallScheduler(2, {"background": 1})
+    order: list[str] = []
+    scheduler.acquire("background")
+    _waiter(scheduler, order, "background-2", "background")
+    scheduler.acquire("interactive")
+    assert order == []
+
+    _waiter(scheduler, order, "interactive-2", "interactive")
+    scheduler.release("interactive")
+    _wait_for(order, 1)
+    assert order == ["interactive-2"]
+
+    scheduler.release("background")
+    _wait_for(order, 2)
+    assert order == ["interactive-2", "background-2"]
+
+    stats = scheduler.stats()
+    assert stats["inflight"] == 2
+    assert stats["classes"]["background"]["queued"] == 0
+    assert stats["classes"]["background"]["admitted"] == 2
+    assert stats["classes"]["background"]["max_wait_ms"] > 0
+
+
+def test_flows_are_served_round_robin_within_a_class() -> None:
+    scheduler = ModelCallScheduler(1)
+    order: list[str] = []
+    scheduler.acquire("interactive")
+    for name, flow in (("a1", "a"), ("a2", "a"), ("b1", "b")):
+        _waiter(scheduler, order, name, "interactive", flow)
+
+    for size in (1, 2, 3):
+        scheduler.release("interactive")
+        _wait_for(order, size)
+    assert order == ["a1", "b1", "a2"]
+
+
+def test_acquire_times_out_and_leaves_the_queue() -> None:
+    scheduler = ModelCallScheduler(1)
+    with scheduler.slot():
+        with pytest.raises(TimeoutError):
+            scheduler.acquire("background", timeout_s=0.02)
+    stats = scheduler.stats()["classes"]["background"]
+    assert stats["queued"] == 0 and stats["timeouts"] == 1
+
+    with model_priority("background"):
+        assert current_priority() == "background"
+        with scheduler.slot():
+            assert scheduler.stats()["classes"]["background"]["inflight"] == 1
+    assert current_priority() == "interactive"
+
+
+def test_agent_call_gives_up_on_a_slot_after_the_request_timeout(monkeypatch) -> None:
+    scheduler = ModelCallScheduler(1)
+    monkeypatch.setattr(agent_module, "model_scheduler", scheduler)
+    monkeypatch.setattr(settings, "request_timeout_s", 0.05)
+    agent = agent_module.BaseAgent.__new__(agent_module.BaseAgent)
+    agent._invoke = lambda *args, **kwargs: {"output": "called"}
+
+    with scheduler.slot():
+        started = time.monotonic()
+        with pytest.raises(TimeoutError):
+            agent.invoke("prompt")
+        assert time.monotonic() - started < 1
+    assert agent.invoke("prompt") == {"output": "called"}
+
+
+def test_interactive_caller_does_not_wait_on_a_background_build() -> None:
+    namespace = CacheNamespace("single-flight-test", 60, JsonCodec(), shared=[])
+    started, release = threading.Event(), threading.Event()
+    results: list[str] = []
+
+    def background_build() -> str:
+        started.set()
+        release.wait(5)
+        return "background"
+
+    def run_background() -> None:
+        with model_priority("background"):
+            results.append(namespace.get_or_build("k", background_build))
+
+    thread = threading.Thread(target=run_background, daemon=True)
+    thread.start()
+    assert started.wait(2)
+
+    assert namespace.get_or_build("k", lambda: "interactive") == "interactive"
+    release.set()
+    thread.join(2)
+    assert results == ["background"]
+    assert namespace._building == {} and namespace._building_priority == {}
+
+
+def test_admission_sheds_above_high_watermark_and_recovers_below_low() -> None:
+    scheduler = ModelCallScheduler(1)
+    admission = AdmissionController(scheduler, queue_high=2, queue_low=0, wait_high_ms=0, wait_low_ms=10_000)
+    order: list[str] = []
+    scheduler.acquire("interactive")
+    assert admission.admit() is True
+
+    _waiter(scheduler, order, "w1", "interactive")
+    _waiter(scheduler, order, "w2", "interactive")
+    assert admission.admit() is False
+
+    scheduler.release("interactive")
+    _wait_for(order, 1)
+    assert admission.admit() is False  # one still queued: above the low watermark
+
+    scheduler.release("interactive")
+    _wait_for(order, 2)
+    assert admission.admit() is True
+    assert admission.snapshot() == {"shedding": False, "admitted": 2, "shed": 2, "shed_episodes": 1}
+
+
+def test_overloaded_service_answers_locally_marked_degraded() -> None:
+    scheduler = ModelCallScheduler(1)
+    scheduler.acquire("interactive")
+    _waiter(scheduler, [], "queued", "interactive")
+
+    def no_model(*args, **kwargs):
+        raise AssertionError("shed requests must not call the model")
+
+    service = RiskService()
+    service._admission = AdmissionController(scheduler, queue_high=1, queue_low=0, wait_high_ms=0, wait_low_ms=0)
+    service._phishing_agent = PhishingRiskAgent.__new__(PhishingRiskAgent)
+    service._slippage_agent = SlippageRiskAgent.__new__(SlippageRiskAgent)
+    for agent in (service._phishing_agent, service._slippage_agent):
+        agent.run_payload = no_model
+
+    target = "0x1234567890abcdef1234567890abcdef12345678"
+    lookalike = "0x1234567890abcdef0000000000000000ef12345678"[:42]
+    phishing = service.phishing(
+        PhishingRiskRequest(
+            address=target,
+            lang="en",
+            transactions=[{"tx_hash": "0x1", "timestamp": 1, "from_address": lookalike}],
+        )
+    )
+    assert phishing.degraded is True
+    assert phishing.most_similar_address == lookalike
+    assert phishing.risk_level in {"high", "medium"}
+
+    slippage = service.slippage(
+        SlippageRiskRequest(
+            pool_address="0xpool",
+            token_pay_amount="10",
+            pool={"token_pay_amount": "1000", "token_get_amount": "900"},
+            lang="en",
+        )
+    )
+    assert slippage.degraded is True
+    assert slippage.slippage_level == "medium"
+    assert "%" in slippage.summary
+
+    contract = service.contract(
+        ContractRiskRequest(contract_address="0xdef", lang="en", code={"verified": True}, permissions={"can_mint": True})
+    )
+    assert contract.degraded is True
+    assert contract.top_reasons[1].reason == "Owner can mint"
+
+    scheduler.release("interactive")
@@ -0,0 +1,101 @@
+import os
+import time
+
+import pytest
+
+try:
+    from service import offload
+    from service.agents.PhishingAgent import PhishingRiskAgent
+    from service.config import settings
+    from service.offload import CpuPool
+except ModuleNotFoundError:
+    from agent.service import offload
+    from agent.service.agents.PhishingAgent import PhishingRiskAgent
+    from agent.service.config import settings
+    from agent.service.offload import CpuPool
+
+
+def _pid() -> int:
+    return os.getpid()
+
+
+def _sleep(seconds: float) -> str:
+    time.sleep(seconds)
+    return "slept"
+
+
+def _crash_in_worker() -> str:
+    if offload._IN_WORKER:
+        os._exit(1)
+    return "inline"
+
+
+def _nested_pid() -> tuple[int, int]:
+    return os.getpid(), offload.cpu_pool().run(_pid, size=10, threshold=0)
+
+
+@pytest.fixture
+def pool():
+    pool = CpuPool(workers=1, max_pending=4, timeout_s=5.0)
+    yield pool
+    pool.shutdown()
+
+
+def test_small_inputs_run_inline_without_starting_processes(pool) -> None:
+    assert pool.run(_pid, size=10, threshold=100) == os.getpid()
+    assert pool.stats["inline"] == 1
+    assert pool._executor is None
+
+
+def test_large_inputs_run_in_a_worker_process(pool) -> None:
+    worker_pid = pool.run(_pid, size=100, threshold=100)
+    assert worker_pid != os.getpid()
+    assert pool.stats["offloaded"] == 1
+    # Work submitted from inside a task runs there, instead of starting a pool in the worker.
+    assert pool.run(_nested_pid, size=100, threshold=100) == (worker_pid, worker_pid)
+
+
+def test_saturated_pool_runs_inline() -> None:
+    pool = CpuPool(workers=1, max_pending=0, timeout_s=5.0)
+    assert pool.run(_pid, size=100, threshold=0) == os.getpid()
+    assert pool.stats["saturated"] == 1
+    assert pool._executor is None
+
+
+def test_overrunning_task_times_out_and_the_pool_recovers() -> None:
+    pool = CpuPool(workers=1, max_pending=4, timeout_s=0.3)
+    try:
+        started = time.monotonic()
+        with pytest.raises(TimeoutError):
+            pool.run(_sleep, 30, size=1)
+        assert time.monotonic() - started < 5
+        assert pool.stats["timeouts"] == 1
+        pool.timeout_s = 5.0  # leave room for the replacement pool to start
+        assert pool.run(_sleep, 0, size=1) == "slept"
+    finally:
+        pool.shutdown()
+
+
+def test_broken_pool_falls_back_to_inline(pool) -> None:
+    assert pool.run(_crash_in_worker, size=1) == "inline"
+    assert pool.stats["broken"] == 1
+    assert pool.run(_pid, size=1) != os.getpid()
+
+
+def test_offloaded_similarity_matches_inline(monkeypatch) -> None:
+    agent = PhishingRiskAgent()
+    target = "0x84bc7ee53e8b2eb827738148b902d45f10eda2b9"
+    transactions = [
+        {"tx_hash": f"0x{i}", "timestamp": i, "from_address": target, "to_address": f"0x{i:040x}"} for i in range(1, 40)
+    ]
+    transactions.append({"tx_hash": "0xff", "timestamp": 99, "from_address": target, "to_address": "0xb487cac8c0a54a18744c5efe040146b41af9a7c8"})
+    payload = {"address": target, "transactions": transactions}
+
+    monkeypatch.setattr(settings, "cpu_offload_min_candidates", 10**9)
+    inline = agent._compute_similarity_context(payload)
+    monkeypatch.setattr(settings, "cpu_offload_min_candidates", 1)
+    offloaded = agent._compute_similarity_context(payload)
+
+    assert offloaded == inline
+    assert inline["most_similar_address"] == "0xb487cac8c0a54a18744c5efe040146b41af9a7c8"
+    assert offload.cpu_pool().stats["offloaded"] >= 1
@@ -0,0 +1,148 @@
+try:
+    from service.agents.ContractAgent import ContractRiskAgent, ContractRiskLLMNarrative
+    from service.analysis.history_chunks import build_digest
+    from service.cache import cache_namespace
+    from service.handlers import RiskService
+    from service.models import AccountTransaction, ContractRiskRequest, PhishingRiskRequest
+    from service.prescore import ContractPrescorer, select_contracts
+except ModuleNotFoundError:
+    from agent.service.agents.ContractAgent import ContractRiskAgent, ContractRiskLLMNarrative
+    from agent.service.analysis.history_chunks import build_digest
+    from agent.service.cache import cache_namespace
+    from agent.service.handlers import RiskService
+    from agent.service.models import AccountTransaction, ContractRiskRequest, PhishingRiskRequest
+    from agent.service.prescore import ContractPrescorer, select_contracts
+
+
+def _tx(contract: str | None, timestamp: int) -> AccountTransaction:
+    return AccountTransaction(
+        tx_hash=f"0x{timestamp:064x}", timestamp=timestamp, from_address="0x" + "aa" * 20, contract_address=contract
+    )
+
+
+def test_select_contracts_alternates_frequency_and_recency() -> None:
+    history = [_tx("0xA", 1), _tx("0xa", 2), _tx("0xa", 3), _tx("0xB", 4), _tx("0xB", 5), _tx(None, 6), _tx("0xC", 9)]
+
+    assert select_contracts(history, 2) == ["0xa", "0xc"]
+    assert select_contracts(history, 5) == ["0xa", "0xc", "0xb"]
+    assert select_contracts(history, 0) == []
+
+
+def test_submit_wallet_ranks_sealed_history_with_the_tail() -> None:
+    scored: list[str] = []
+    prescorer = ContractPrescorer(lambda req: scored.append(req.contract_address), top_k=2, workers=1, queue_size=8)
+    sealed = [_tx("0x" + "c1" * 20, 1), _tx("0x" + "c1" * 20, 2), _tx("0x" + "c2" * 20, 3)]
+    wallet = PhishingRiskRequest(address="0x" + "aa" * 20, transactions=[_tx("0x" + "c3" * 20, 4)])
+
+    history = build_digest(tx.model_dump(exclude_none=True) for tx in sealed)
+    assert prescorer.submit_wallet(wallet, history) == 2
+    prescorer.join()
+    # c1 is the most frequent across sealed history and tail, c3 the most recent.
+    assert sorted(scored) == ["0x" + "c1" * 20, "0x" + "c3" * 20]
+
+
+TOKEN_SOURCE = """
+contract Token is Ownable {
+    function mint(address to, uint256 amount) external onlyOwner {}
+    function setFee(uint256 fee) external onlyOwner {}
+}
+"""
+
+
+def _extension_payload(contract: str, bytecode: str, request_id: str, interaction_type: str = "approve") -> dict:
+    """Shaped like extension/src/approval/main.tsx buildContractRiskPayload."""
+    return {
+        "contract_address": contract,
+        "chain": "monad",
+        "lang": "en",
+        "interaction_type": interaction_type,
+        "creator": {"creator_address": "0x" + "cc" * 20, "creation_tx_hash": "0x" + "dd" * 32, "creation_timestamp": 1700000000},
+        "proxy": {"is_proxy": False},
+        "permissions": {"owner": "0x" + "ee" * 20, "can_mint": True},
+        "token_flags": {"tax_changeable": True},
+        "code": {
+            "verified": True,
+            "source_code": TOKEN_SOURCE,
+            "bytecode": bytecode,
+            "compiler_version": "v0.8.20+commit.a1b79de6",
+            "abi": '[{"type":"function","name":"mint"}]',
+        },
+        "extra_features": {
+            "approval_method": "eth_sendTransaction",
+            "approval_request_id": request_id,
+            "sender_address": "0x" + "aa" * 20,
+            "approve_amount": "1000",
+            "risk_contract_address": contract,
+        },
+    }
+
+
+def _unverified(payload: dict) -> dict:
+    """The same approval for a contract the explorer has no source for: only bytecode and owner are known."""
+    return {
+        **payload,
+        "code": {"verified": False, "bytecode": payload["code"]["bytecode"]},
+        "permissions": {"owner": payload["permissions"]["owner"]},
+        "token_flags": None,
+    }
+
+
+def test_prescore_precomputes_the_narrative_reused_by_extension_checks() -> None:
+    service = RiskService()
+    service._phishing_agent = None
+    fetched: list[str] = []
+
+    def get_profile(chain, address):
+        fetched.append(address)
+        return {
+            "block_number": 1,
+            "bytecode": "0x6080604052" + address[-4:] + "600080fd",
+            "implementation_address": None,
+            "admin_address": None,
+            "owner": "0x" + "ee" * 20,
+        }
+
+    service._contract_fetcher.get_profile = get_profile
+    agent = ContractRiskAgent.__new__(ContractRiskAgent)
+    calls: list[dict] = []
+
+    def run_payload(task, payload, lang="zh"):
+        calls.append(payload)
+        return ContractRiskLLMNarrative(summary=f"narrative #{len(calls)}")
+
+    agent.run_payload = run_payload
+    service._contract_agent = agent
+    service._prescorer = ContractPrescorer(service.warm_contract, top_k=2, workers=1, queue_size=8, ttl_s=60)
+
+    wallet = PhishingRiskRequest(
+        address="0x" + "aa" * 20,
+        lang="en",
+        transactions=[_tx("0x" + "c1" * 20, 1), _tx("0x" + "c1" * 20, 2), _tx("0x" + "c2" * 20, 3)],
+    )
+    service.phishing(wallet)
+    service._prescorer.join()
+    assert sorted(fetched) == ["0x" + "c1" * 20, "0x" + "c2" * 20]
+    assert service._prescorer.stats["completed"] == 2
+    # One background narrative per contract, in the wallet's language, for the approval flow.
+    assert [(call["lang"], call["interaction_type"]) for call in calls] == [("en", "approve")] * 2
+
+    contract = "0x" + "c1" * 20
+    bytecode = "0x6080604052" + contract[-4:] + "600080fd"
+    code_cache = cache_namespace("contract-code")
+    hits = code_cache.stats["hits"]
+    approval = _unverified(_extension_payload(contract, bytecode, "req-1"))
+    first = service.contract(ContractRiskRequest.model_validate(approval))
+    assert code_cache.stats["hits"] > hits
+    assert first.summary == "narrative #1"
+    assert first.top_reasons[0].reason == "Unverified code"
+    assert len(calls) == 2
+
+    # Verified source and declared permissions change the verdict, so that check narrates afresh.
+    verified = service.contract(ContractRiskRequest.model_validate(_extension_payload(contract, bytecode, "req-2")))
+    assert verified.summary == "narrative #3"
+    # The prompt names the interaction, so a swap check is not served the approve narrative.
+    swap = service.contract(ContractRiskRequest.model_validate(_extension_payload(contract, bytecode, "req-3", "swap")))
+    assert swap.summary == "narrative #4"
+
+    service.phishing(wallet)
+    assert service._prescorer.stats["skipped"] == 2
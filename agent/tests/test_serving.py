@@ -0,0 +1,123 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+try:
+    from service.config import settings
+    from service.serving import Supervisor, WorkerHealthTable, health_report, serve, worker_request
+except ModuleNotFoundError:
+    from agent.service.config import settings
+    from agent.service.serving import Supervisor, WorkerHealthTable, health_report, serve, worker_request
+
+AGENT_DIR = Path(__file__).resolve().parents[1]
+
+
+def test_health_slot_ignores_writes_from_a_replaced_worker() -> None:
+    table = WorkerHealthTable(2)
+    table.claim(1, pid=100, generation=0)
+    table.add(1, 100, "requests", 3)
+    table.claim(1, pid=200, generation=1)
+    table.add(1, 100, "requests", 1)
+    table.beat(1, 200, ready=True)
+
+    slot = table.read(1)
+    assert (slot["pid"], slot["generation"], slot["requests"], slot["ready"]) == (200, 1, 0, True)
+    assert table.read(0)["pid"] == 0
+
+
+def test_reload_keeps_the_old_worker_when_the_replacement_never_gets_ready() -> None:
+    supervisor = Supervisor("127.0.0.1", 0, workers=2)
+    supervisor._pids = {0: 100, 1: 101}
+    for index, pid in supervisor._pids.items():
+        supervisor.table.claim(index, pid=pid, generation=0)
+        supervisor.table.beat(index, pid, ready=True)
+    signals: list[tuple[int, int]] = []
+
+    def spawn(index: int) -> None:
+        supervisor._pids[index] = 200 + index
+        supervisor.table.claim(index, pid=200 + index, generation=supervisor.generation)
+
+    supervisor.preload = lambda refresh=False: None
+    supervisor._spawn = spawn
+    supervisor._wait_ready = lambda index: False
+    supervisor._kill = lambda pid, signum: signals.append((pid, signum))
+    supervisor._rolling_reload()
+
+    assert supervisor._pids == {0: 100, 1: 101}
+    assert signals == [(200, signal.SIGKILL)]
+    assert supervisor._draining == {}
+    slot = supervisor.table.read(0)
+    assert (slot["pid"], slot["generation"], slot["ready"]) == (100, 0, True)
+
+
+def test_several_workers_require_a_shared_job_store(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "job_store_path", "")
+    with pytest.raises(SystemExit, match="JOB_STORE_PATH"):
+        serve(workers=2)
+
+
+def test_unsupervised_process_reports_its_own_health() -> None:
+    with worker_request():
+        pass
+    report = health_report()
+    assert report["worker"]["pid"] == os.getpid()
+    assert report["worker"]["requests"] >= 1
+    assert [slot["pid"] for slot in report["workers"]] == [os.getpid()]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _workers(url: str) -> list[dict]:
+    try:
+        return httpx.get(url, timeout=1.0).json()["workers"]
+    except httpx.HTTPError:
+        return []
+
+
+def _wait_for(url: str, predicate, timeout_s: float = 30.0) -> list[dict]:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        workers = _workers(url)
+        if predicate(workers):
+            return workers
+        time.sleep(0.2)
+    raise AssertionError(f"condition not met; last health report: {_workers(url)}")
+
+
+def test_supervisor_serves_from_workers_and_reloads_them(tmp_path) -> None:
+    port = _free_port()
+    env = {**os.environ, "MODEL_API_KEY": "test", "HTTP_HOST": "127.0.0.1", "HTTP_PORT": str(port)}
+    env.update({"HTTP_WORKERS": "2", "HTTP_GRACEFUL_TIMEOUT_S": "2", "JOB_STORE_PATH": str(tmp_path / "jobs.sqlite")})
+    master = subprocess.Popen(
+        [sys.executable, "-m", "service.serving"],
+        cwd=AGENT_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}/health"
+    try:
+        first = _wait_for(url, lambda workers: len(workers) == 2 and all(w["ready"] for w in workers))
+        assert {w["generation"] for w in first} == {0}
+
+        master.send_signal(signal.SIGHUP)
+        second = _wait_for(url, lambda workers: all(w["generation"] == 1 and w["ready"] for w in workers))
+        assert not {w["pid"] for w in first} & {w["pid"] for w in second}
+
+        master.send_signal(signal.SIGTERM)
+        assert master.wait(timeout=15) == 0
+    finally:
+        if master.poll() is None:
+            master.kill()
+            master.wait()
@@ -0,0 +1,387 @@
+import numpy as np
+
+try:
+    from service.agents.SlippageAgent import SlippageRiskAgent
+    from service.engines.amm import format_units, get_amount_out, parse_units, quote_exact_in
+    from service.engines.concentrated import ConcentratedLiquidityIndex, load_concentrated_index, tick_to_sqrt_price
+    from service.engines.curve import build_slippage_curve, max_trade_for_slippage, slippage_curve
+    from service.engines.history import ReserveHistory, ReserveHistoryStore
+    from service.engines.mev import build_mev_batch, estimate_sandwich, simulate_sandwich
+    from service.engines.orderbook import OrderBookIndex
+    from service.engines.routing import build_route, optimal_split
+    from service.models import SlippageCurveRequest, SlippageMevBatchRequest, SlippageRouteRequest
+except ModuleNotFoundError:
+    from agent.service.agents.SlippageAgent import SlippageRiskAgent
+    from agent.service.engines.amm import format_units, get_amount_out, parse_units, quote_exact_in
+    from agent.service.engines.concentrated import (
+        ConcentratedLiquidityIndex,
+        load_concentrated_index,
+        tick_to_sqrt_price,
+    )
+    from agent.service.engines.curve import build_slippage_curve, max_trade_for_slippage, slippage_curve
+    from agent.service.engines.history import ReserveHistory, ReserveHistoryStore
+    from agent.service.engines.mev import build_mev_batch, estimate_sandwich, simulate_sandwich
+    from agent.service.engines.orderbook import OrderBookIndex
+    from agent.service.engines.routing import build_route, optimal_split
+    from agent.service.models import SlippageCurveRequest, SlippageMevBatchRequest, SlippageRouteRequest
+
+
+def _egold_amm_amount_out(amount_in: int, reserve_in: int, reserve_out: int) -> int:
+    amount_in_with_fee = amount_in * 997
+    return amount_in_with_fee * reserve_out // (reserve_in * 1000 + amount_in_with_fee)
+
+
+def test_amm_amount_out_matches_contract_math() -> None:
+    cases = [
+        (1, 10**18, 10**18),
+        (10**18, 1000 * 10**18, 900 * 10**18),
+        (123456789123456789, 98765432109876543210, 1234567890123456789012),
+        (5 * 10**20, 7 * 10**18, 3 * 10**25),
+    ]
+    for amount_in, reserve_in, reserve_out in cases:
+        assert get_amount_out(amount_in, reserve_in, reserve_out) == _egold_amm_amount_out(
+            amount_in, reserve_in, reserve_out
+        )
+
+
+def test_amm_quote_splits_fee_and_impact() -> None:
+    quote = quote_exact_in(10 * 10**18, 1000 * 10**18, 900 * 10**18)
+
+    shortfall = quote["spot_amount_out_wei"] - quote["amount_out_wei"]
+    assert shortfall == quote["fee_amount_out_wei"] + quote["price_impact_amount_out_wei"]
+    assert 0.29 < quote["fee_pct"] < 0.31
+    assert 0.98 < quote["price_impact_pct"] < 1.0
+    assert quote["estimated_slippage_pct"] == round(quote["fee_pct"] + quote["price_impact_pct"], 6)
+
+
+def test_amm_units_round_trip() -> None:
+    assert parse_units("1.5", 18) == 15 * 10**17
+    assert parse_units("0.0000001", 6) == 0
+    assert parse_units("12", 0) == 12
+    assert parse_units("-1", 18) is None
+    assert parse_units(-5) is None
+    assert parse_units(10**80) is None
+    assert parse_units(10**60, 18) is None
+    assert parse_units(0, 10**9) == 0
+    assert parse_units(7, 18) == 7 * 10**18
+    assert parse_units("abc", 18) is None
+    # Exponent notation, as JavaScript prints small numbers: (0.000001).toString() === "1e-6".
+    assert parse_units("1e-6", 6) == 1
+    assert parse_units("2.5E-7", 18) == 25 * 10**10
+    assert parse_units("1.5e3", 18) == 1500 * 10**18
+    assert parse_units(1e-06, 6) == 1
+    assert parse_units(0.1, 18) == 10**17
+    assert parse_units("1e-40", 18) == 0
+    large = "123456789012345678901234567890.123456789012345678"
+    assert parse_units(large, 18) == int(large.replace(".", ""))
+    assert parse_units("1e-999999999", 18) == 0
+    assert parse_units("1e60", 18) is None
+    assert parse_units("1e999999999", 18) is None
+    assert parse_units("-1e-6", 6) is None
+    assert parse_units("nan", 18) is None
+    assert parse_units(float("inf"), 18) is None
+    assert parse_units("", 18) is None
+    assert format_units(15 * 10**17, 18) == "1.5"
+    assert format_units(10**18, 18) == "1"
+
+
+def test_slippage_derived_context_uses_decimals_and_fee() -> None:
+    agent = SlippageRiskAgent()
+    ctx = agent._build_derived_context(
+        {
+            "token_pay_amount": "10",
+            "pool": {
+                "token_pay_amount": "1000",
+                "token_get_amount": "900",
+                "token_pay_decimals": 18,
+                "token_get_decimals": 6,
+            },
+        }
+    )
+    assert ctx["has_required_amounts"] is True
+    assert ctx["fee_bps"] == 30
+    assert ctx["expected_amount_out_wei"] == str(
+        _egold_amm_amount_out(10 * 10**18, 1000 * 10**18, 900 * 10**6)
+    )
+    assert abs(ctx["spot_price"] - 0.9) < 1e-12
+
+    missing = agent._build_derived_context({"token_pay_amount": "10", "pool": {"token_pay_amount": "0"}})
+    assert missing["assumption"] == "insufficient_data"
+
+
+def test_slippage_curve_matches_exact_quote() -> None:
+    amounts = np.array([1.0, 10.0, 50.0])
+    curve = slippage_curve(1000.0, 900.0, amounts)
+
+    for idx, amount in enumerate(amounts):
+        quote = quote_exact_in(int(amount) * 10**18, 1000 * 10**18, 900 * 10**18)
+        assert abs(curve["slippage_pct"][idx] - quote["estimated_slippage_pct"]) < 1e-6
+        assert abs(curve["price_impact_pct"][idx] - quote["price_impact_pct"]) < 1e-6
+
+
+def test_max_trade_for_slippage_closed_form() -> None:
+    size = max_trade_for_slippage(1000.0, 1.0)
+    assert size is not None
+    curve = slippage_curve(1000.0, 900.0, np.array([size]))
+    assert abs(curve["slippage_pct"][0] - 1.0) < 1e-9
+    assert max_trade_for_slippage(1000.0, 0.2) is None
+
+
+def test_build_slippage_curve_range_and_thresholds() -> None:
+    resp = build_slippage_curve(
+        SlippageCurveRequest(
+            pool={"token_pay_amount": "1000", "token_get_amount": "900"},
+            amount_max="100",
+            points=300,
+        )
+    )
+    assert resp.has_required_amounts is True
+    assert len(resp.slippage_pct) == 300
+    assert resp.slippage_pct == sorted(resp.slippage_pct)
+    assert [item.slippage_pct for item in resp.max_trade_sizes] == [0.5, 1.0, 3.0]
+
+    empty = build_slippage_curve(SlippageCurveRequest(pool={"token_pay_amount": "1000"}))
+    assert empty.has_required_amounts is False
+    assert empty.slippage_pct == []
+
+
+_CL_TICKS = [(-600, 10**18), (-120, 5 * 10**17), (120, -5 * 10**17), (600, -(10**18))]
+
+
+def test_concentrated_quote_within_single_range_matches_closed_form() -> None:
+    index = ConcentratedLiquidityIndex(_CL_TICKS, current_tick=0)
+    liquidity = 1.5 * 10**18
+    amount_in = 10**15
+
+    quote = index.quote(float(amount_in), zero_for_one=True, fee_bps=0)
+    new_sqrt = liquidity / (liquidity + amount_in)
+    assert quote["ticks_crossed"] == 0
+    assert abs(quote["amount_out"] - liquidity * (1.0 - new_sqrt)) / quote["amount_out"] < 1e-9
+
+
+def test_concentrated_quote_crosses_ticks_and_reports_unfilled() -> None:
+    index = ConcentratedLiquidityIndex(_CL_TICKS, current_tick=0)
+    s0, s1, s2 = 1.0, float(tick_to_sqrt_price(120)), float(tick_to_sqrt_price(600))
+    first_range_in = 1.5 * 10**18 * (s1 - s0)
+    full_in = first_range_in + 10**18 * (s2 - s1)
+
+    crossing = index.quote(first_range_in * 1.5, zero_for_one=False, fee_bps=0)
+    assert crossing["ticks_crossed"] == 1
+    assert crossing["unfilled_amount_in"] == 0.0
+
+    exhausted = index.quote(full_in * 2, zero_for_one=False, fee_bps=0)
+    assert abs(exhausted["unfilled_amount_in"] - full_in) / full_in < 1e-9
+    assert crossing["estimated_slippage_pct"] < exhausted["estimated_slippage_pct"]
+
+
+def test_concentrated_index_cached_per_snapshot() -> None:
+    state = {
+        "current_tick": 0,
+        "snapshot_id": "block-1",
+        "ticks": [{"tick": tick, "liquidity_net": str(net)} for tick, net in _CL_TICKS],
+    }
+    first = load_concentrated_index(state, "0xPool")
+    assert load_concentrated_index(state, "0xpool") is first
+
+
+def test_slippage_derived_context_concentrated_pool() -> None:
+    agent = SlippageRiskAgent()
+    ctx = agent._build_derived_context(
+        {
+            "pool_address": "0xclmm",
+            "token_pay_amount": "0.001",
+            "pool": {
+                "type": "CLMM",
+                "concentrated": {
+                    "current_tick": 0,
+                    "ticks": [{"tick": tick, "liquidity_net": str(net)} for tick, net in _CL_TICKS],
+                },
+            },
+        }
+    )
+    assert ctx["assumption"] == "concentrated_liquidity"
+    assert ctx["ticks_crossed"] == 0
+    assert 0.3 < ctx["estimated_slippage_pct"] < 0.4
+
+
+_BOOK_BIDS = [("99", "1"), ("98", "2"), ("97", "5")]
+_BOOK_ASKS = [("102", "2"), ("101", "1"), ("103", "5")]
+
+
+def test_order_book_buy_walks_asks() -> None:
+    book = OrderBookIndex(_BOOK_BIDS, _BOOK_ASKS)
+    assert book.best_ask == 101.0
+    assert book.best_bid == 99.0
+
+    quote = book.quote(101 + 204 + 103, side="buy")
+    assert quote["levels_consumed"] == 3
+    assert abs(quote["amount_out"] - 4.0) < 1e-12
+    assert abs(quote["fill_price"] - 102.0) < 1e-12
+    assert abs(quote["estimated_slippage_pct"] - 100 / 101) < 1e-6
+
+
+def test_order_book_sell_reports_unfilled() -> None:
+    book = OrderBookIndex(_BOOK_BIDS, _BOOK_ASKS)
+
+    quote = book.quote(10.0, side="sell")
+    assert quote["filled_amount_in"] == 8.0
+    assert quote["unfilled_amount_in"] == 2.0
+    assert quote["amount_out"] == 99 + 196 + 485
+
+
+def test_order_book_rejects_invalid_levels() -> None:
+    for bids, asks in ((_BOOK_BIDS, [("-1", "1")]), ([("105", "1")], _BOOK_ASKS), ([("x", "1")], [])):
+        try:
+            OrderBookIndex(bids, asks)
+        except ValueError:
+            continue
+        raise AssertionError("invalid order book accepted")
+
+
+def test_slippage_derived_context_order_book() -> None:
+    agent = SlippageRiskAgent()
+    ctx = agent._build_derived_context(
+        {
+            "token_pay_amount": "1",
+            "orderbook": {
+                "bids": [{"price": price, "amount": amount} for price, amount in _BOOK_BIDS],
+                "asks": [{"price": price, "amount": amount} for price, amount in _BOOK_ASKS],
+                "side": "sell",
+            },
+        }
+    )
+    assert ctx["assumption"] == "order_book"
+    assert ctx["fill_price"] == 99.0
+    assert ctx["estimated_slippage_pct"] == 0.0
+
+
+def test_optimal_split_equalizes_marginal_rates() -> None:
+    reserves_in = np.array([1000.0, 500.0, 10.0])
+    reserves_out = np.array([900.0, 460.0, 5.0])
+    fees = np.array([30.0, 30.0, 30.0])
+
+    allocation = optimal_split(reserves_in, reserves_out, fees, 100.0)
+    assert abs(allocation.sum() - 100.0) < 1e-9
+    assert allocation[2] == 0.0
+
+    fee_factor = 0.997
+    marginal = fee_factor * reserves_out * reserves_in / (reserves_in + fee_factor * allocation) ** 2
+    assert abs(marginal[0] - marginal[1]) < 1e-12
+    assert marginal[2] < marginal[0]
+
+
+def test_build_route_beats_single_pool() -> None:
+    resp = build_route(
+        SlippageRouteRequest(
+            token_pay_amount="100",
+            pools=[
+                {"pool_address": "0xa", "token_pay_amount": "1000", "token_get_amount": "900"},
+                {"pool_address": "0xb", "token_pay_amount": "800", "token_get_amount": "720"},
+            ],
+        )
+    )
+    assert resp.has_required_amounts is True
+    assert resp.best_single_pool_address == "0xa"
+    assert len(resp.allocations) == 2
+    assert float(resp.expected_amount_out) > float(resp.single_pool_amount_out)
+    assert resp.split_slippage_pct < resp.single_pool_slippage_pct
+    assert abs(sum(float(item.token_pay_amount) for item in resp.allocations) - 100.0) < 1e-9
+
+
+def test_sandwich_front_run_respects_tolerance_and_is_optimal() -> None:
+    amount_in, reserve_in, reserve_out = 10 * 10**18, 1000 * 10**18, 900 * 10**18
+    estimate = estimate_sandwich(amount_in, reserve_in, reserve_out, slippage_tolerance_bps=100)
+    expected_out = get_amount_out(amount_in, reserve_in, reserve_out)
+
+    front_run = estimate["front_run_amount_wei"]
+    assert estimate["exposed"] is True
+    assert estimate["victim_amount_out_wei"] >= expected_out * 9900 // 10000
+    assert simulate_sandwich(front_run + front_run // 1000, amount_in, reserve_in, reserve_out, 30)[1] < (
+        expected_out * 9900 // 10000
+    )
+    for scale in (0.5, 0.9, 0.99):
+        profit, _ = simulate_sandwich(int(front_run * scale), amount_in, reserve_in, reserve_out, 30)
+        assert profit <= estimate["attacker_profit_wei"]
+
+
+def test_unconstrained_front_run_matches_a_brute_force_optimum() -> None:
+    # A trade worth 10% of the pool: the best front-run is many times the pool size.
+    reserve, amount_in = 10**24, 10**23
+    estimate = estimate_sandwich(amount_in, reserve, reserve, None)
+
+    grid = [int(reserve * 10 ** (step / 200)) for step in range(-400, 601)]
+    best = max(grid, key=lambda x: simulate_sandwich(x, amount_in, reserve, reserve, 30)[0])
+    best_profit = simulate_sandwich(best, amount_in, reserve, reserve, 30)[0]
+    assert estimate["attacker_profit_wei"] >= best_profit
+    assert abs(estimate["front_run_amount_wei"] - best) / best < 0.02
+    assert estimate["front_run_amount_wei"] > 10 * reserve
+
+
+def test_sandwich_not_exposed_below_fee_cost() -> None:
+    estimate = estimate_sandwich(10**17, 1000 * 10**18, 900 * 10**18, slippage_tolerance_bps=50)
+    assert estimate["exposed"] is False
+    assert estimate["attacker_profit_wei"] == 0
+    assert estimate["victim_loss_pct"] == 0.0
+
+
+def test_mev_batch_mode() -> None:
+    resp = build_mev_batch(
+        SlippageMevBatchRequest(
+            items=[
+                {
+                    "token_pay_amount": "10",
+                    "pool": {"token_pay_amount": "1000", "token_get_amount": "900"},
+                    "slippage_tolerance_pct": 1.0,
+                },
+                {"token_pay_amount": "10", "pool": {"token_pay_amount": "1000", "token_get_amount": "900"}},
+                {"token_pay_amount": "10", "pool": {"token_pay_amount": "0"}},
+            ]
+        )
+    )
+    bounded, unbounded, missing = resp.results
+    assert bounded is not None and unbounded is not None
+    assert bounded.victim_loss_pct <= 1.0
+    assert unbounded.victim_loss_pct > bounded.victim_loss_pct
+    assert missing is None
+
+
+def test_reserve_history_rolling_metrics_match_window() -> None:
+    rng = np.random.default_rng(7)
+    reserves0 = 1000.0 * np.exp(np.cumsum(rng.normal(0, 0.02, 200)))
+    reserves1 = 900.0 * np.exp(np.cumsum(rng.normal(0, 0.02, 200)))
+    history = ReserveHistory(capacity=32)
+    for block, (r0, r1) in enumerate(zip(reserves0, reserves1)):
+        history.append(r0, r1, block, float(block))
+
+    assert len(history) == 32
+    window0, window1 = reserves0[-32:], reserves1[-32:]
+    returns = np.diff(np.log(window1 / window0))
+    metrics = history.metrics(token_pay_index=0)
+    assert metrics["samples"] == 32
+    assert metrics["window_blocks"] == 31
+    assert abs(metrics["price_volatility_pct"] - returns.std(ddof=1) * 100) < 1e-6
+    assert abs(metrics["reserve_pay_drift_pct"] - (window0[-1] / window0[0] - 1) * 100) < 1e-6
+    liquidity = np.sqrt(window0 * window1)
+    assert abs(metrics["liquidity_change_pct"] - (liquidity[-1] / liquidity[0] - 1) * 100) < 1e-6
+
+    flipped = history.metrics(token_pay_index=1)
+    assert flipped["price_volatility_pct"] == metrics["price_volatility_pct"]
+    assert flipped["reserve_pay_drift_pct"] == metrics["reserve_get_drift_pct"]
+
+
+def test_reserve_history_store_is_bounded_and_orients_pairs() -> None:
+    store = ReserveHistoryStore(capacity=4, max_pools=2)
+    assert store.record("monad", "0xA", 1000, 900, block_number=1)
+    assert not store.record("monad", "0xa", 1000, 900, block_number=1)
+    assert not store.record("monad", "0xa", 1100, 800, block_number=0)
+    assert store.metrics("monad", "0xa") is None
+
+    assert store.resolve_pay_index("monad", "0xa", 1000, 900) == 0
+    assert store.resolve_pay_index("monad", "0xa", 900, 1000) == 1
+    store.record("monad", "0xa", 500, 450, block_number=2)
+    assert store.metrics("monad", "0xa")["liquidity_change_pct"] == -50.0
+
+    store.record("monad", "0xb", 1, 1)
+    store.record("monad", "0xc", 1, 1)
+    assert len(store) == 2
+    assert store.metrics("monad", "0xa") is None
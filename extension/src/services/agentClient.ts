@@ -183,9 +183,25 @@ interface ApiPhishingRiskRequest {
   address: string
   chain?: string
   lang?: RiskLanguage
+  history_chunks?: string[]
   transactions?: AccountTransaction[]
 }
 
+interface ApiHistoryChunk {
+  hash: string
+  transactions: AccountTransaction[]
+}
+
+interface ApiHistoryChunkUploadResponse {
+  stored: string[]
+  rejected: string[]
+}
+
+interface ApiMissingChunksPayload {
+  detail?: string
+  missing_chunks?: string[]
+}
+
 interface ApiContractRiskRequest {
   contract_address: string
   chain?: string
@@ -214,6 +230,7 @@ interface ApiSlippageRiskRequest {
   token_pay_amount: string
   interaction_type?: string | null
   pool?: ApiSlippagePoolStats
+  orderbook?: OrderBookStats
 }
 
 interface ApiSlippageRiskResponse {
@@ -261,8 +278,8 @@ const readErrorMessage = async (response: Response): Promise<string> => {
   return text || `HTTP ${response.status}`
 }
 
-const postJson = async <TRequest, TResponse>(path: string, payload: TRequest): Promise<TResponse> => {
-  const response = await fetch(buildAgentUrl(path), {
+const postRaw = <TRequest>(path: string, payload: TRequest): Promise<Response> =>
+  fetch(buildAgentUrl(path), {
     method: 'POST',
     headers: {
       'Content-Type': 'application/json'
@@ -270,6 +287,9 @@ const postJson = async <TRequest, TResponse>(path: string, payload: TRequest): P
     body: JSON.stringify(payload)
   })
 
+const postJson = async <TRequest, TResponse>(path: string, payload: TRequest): Promise<TResponse> => {
+  const response = await postRaw(path, payload)
+
   if (!response.ok) {
     throw new Error(`Agent API 请求失败 (${path})：${await readErrorMessage(response)}`)
   }
@@ -277,10 +297,82 @@ const postJson = async <TRequest, TResponse>(path: string, payload: TRequest): P
   return (await response.json()) as TResponse
 }
 
-const toApiPhishingRequest = (payload: PhishingRiskInput): ApiPhishingRiskRequest => ({
+// History is sealed oldest-first into fixed-size chunks; a sealed chunk never changes, so after its
+// first upload a request names it by hash and only the unsealed tail is sent in full.
+const HISTORY_CHUNK_SIZE = 50
+const MAX_HISTORY_CHUNKS = 256
+const MAX_CHUNKS_PER_UPLOAD = 64
+// AccountTransaction fields in sorted order: the server hashes exactly these, keys sorted, nulls dropped.
+const HISTORY_TX_FIELDS = [
+  'contract_address',
+  'from_address',
+  'method_sig',
+  'success',
+  'timestamp',
+  'to_address',
+  'token_address',
+  'token_decimals',
+  'tx_hash',
+  'tx_type',
+  'value'
+] as const
+
+interface SealedHistory {
+  chunks: ApiHistoryChunk[]
+  tail: AccountTransaction[]
+}
+
+// Chunks this page has uploaded; the server answers 409 with missing_chunks if it has since evicted one.
+const uploadedHistoryChunks = new Set<string>()
+
+const canonicalTransaction = (tx: AccountTransaction): AccountTransaction => {
+  const canonical: Record<string, unknown> = {}
+  for (const field of HISTORY_TX_FIELDS) {
+    const value = tx[field]
+    if (value !== null && value !== undefined) {
+      canonical[field] = value
+    }
+  }
+  return canonical as unknown as AccountTransaction
+}
+
+const sha256Hex = async (text: string): Promise<string> => {
+  const digest = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(text))
+  return Array.from(new Uint8Array(digest), (byte) => byte.toString(16).padStart(2, '0')).join('')
+}
+
+const sealHistory = async (transactions: AccountTransaction[]): Promise<SealedHistory> => {
+  const ordered = transactions
+    .map(canonicalTransaction)
+    .sort((a, b) => a.timestamp - b.timestamp || (a.tx_hash < b.tx_hash ? -1 : a.tx_hash > b.tx_hash ? 1 : 0))
+  const sealedCount = Math.floor(ordered.length / HISTORY_CHUNK_SIZE) * HISTORY_CHUNK_SIZE
+  const chunks: ApiHistoryChunk[] = []
+  for (let start = 0; start < sealedCount; start += HISTORY_CHUNK_SIZE) {
+    const chunk = ordered.slice(start, start + HISTORY_CHUNK_SIZE)
+    chunks.push({ hash: await sha256Hex(JSON.stringify(chunk)), transactions: chunk })
+  }
+  return { chunks: chunks.slice(-MAX_HISTORY_CHUNKS), tail: ordered.slice(sealedCount) }
+}
+
+const uploadHistoryChunks = async (chunks: ApiHistoryChunk[]): Promise<void> => {
+  for (let start = 0; start < chunks.length; start += MAX_CHUNKS_PER_UPLOAD) {
+    const batch = chunks.slice(start, start + MAX_CHUNKS_PER_UPLOAD)
+    const result = await postJson<{ chunks: ApiHistoryChunk[] }, ApiHistoryChunkUploadResponse>(
+      '/risk/phishing/chunks',
+      { chunks: batch }
+    )
+    if (result.rejected.length > 0) {
+      throw new Error(`Agent API 拒绝了 ${result.rejected.length} 个历史分块（哈希不匹配）`)
+    }
+    result.stored.forEach((hash) => uploadedHistoryChunks.add(hash))
+  }
+}
+
+const toApiPhishingRequest = (payload: PhishingRiskInput, history?: SealedHistory): ApiPhishingRiskRequest => ({
   address: payload.address,
   chain: payload.chain,
-  transactions: payload.transactions
+  history_chunks: history && history.chunks.length > 0 ? history.chunks.map((chunk) => chunk.hash) : undefined,
+  transactions: history && history.chunks.length > 0 ? history.tail : payload.transactions
 })
 
 const toApiContractRequest = (payload: ContractRiskInput): ApiContractRiskRequest => ({
@@ -320,7 +412,8 @@ const toApiSlippageRequest = (payload: SlippageRiskInput): ApiSlippageRiskReques
     chain: payload.chain,
     token_pay_amount: tokenPayAmount,
     interaction_type: payload.interaction_type,
-    pool
+    pool,
+    orderbook: payload.orderbook
   }
 }
 
@@ -351,11 +444,29 @@ const toSlippageRiskResponse = (
   }
 }
 
-export const analyzePhishingRisk = async (payload: PhishingRiskInput): Promise<PhishingRiskResponse> =>
-  postJson<ApiPhishingRiskRequest, PhishingRiskResponse>(
-    '/risk/phishing',
-    toApiPhishingRequest(payload)
-  )
+export const analyzePhishingRisk = async (payload: PhishingRiskInput): Promise<PhishingRiskResponse> => {
+  const transactions = payload.transactions ?? []
+  if (transactions.length < HISTORY_CHUNK_SIZE) {
+    return postJson<ApiPhishingRiskRequest, PhishingRiskResponse>('/risk/phishing', toApiPhishingRequest(payload))
+  }
+
+  const history = await sealHistory(transactions)
+  await uploadHistoryChunks(history.chunks.filter((chunk) => !uploadedHistoryChunks.has(chunk.hash)))
+  const request = toApiPhishingRequest(payload, history)
+  let response = await postRaw('/risk/phishing', request)
+  if (response.status === 409) {
+    // The server lost some chunks (expiry, another node): upload exactly those and retry once.
+    const body = (await response.json().catch(() => null)) as ApiMissingChunksPayload | null
+    const missing = new Set(body?.missing_chunks ?? [])
+    missing.forEach((hash) => uploadedHistoryChunks.delete(hash))
+    await uploadHistoryChunks(history.chunks.filter((chunk) => missing.has(chunk.hash)))
+    response = await postRaw('/risk/phishing', request)
+  }
+  if (!response.ok) {
+    throw new Error(`Agent API 请求失败 (/risk/phishing)：${await readErrorMessage(response)}`)
+  }
+  return (await response.json()) as PhishingRiskResponse
+}
 
 export const analyzeContractRisk = (payload: ContractRiskInput) =>
   postJson<ApiContractRiskRequest, SecurityRiskResponse>(